@@ -0,0 +1,507 @@
+"""
+Anomaly and change-point detection over the daily tables, for detect_anomalies.
+
+Every numeric column of a table in ANOMALY_SOURCES is one daily series for
+the whole table plus one per dimension value (channel, product, campaign,
+ticket category). All series of a table sit in one (series x days) NumPy
+matrix, and each step below works on whole matrices:
+
+- Day-of-week baseline: the median of the same weekday over the previous
+  8 weeks. Residuals are taken in log space for summed metrics, so +40%
+  scores the same at any volume, and as is for averages, rates and series
+  that go negative, then scaled by the series' noise level into z-scores.
+- YoY check: the change from 364 days earlier (same weekday) against its
+  trailing 28-day median. Where a year of history exists, a day must stand
+  out on both baselines to be reported as a spike or drop.
+- Calendar effects: the mean z-score per day of the month. Days that are
+  consistently high or low (billing-day spikes on the 1st and 15th) become
+  one recurring finding instead of dozens of single days.
+- Change points: two-sided CUSUMs. One over the day-of-week z-scores finds
+  abrupt shifts; one over the YoY change, against its level when a year of
+  history first became available, finds trends too slow for an 8-week
+  baseline to notice. Back-to-back alarms merge into one finding, and
+  shifts that are only the usual time of year are dropped.
+
+Scans are incremental. Each table's matrix, noise levels, CUSUM sums and
+calendar sums are kept between calls, so after days are appended only the
+new tail is loaded and scored. Rows up to the last scanned day are
+assumed unchanged while the database file stays the same inode; a
+replaced file, new dimension values or a full rescan start the table over.
+"""
+
+import threading
+import warnings
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+from period_compare import ALL_GROUPS, ROW_COUNT, is_averaged, load_window, metric_columns, quote
+from rollups import YOY_LOOKBACK_DAYS
+
+# Table -> (date column, dimension column or None)
+ANOMALY_SOURCES = {
+    "daily_metrics": ("date", None),
+    "channel_metrics": ("date", "channel_id"),
+    "product_metrics": ("date", "product_id"),
+    "lead_form_metrics": ("date", "campaign_id"),
+    "support_tickets": ("created_date", "category"),
+}
+
+DOW_LAGS = range(7, 57, 7)      # Same weekday over the previous 8 weeks
+MIN_BASELINE_WEEKS = 4          # Fewer same-weekday values than this: no baseline
+MIN_NOISE_DAYS = 28             # Residual days needed to fit a series' noise level
+YOY_REFERENCE_DAYS = 28         # Trailing days whose median YoY change is "normal"
+TREND_REFERENCE_DAYS = 56       # First days of YoY history that trends are measured from
+MAD_SCALE = 1.4826              # MAD -> standard deviation for normal noise
+MEAN_AD_SCALE = 1.2533          # Mean absolute deviation -> standard deviation
+SPARSE_ZERO_SHARE = 0.05        # Summed series with this share of zero days are "sparse"
+SPARSE_MIN_NOISE = np.log(2) / 2  # ... where going from 0 to 1 is two noise levels, not a spike
+
+POINT_Z = 4.0                   # Single days at least this many noise levels off
+YOY_CONFIRM_Z = 3.0             # ... and this far off the usual YoY change
+CALENDAR_T = 5.0                # Day-of-month effects with at least this t-statistic
+CALENDAR_MIN_MONTHS = 6
+CUSUM_K = 0.5                   # Allowance: shifts under half a noise level are ignored
+CUSUM_H = 8.0                   # Alarm threshold
+Z_CLIP = 3.0                    # Single spikes add at most this much to a CUSUM
+SHIFT_MERGE_DAYS = 14           # Alarms this close together are one finding
+SHIFT_WINDOW = 28               # Days compared before / after a change
+MIN_WINDOW_DAYS = 5             # Days with data needed on each side
+SHIFT_MIN_SCORE = 4.0
+
+LEVEL, TREND = "level", "trend"  # CUSUM channels
+FINDING_COLUMNS = ["table", "slice", "metric", "kind", "start", "end", "change", "score"]
+
+
+def lagged(values, lag, t0):
+    """Columns t0.. of values shifted right by lag days (NaN where the lag runs off the start)."""
+    rows, days = values.shape
+    out = np.full((rows, days - t0), np.nan)
+    first = max(t0, lag)
+    if first < days:
+        out[:, first - t0:] = values[:, first - lag:days - lag]
+    return out
+
+
+def robust_scale(residuals, floor):
+    """
+    Per-row noise level of residuals: the larger of the MAD and mean absolute
+    deviation estimates, no lower than floor. The MAD ignores outliers but
+    collapses on lumpy series whose typical day repeats exactly.
+    """
+    deviation = np.abs(residuals - np.nanmedian(residuals, axis=1, keepdims=True))
+    mad = MAD_SCALE * np.nanmedian(deviation, axis=1)
+    return np.fmax(np.fmax(mad, MEAN_AD_SCALE * np.nanmean(deviation, axis=1)), floor)
+
+
+def window_mean(row, start, end):
+    """(mean, days with data) of row[start:end], or (nan, 0)."""
+    values = row[max(0, start):max(0, end)]
+    values = values[~np.isnan(values)]
+    return (values.mean(), len(values)) if len(values) else (np.nan, 0)
+
+
+class TableSeries:
+    """The daily series of one table and the detector state carried between scans."""
+
+    def __init__(self, table, date_column, dimension, metrics, slices, first_day, values, inode):
+        self.table = table
+        self.date_column = date_column
+        self.dimension = dimension
+        self.metrics = metrics
+        self.slices = slices
+        self.keys = [(s, m) for m in metrics for s in slices]
+        self.first_day = first_day
+        self.inode = inode
+        # Averages, rates and series that go negative (net revenue) are scored as is, the rest in log space
+        averaged = np.array([is_averaged(m, table) for _, m in self.keys])
+        self.linear = averaged | (np.nanmin(values, axis=1, initial=0) < 0)
+        seen = ~np.isnan(values)
+        self.first_seen = np.where(seen.any(axis=1), seen.argmax(axis=1), values.shape[1])  # First day with data
+
+        rows = len(self.keys)
+        self.values = np.empty((rows, 0))     # Raw daily values
+        self.level = np.empty((rows, 0))      # log1p, or raw values for linear series
+        self.residual = np.empty((rows, 0))   # Day-of-week residuals
+        self.yoy_residual = np.empty((rows, 0))
+        self.noise = np.full(rows, np.nan)    # Noise level of the residuals, NaN until fitted
+        self.yoy_noise = np.full(rows, np.nan)
+        self.sparse = np.zeros(rows, dtype=bool)  # Mostly-zero summed series
+        self.center = np.zeros(rows)          # Mean level CUSUM input of each series
+        self.trend_reference = np.full(rows, np.nan)
+
+        self.calendar_z = np.zeros((rows, 31))
+        self.calendar_residual = np.zeros((rows, 31))
+        self.calendar_days = np.zeros((rows, 31))
+
+        channels = [(c, d) for c in (LEVEL, TREND) for d in (+1, -1)]
+        self.cusum = {key: np.zeros(rows) for key in channels}
+        self.run_start = {key: np.zeros(rows, dtype=int) for key in channels}
+        self.last_shift = {}                  # (row, channel, direction) -> index into shifts
+
+        self.points = []                      # (row, day, z, residual)
+        self.shifts = []                      # [row, channel, direction, start day, end day]
+
+        self.append(values)
+
+    @property
+    def days(self):
+        return self.values.shape[1]
+
+    @property
+    def last_day(self):
+        return self.first_day + timedelta(days=self.days - 1)
+
+    def append(self, values):
+        """Add days to the end of every series and score only those days."""
+        t0 = self.days
+        self.values = np.hstack([self.values, values])
+        level = np.where(self.linear[:, None], values, np.log1p(np.maximum(values, 0)))
+        self.level = np.hstack([self.level, level])
+
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)     # All-NaN slices give NaN, as intended
+            same_weekday = np.stack([lagged(self.level, lag, t0) for lag in DOW_LAGS])
+            baseline = np.nanmedian(same_weekday, axis=0)
+            baseline[np.sum(~np.isnan(same_weekday), axis=0) < MIN_BASELINE_WEEKS] = np.nan
+            residual = self.level[:, t0:] - baseline
+            residual[self.warming_up(t0)] = np.nan
+
+            # YoY change, and its usual value over the trailing days
+            y0 = max(0, t0 - YOY_REFERENCE_DAYS)
+            yoy = self.yoy(y0)
+            trailing = np.stack([lagged(yoy, lag, 0) for lag in range(1, YOY_REFERENCE_DAYS + 1)])
+            usual = np.nanmedian(trailing, axis=0)
+            yoy_residual = (yoy - usual)[:, t0 - y0:]
+
+            self.residual = np.hstack([self.residual, residual])
+            self.yoy_residual = np.hstack([self.yoy_residual, yoy_residual])
+            self._fit_noise()
+            self._fit_trend_reference()
+            z = residual / self.noise[:, None]
+            yoy_z = yoy_residual / self.yoy_noise[:, None]
+            trend_z = (yoy[:, t0 - y0:] - self.trend_reference[:, None]) / self.yoy_noise[:, None]
+
+        self._points(t0, z, yoy_z, residual)
+        self._calendar(t0, z, residual)
+        self._cusum(t0, LEVEL, np.clip(z, -Z_CLIP, Z_CLIP) - self.center[:, None])
+        self._cusum(t0, TREND, np.clip(trend_z, -Z_CLIP, Z_CLIP))
+
+    def warming_up(self, t0, rows=slice(None), lookback=0):
+        """
+        Mask of days from column t0 on (shifted back by lookback) that fall in
+        a series' first weeks: a full day-of-week baseline isn't available
+        yet, and a newly launched campaign is still ramping up.
+        """
+        days = np.arange(t0, self.days) - lookback
+        return days[None, :] < self.first_seen[rows, None] + max(DOW_LAGS)
+
+    def yoy(self, t0, rows=slice(None)):
+        """YoY changes from column t0 on; NaN where the year-earlier day was still warming up."""
+        level = self.level[rows]
+        changes = level[:, t0:] - lagged(level, YOY_LOOKBACK_DAYS, t0)
+        changes[self.warming_up(t0, rows, YOY_LOOKBACK_DAYS)] = np.nan
+        return changes
+
+    def _fit_noise(self):
+        """
+        Fix noise levels once a series has MIN_NOISE_DAYS of residuals; until
+        then its days are not scored. Counts near zero are Poisson noise,
+        about sqrt(mean) / (mean + 1) in log1p space, which floors the
+        estimate; linear series are floored at 1% of their level.
+        Mostly-zero series (occasional refunds, escalations) use the standard
+        deviation, at least SPARSE_MIN_NOISE, and their level CUSUM input is
+        centred on the mean z-score, which the rare large days pull above 0.
+        """
+        for noise, residual in ((self.noise, self.residual), (self.yoy_noise, self.yoy_residual)):
+            rows = np.flatnonzero(np.isnan(noise) & (np.sum(~np.isnan(residual), axis=1) >= MIN_NOISE_DAYS))
+            if not len(rows):
+                continue
+            values, residual = self.values[rows], residual[rows]
+            mean = np.fmax(np.nanmean(values, axis=1), 0)
+            level = np.nanmedian(np.abs(self.level[rows]), axis=1)
+            floor = np.where(self.linear[rows], np.fmax(0.01 * level, 1e-9), np.sqrt(mean) / (mean + 1))
+            zero_share = np.nanmean(np.where(np.isnan(values), np.nan, values == 0), axis=1)
+            sparse = ~self.linear[rows] & (zero_share >= SPARSE_ZERO_SHARE)
+            spread = np.fmax(np.nanstd(residual, axis=1), SPARSE_MIN_NOISE)
+            scale = robust_scale(residual, floor)
+            noise[rows] = np.where(sparse, np.fmax(scale, spread), scale)
+            if noise is self.noise:
+                self.sparse[rows] = sparse
+                z = np.clip(residual / noise[rows, None], -Z_CLIP, Z_CLIP)
+                self.center[rows] = np.where(sparse, np.nanmean(z, axis=1), 0.0)
+
+    def _fit_trend_reference(self):
+        """Fix each series' trend reference once it has TREND_REFERENCE_DAYS of YoY changes."""
+        missing = np.flatnonzero(np.isnan(self.trend_reference))
+        if not len(missing) or self.days <= YOY_LOOKBACK_DAYS:
+            return
+        for row, changes in zip(missing, self.yoy(0, missing)):
+            changes = changes[~np.isnan(changes)]
+            if len(changes) >= TREND_REFERENCE_DAYS:
+                self.trend_reference[row] = np.median(changes[:TREND_REFERENCE_DAYS])
+
+    def _points(self, t0, z, yoy_z, residual):
+        with np.errstate(invalid="ignore"):
+            confirmed = np.isnan(yoy_z) | ((np.abs(yoy_z) >= YOY_CONFIRM_Z) & (np.sign(yoy_z) == np.sign(z)))
+            rows, days = np.nonzero((np.abs(z) >= POINT_Z) & confirmed)
+        self.points.extend(zip(rows.tolist(), (days + t0).tolist(), z[rows, days], residual[rows, days]))
+
+    def _calendar(self, t0, z, residual):
+        day_of_month = pd.date_range(self.first_day + timedelta(days=t0), periods=z.shape[1]).day.to_numpy() - 1
+        one_hot = np.zeros((z.shape[1], 31))
+        one_hot[np.arange(z.shape[1]), day_of_month] = 1
+        scored = ~np.isnan(z)
+        self.calendar_z += np.where(scored, z, 0) @ one_hot
+        self.calendar_residual += np.where(scored, residual, 0) @ one_hot
+        self.calendar_days += scored @ one_hot
+
+    def _cusum(self, t0, channel, z):
+        """Two-sided CUSUM over the new days of one channel, one day at a time, every series at once."""
+        for j in range(z.shape[1]):
+            day = t0 + j
+            scored = ~np.isnan(z[:, j])
+            for direction in (+1, -1):
+                total = self.cusum[(channel, direction)]
+                run_start = self.run_start[(channel, direction)]
+                step = np.fmax(0.0, total + direction * z[:, j] - CUSUM_K)
+                total[scored] = step[scored]
+                # A run starts the day after the sum was last zero
+                run_start[total == 0] = day + 1
+                for row in np.flatnonzero(total > CUSUM_H):
+                    self._alarm(row, channel, direction, run_start[row], day)
+                    total[row] = 0.0
+                    run_start[row] = day + 1
+
+    def _alarm(self, row, channel, direction, start, day):
+        previous = self.last_shift.get((row, channel, direction))
+        if previous is not None and start <= self.shifts[previous][4] + SHIFT_MERGE_DAYS:
+            self.shifts[previous][4] = day      # Still shifting: extend the open finding
+            return
+        self.last_shift[(row, channel, direction)] = len(self.shifts)
+        self.shifts.append([row, channel, direction, start, day])
+
+    def day(self, index):
+        return self.first_day + timedelta(days=int(index))
+
+    def change(self, row, difference):
+        """A level difference as text: percent for log-space series, absolute for linear ones."""
+        if self.linear[row]:
+            return f"{difference:+.4g}"
+        return f"{np.expm1(difference) * 100:+.0f}%"
+
+    def _score_shift(self, row, channel, start, end):
+        """
+        (difference, score) of a CUSUM finding. Level shifts compare the
+        SHIFT_WINDOW days before the start with the SHIFT_WINDOW days up to
+        the end (at least SHIFT_WINDOW days from the start). Where a year of
+        history covers both windows, the YoY changes must shift the same way,
+        so that the usual time of year doesn't count. Trends compare the YoY
+        change of those last days with the trend reference.
+        """
+        after = (max(start, end + 1 - SHIFT_WINDOW), max(end + 1, start + SHIFT_WINDOW))
+        yoy = self.yoy(0, slice(row, row + 1))[0]
+        if channel == TREND:
+            mean, days = window_mean(yoy, *after)
+            if days < MIN_WINDOW_DAYS:
+                return np.nan, 0.0
+            difference = mean - self.trend_reference[row]
+            error = self.yoy_noise[row] * np.sqrt(1 / days + 1 / TREND_REFERENCE_DAYS)
+            return difference, abs(difference) / error
+
+        shifts = []
+        for series, noise in ((self.level[row], self.noise[row]), (yoy, self.yoy_noise[row])):
+            before_mean, before_days = window_mean(series, start - SHIFT_WINDOW, start)
+            after_mean, after_days = window_mean(series, *after)
+            if before_days >= MIN_WINDOW_DAYS and after_days >= MIN_WINDOW_DAYS:
+                difference = after_mean - before_mean
+                shifts.append((difference, abs(difference) / (noise * np.sqrt(1 / before_days + 1 / after_days))))
+        if not shifts:
+            return np.nan, 0.0
+        if len(shifts) == 2 and (shifts[1][1] < SHIFT_MIN_SCORE or np.sign(shifts[1][0]) != np.sign(shifts[0][0])):
+            return shifts[0][0], 0.0        # Seasonal: last year moved the same way
+        return shifts[0]
+
+    def findings(self):
+        """Every current finding as a row of FINDING_COLUMNS."""
+        found = []
+
+        # Recurring day-of-month effects absorb the single days they explain
+        with np.errstate(invalid="ignore", divide="ignore"):
+            t_stat = self.calendar_z / np.sqrt(self.calendar_days)
+            mean_residual = self.calendar_residual / self.calendar_days
+        flagged = (np.abs(t_stat) >= CALENDAR_T) & (self.calendar_days >= CALENDAR_MIN_MONTHS)
+        recurring = set()
+        for row in np.flatnonzero(flagged.any(axis=1)):
+            for direction in (+1, -1):
+                days = np.flatnonzero(flagged[row] & (np.sign(t_stat[row]) == direction))
+                if not len(days):
+                    continue
+                recurring.update((row, d + 1) for d in days)
+                slice_name, metric = self.keys[row]
+                found.append([
+                    self.table, slice_name, metric,
+                    "recurring high days" if direction > 0 else "recurring low days",
+                    "day " + ", ".join(str(d + 1) for d in days) + " of month", "",
+                    self.change(row, float(np.mean(mean_residual[row, days]))),
+                    float(np.max(np.abs(t_stat[row, days]))),
+                ])
+
+        # Shifts and trends, strongest first; overlapping ones in the same
+        # direction describe the same change, so only the strongest is kept
+        scored = []
+        for row, channel, direction, start, end in self.shifts:
+            # Still accumulating since the last alarm: the change runs to the latest day
+            if self.cusum[(channel, direction)][row] > 0 and self.run_start[(channel, direction)][row] == end + 1:
+                end = self.days - 1
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore", RuntimeWarning)
+                difference, score = self._score_shift(row, channel, start, end)
+            if score >= SHIFT_MIN_SCORE and np.sign(difference) == direction:
+                scored.append((score, row, channel, direction, start, end, difference))
+        kept = []
+        for score, row, channel, direction, start, end, difference in sorted(scored, reverse=True):
+            if any(r == row and d == direction and s <= end and start <= e for r, d, s, e in kept):
+                continue
+            kept.append((row, direction, start, end))
+            slice_name, metric = self.keys[row]
+            kind = ("shift " if channel == LEVEL else "trend ") + ("up" if direction > 0 else "down")
+            found.append([self.table, slice_name, metric, kind, self.day(start).isoformat(),
+                          self.day(end).isoformat(), self.change(row, difference), float(score)])
+
+        # Single days, unless a recurring effect or a shift in the same direction explains them
+        for row, index, z, residual in self.points:
+            day = self.day(index)
+            direction = 1 if z > 0 else -1
+            if (row, day.day) in recurring or \
+                    any(r == row and d == direction and s <= index <= e for r, d, s, e in kept):
+                continue
+            slice_name, metric = self.keys[row]
+            found.append([self.table, slice_name, metric, "spike" if z > 0 else "drop",
+                          day.isoformat(), day.isoformat(), self.change(row, residual), abs(float(z))])
+        return found
+
+
+def load_series(cursor, table, date_column, dimension, metrics, start, end, slices=None):
+    """
+    (slices, values) for days start..end: values holds one row per
+    (slice, metric) in TableSeries key order and one column per day,
+    NaN where a slice has no rows that day.
+    """
+    days = (end - start).days + 1
+    overall = load_window(cursor, table, date_column, metrics, None, start, end)
+    frames = [(None, overall)]
+    if dimension:
+        split = load_window(cursor, table, date_column, metrics, dimension, start, end)
+        found = sorted(split[dimension].dropna().unique().tolist(), key=str)
+        if slices is None:
+            slices = [ALL_GROUPS] + found
+        frames.append((dimension, split))
+    else:
+        slices = [ALL_GROUPS]
+
+    values = np.full((len(metrics), len(slices), days), np.nan)
+    for column, frame in frames:
+        if column is None:
+            codes = np.zeros(len(frame), dtype=int)
+        else:
+            codes = pd.Categorical(frame[column], categories=slices).codes
+            frame = frame[codes >= 0]
+            codes = codes[codes >= 0]
+        offsets = frame["offset"].to_numpy()
+        for i, metric in enumerate(metrics):
+            values[i, codes, offsets] = frame[metric].to_numpy(dtype="float64")
+    return slices, values.reshape(len(metrics) * len(slices), days)
+
+
+class AnomalyScanner:
+    """Detector state for every table in ANOMALY_SOURCES, updated by scan()."""
+
+    def __init__(self, sources=ANOMALY_SOURCES):
+        self.sources = sources
+        self._tables = {}
+        self._lock = threading.Lock()
+        self.full_scans = 0
+        self.tail_scans = 0
+        self.days_scored = 0
+
+    def scan(self, cursor, catalog_tables, inode, full=False):
+        """
+        Bring the source tables in catalog_tables (table name -> catalog
+        entry) up to date with the database. Returns {table: (how, days
+        scored)}, how being "full", "tail" or "current", or ("skipped",
+        reason) for a table without its date column or without dated rows.
+        """
+        scanned = {}
+        with self._lock:
+            for table, (date_column, dimension) in self.sources.items():
+                entry = catalog_tables.get(table)
+                if entry is None:
+                    continue
+                column = next((c for c in entry["columns"] if c["name"] == date_column), None)
+                if column is None or not column.get("min") or not column.get("max"):
+                    self._tables.pop(table, None)
+                    scanned[table] = ("skipped", f"no {date_column} column" if column is None else "no dated rows")
+                    continue
+                first, last = date.fromisoformat(column["min"]), date.fromisoformat(column["max"])
+                state = self._tables.get(table)
+
+                if not full and state is not None and state.inode == inode and state.first_day == first:
+                    if last == state.last_day:
+                        scanned[table] = ("current", 0)
+                        continue
+                    start = state.last_day + timedelta(days=1)
+                    # New dimension values have no history here - rescan the table instead
+                    if last > state.last_day and (not dimension or self._known_slices(
+                            cursor, table, date_column, dimension, start, last, state.slices)):
+                        _, values = load_series(cursor, table, date_column, dimension, state.metrics,
+                                                start, last, state.slices)
+                        state.append(values)
+                        self.tail_scans += 1
+                        self.days_scored += values.shape[1]
+                        scanned[table] = ("tail", values.shape[1])
+                        continue
+
+                metrics = metric_columns(entry, dimension) + ([ROW_COUNT] if dimension else [])
+                slices, values = load_series(cursor, table, date_column, dimension, metrics, first, last)
+                self._tables[table] = TableSeries(table, date_column, dimension, metrics, slices, first, values,
+                                                  inode)
+                self.full_scans += 1
+                self.days_scored += values.shape[1]
+                scanned[table] = ("full", values.shape[1])
+        return scanned
+
+    @staticmethod
+    def _known_slices(cursor, table, date_column, dimension, start, end, slices):
+        cursor.execute(
+            f"SELECT DISTINCT {quote(dimension)} FROM {quote(table)} WHERE {quote(date_column)} BETWEEN ? AND ?",
+            (start.isoformat(), end.isoformat()),
+        )
+        return all(value in slices for (value,) in cursor.fetchall() if value is not None)
+
+    def findings(self, tables):
+        """Ranked findings (strongest first) over tables as a DataFrame of FINDING_COLUMNS."""
+        with self._lock:
+            rows = [row for name in tables if name in self._tables for row in self._tables[name].findings()]
+        found = pd.DataFrame(rows, columns=FINDING_COLUMNS)
+        # Overall series repeated across tables (daily_metrics and channel_metrics
+        # sessions) give the same finding twice; the first table's is kept
+        found = found.drop_duplicates(subset=FINDING_COLUMNS[1:])
+        return found.sort_values("score", ascending=False, kind="stable").reset_index(drop=True)
+
+    def coverage(self, tables):
+        """[(table, series, first day, last day)] for the scanned tables among tables."""
+        with self._lock:
+            return [(name, len(state.keys), state.first_day, state.last_day)
+                    for name, state in self._tables.items() if name in tables]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "tables": len(self._tables),
+                "series": sum(len(s.keys) for s in self._tables.values()),
+                "full_scans": self.full_scans,
+                "tail_scans": self.tail_scans,
+                "days_scored": self.days_scored,
+            }
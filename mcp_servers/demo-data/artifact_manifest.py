@@ -0,0 +1,55 @@
+"""
+Manifest of the files `query` saves under tmp/, for scripts/cleanup_tmp.py.
+
+Each time a result is saved or reused, one JSON line is appended:
+
+    {"paths": ["csv/query_<hash>.csv", "csv/query_<hash>.sql"], "bytes": 1234, "used": 1718000000.0}
+
+Paths are relative to the manifest's directory. A later line for the
+same paths marks the artifact as used again, so the file read top to
+bottom is in least-recently-used order. The cleanup script evicts from
+the front by age and a total-bytes cap and rewrites the manifest with
+what is left, without walking tmp/.
+
+Appends and the cleanup rewrite hold an exclusive flock where the
+platform has one.
+"""
+
+import json
+import threading
+import time
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+class ArtifactManifest:
+    """Appends artifact records to a JSON-lines manifest; safe across threads and processes."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+
+    def record(self, paths):
+        """Add or refresh one artifact (its files, recorded together). Missing files are skipped."""
+        relative = []
+        size = 0
+        for path in paths:
+            try:
+                size += Path(path).stat().st_size
+                relative.append(Path(path).relative_to(self.path.parent).as_posix())
+            except (OSError, ValueError):
+                continue
+        if not relative:
+            return
+
+        line = json.dumps({"paths": relative, "bytes": size, "used": round(time.time(), 3)}) + "\n"
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_EX)
+                f.write(line)
@@ -0,0 +1,360 @@
+"""
+Database engines behind the demo-data tools.
+
+`BACKEND` in server.py picks one:
+
+- sqlite: sample_data.db through the pooled read-only connections in
+  db_pool.py. Read-only access is enforced by SQLite's authorizer, and
+  `query` gets plan pre-checks and VM step budgets.
+- duckdb: an embedded columnar engine, much faster at scan-and-aggregate
+  over wide tables. It needs `pip install duckdb` and a database built from
+  sample_data.db by import_duckdb.py. The file is opened read-only with
+  file system access switched off and the configuration locked; statements
+  are interrupted at the time limit. `query` SQL is DuckDB's dialect.
+
+A backend hands out pooled connections with the same interface
+(`with backend.connection(...) as conn`, then `conn.cursor()` with
+execute / fetchone / fetchmany / description), gives the file signature
+used to key caches, opens read snapshots for query_batch, and answers the
+catalog questions whose SQL differs between engines.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from db_pool import ConnectionPool, PoolTimeout, QueryTimeout, db_signature
+from index_advisor import index_prefixes
+
+try:
+    import duckdb
+except ImportError:
+    duckdb = None
+
+BACKENDS = ("sqlite", "duckdb")
+
+# How often the DuckDB watchdog checks for cancellation and the deadline
+WATCH_INTERVAL = 0.05
+
+
+def duckdb_available():
+    return duckdb is not None
+
+
+def _quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+class SqliteBackend:
+    """sample_data.db through db_pool.ConnectionPool."""
+
+    name = "sqlite"
+    read_only_authorizer = True     # query installs a sql_parser.ReadOnlyAuthorizer
+    plan_check = True               # query_guard.check_plan works on this engine
+    step_budget = True              # max_steps is enforced
+
+    def __init__(self, db_path, pool_size=4):
+        self.db_path = Path(db_path)
+        self.pool = ConnectionPool(self.db_path, max_size=pool_size)
+
+    def connection(self, time_limit=None, cancelled=None, max_steps=None, timeout=None):
+        return self.pool.connection(time_limit=time_limit, cancelled=cancelled, max_steps=max_steps,
+                                    timeout=timeout)
+
+    def begin_snapshot(self, conn):
+        """
+        Open a read transaction on conn and take its read lock now, not at
+        the first statement. Until the pool rolls it back on release, conn
+        reads the database as it was at this point.
+        """
+        conn.execute("BEGIN")
+        conn.execute("SELECT 1 FROM sqlite_master LIMIT 1").fetchone()
+
+    def resume_snapshot(self, conn):
+        """After a failed statement: SQLite keeps the read transaction open unless the error was fatal."""
+        if not conn.in_transaction:
+            self.begin_snapshot(conn)
+
+    def is_interrupt(self, error):
+        """Whether error is a statement interrupted by the pool (time limit, step budget, cancel)."""
+        return isinstance(error, sqlite3.OperationalError) and "interrupt" in str(error)
+
+    def signature(self):
+        return db_signature(self.db_path)
+
+    def stats(self):
+        return self.pool.stats()
+
+    def table_names(self, cursor):
+        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' ORDER BY name")
+        return [name for (name,) in cursor.fetchall()]
+
+    def row_counts(self, cursor):
+        """Row counts recorded by ANALYZE, as {table: rows}. Empty if never analyzed."""
+        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='sqlite_stat1'")
+        if cursor.fetchone() is None:
+            return {}
+        counts = {}
+        cursor.execute("SELECT tbl, stat FROM sqlite_stat1")
+        for table, stat in cursor.fetchall():
+            # stat is "<rows> <avg rows per key prefix> ..."; every index repeats the row count
+            counts[table] = int(stat.split()[0])
+        return counts
+
+    def columns(self, cursor, table):
+        """[(name, declared type)] in table order."""
+        cursor.execute(f"PRAGMA table_info({_quote(table)})")
+        return [(row[1], row[2]) for row in cursor.fetchall()]
+
+    def seek_columns(self, cursor, table):
+        """Columns whose lone MIN()/MAX() is a b-tree seek: index leaders and an INTEGER PRIMARY KEY."""
+        columns = {prefix[0] for prefix in index_prefixes(cursor.connection, _quote(table))}
+        cursor.execute(f"PRAGMA table_info({_quote(table)})")
+        pk = [row for row in cursor.fetchall() if row[5]]
+        if len(pk) == 1 and pk[0][2].upper() == "INTEGER":
+            columns.add(pk[0][1])
+        return columns
+
+
+class _DuckDBCursor:
+    """
+    sqlite3-style cursor over a pooled DuckDB connection. Statements run on
+    the pooled connection itself, which is the one the watchdog interrupts;
+    close() leaves it open for the pool.
+    """
+
+    def __init__(self, conn):
+        self._conn = conn
+        self.connection = conn
+
+    @property
+    def description(self):
+        return self._conn.description
+
+    def execute(self, sql, parameters=None):
+        if parameters is None:
+            self._conn.execute(sql)
+        else:
+            self._conn.execute(sql, parameters)
+        return self
+
+    def fetchone(self):
+        return self._conn.fetchone()
+
+    def fetchmany(self, size):
+        return self._conn.fetchmany(size)
+
+    def fetchall(self):
+        return self._conn.fetchall()
+
+    def close(self):
+        pass
+
+
+class _DuckDBConnection:
+    """What DuckDBBackend.connection() yields: cursor() and execute() like sqlite3."""
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def cursor(self):
+        return _DuckDBCursor(self._conn)
+
+    def execute(self, sql, parameters=None):
+        return self.cursor().execute(sql, parameters)
+
+
+class DuckDBBackend:
+    """
+    A DuckDB file opened read-only. One database handle is shared; each
+    pooled connection is a cursor on it, so pooled statements run in
+    parallel inside one process.
+    """
+
+    name = "duckdb"
+    read_only_authorizer = False
+    plan_check = False
+    step_budget = False             # No VM step counter; time limits still apply
+
+    def __init__(self, db_path, pool_size=4, timeout=30.0):
+        if duckdb is None:
+            raise RuntimeError("The duckdb backend needs the duckdb package (pip install duckdb).")
+        self.db_path = Path(db_path)
+        if not self.db_path.exists():
+            raise RuntimeError(f"{self.db_path} not found - build it with import_duckdb.py.")
+        self.max_size = pool_size
+        self.timeout = timeout
+
+        self._database = None
+        self._idle = []
+        self._slots = threading.BoundedSemaphore(pool_size)
+        self._lock = threading.Lock()
+        self._signature = None
+
+        self.hits = 0
+        self.misses = 0
+        self.waits = 0
+        self.recycled = 0
+        self.interrupted = 0
+
+    def signature(self):
+        """(inode, size, mtime_ns) of the file plus (size, mtime_ns) of its .wal file."""
+        st = os.stat(self.db_path)
+        try:
+            wal = os.stat(f"{self.db_path}.wal")
+            wal_sig = (wal.st_size, wal.st_mtime_ns)
+        except FileNotFoundError:
+            wal_sig = None
+        return (st.st_ino, st.st_size, st.st_mtime_ns, wal_sig)
+
+    def _acquire(self, timeout=None):
+        timeout = self.timeout if timeout is None else timeout
+        if not self._slots.acquire(blocking=False):
+            if timeout <= 0:
+                raise PoolTimeout(f"No database connection free ({self.max_size} in use)")
+            with self._lock:
+                self.waits += 1
+            if not self._slots.acquire(timeout=timeout):
+                raise PoolTimeout(
+                    f"No database connection available after {timeout:.0f}s "
+                    f"({self.max_size} in use)"
+                )
+        try:
+            signature = self.signature()
+            with self._lock:
+                if signature != self._signature:
+                    # File replaced (e.g. re-imported) - reopen on the next checkout
+                    if self._signature is not None:
+                        self.recycled += len(self._idle)
+                    for conn in self._idle:
+                        conn.close()
+                    self._idle.clear()
+                    if self._database is not None:
+                        self._database.close()
+                    self._database = duckdb.connect(
+                        str(self.db_path), read_only=True,
+                        config={"enable_external_access": False, "lock_configuration": True},
+                    )
+                    self._signature = signature
+                if self._idle:
+                    self.hits += 1
+                    return self._idle.pop(), signature
+                self.misses += 1
+                return self._database.cursor(), signature
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def _release(self, conn, signature, discard=False):
+        try:
+            try:
+                conn.rollback()         # Ends a begin_snapshot transaction
+            except duckdb.Error:
+                pass                    # None was open
+            with self._lock:
+                if discard or signature != self._signature:
+                    conn.close()
+                else:
+                    self._idle.append(conn)
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def connection(self, time_limit=None, cancelled=None, max_steps=None, timeout=None):
+        """
+        Borrow a connection for the duration of a `with` block. A watchdog
+        thread interrupts it at time_limit or when `cancelled` is set;
+        max_steps is ignored. timeout works as in ConnectionPool.connection.
+        """
+        conn, signature = self._acquire(timeout)
+        deadline = time.monotonic() + time_limit if time_limit is not None else None
+        done = threading.Event()
+
+        if deadline is not None or cancelled is not None:
+            def watch():
+                while not done.wait(WATCH_INTERVAL):
+                    if (cancelled is not None and cancelled.is_set()) or \
+                            (deadline is not None and time.monotonic() > deadline):
+                        conn.interrupt()
+                        return
+            threading.Thread(target=watch, daemon=True, name="duckdb-watchdog").start()
+
+        discard = False
+        try:
+            yield _DuckDBConnection(conn)
+        except duckdb.InterruptException as e:
+            with self._lock:
+                self.interrupted += 1
+            if deadline is not None and time.monotonic() > deadline:
+                raise QueryTimeout(f"Query exceeded the {time_limit:g}s time limit and was cancelled") from e
+            raise
+        except duckdb.FatalException:
+            discard = True
+            raise
+        finally:
+            done.set()
+            self._release(conn, signature, discard=discard)
+
+    def begin_snapshot(self, conn):
+        """Open a transaction on conn; its statements all read one version of the database."""
+        conn.execute("BEGIN TRANSACTION")
+
+    def resume_snapshot(self, conn):
+        """
+        After a failed statement, which aborts a DuckDB transaction: start a
+        new one. The file is open read-only, so it reads the same data.
+        """
+        conn.execute("ROLLBACK")
+        self.begin_snapshot(conn)
+
+    def is_interrupt(self, error):
+        return isinstance(error, duckdb.InterruptException)
+
+    def stats(self):
+        with self._lock:
+            checkouts = self.hits + self.misses
+            return {
+                "max_size": self.max_size,
+                "idle": len(self._idle),
+                "checkouts": checkouts,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / checkouts if checkouts else 0.0,
+                "waits": self.waits,
+                "recycled": self.recycled,
+            }
+
+    def table_names(self, cursor):
+        cursor.execute(
+            "SELECT table_name FROM information_schema.tables "
+            "WHERE table_schema = 'main' AND table_type = 'BASE TABLE' ORDER BY table_name"
+        )
+        return [name for (name,) in cursor.fetchall()]
+
+    def row_counts(self, cursor):
+        """Always empty: COUNT(*) is answered from DuckDB's metadata, so the catalog counts exactly."""
+        return {}
+
+    def columns(self, cursor, table):
+        cursor.execute(
+            "SELECT column_name, data_type FROM information_schema.columns "
+            "WHERE table_schema = 'main' AND table_name = ? ORDER BY ordinal_position",
+            (table,),
+        )
+        return cursor.fetchall()
+
+    def seek_columns(self, cursor, table):
+        """None: MIN/MAX over several columns is one columnar pass, pruned by zone maps."""
+        return set()
+
+
+def open_backend(name, db_path, pool_size=4):
+    """Create the backend named in server.py's BACKEND."""
+    if name == "sqlite":
+        return SqliteBackend(db_path, pool_size=pool_size)
+    if name == "duckdb":
+        return DuckDBBackend(db_path, pool_size=pool_size)
+    raise ValueError(f"Unknown backend '{name}' (expected one of: {', '.join(BACKENDS)})")
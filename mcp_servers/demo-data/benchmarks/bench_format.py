@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks for result formatting (result_format.py).
+
+Compares the per-row cost of the previous `query` path - a str()/join
+generator for the display text, a Python size estimate for the budget and
+a separate csv.writer pass for the saved file - with one CsvEncoder pass
+whose text serves all three, and times the markdown table formatter.
+
+Usage:
+    python benchmarks/bench_format.py
+    python benchmarks/bench_format.py --rows 50000 --repeat 7
+"""
+
+import argparse
+import csv
+import io
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from result_format import CsvEncoder, format_csv, format_markdown  # noqa: E402
+
+BATCH_SIZE = 1000           # Matches FETCH_BATCH_SIZE in server.py
+
+
+def make_rows(n, width):
+    """Metric-shaped rows: a date, a text dimension, then ints and floats."""
+    rng = random.Random(42)
+    channels = ["organic", "paid_search", "email", "social, paid", "referral"]
+    rows = []
+    for i in range(n):
+        row = [f"2024-{1 + i % 12:02d}-{1 + i % 28:02d}", rng.choice(channels)]
+        for j in range(width - 2):
+            row.append(rng.randint(0, 100_000) if j % 2 else round(rng.uniform(0, 10_000), 2))
+        rows.append(tuple(row))
+    return rows
+
+
+def batches(rows):
+    for start in range(0, len(rows), BATCH_SIZE):
+        yield rows[start:start + BATCH_SIZE]
+
+
+def two_pass(columns, rows):
+    """The previous path: join-based display text, size estimate, csv.writer to file."""
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(columns)
+    result_bytes = 0
+    for batch in batches(rows):
+        result_bytes += sum(len(str(val)) + 1 for row in batch for val in row)
+        writer.writerows(batch)
+    lines = [",".join(columns)]
+    for row in rows:
+        lines.append(",".join(str(val) if val is not None else "" for val in row))
+    return "\n".join(lines), result_bytes
+
+
+def single_pass(columns, rows):
+    """One CsvEncoder pass per batch; its text is measured and written."""
+    out = io.StringIO()
+    encoder = CsvEncoder()
+    out.write(encoder.encode([columns]))
+    result_bytes = 0
+    for batch in batches(rows):
+        text = encoder.encode(batch)
+        result_bytes += len(text)
+        out.write(text)
+    return format_csv(columns, rows), result_bytes
+
+
+def per_row_us(fn, columns, rows, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(columns, rows)
+        best = min(best, time.perf_counter() - started)
+    return best / len(rows) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time result formatting per row")
+    parser.add_argument("--rows", type=int, default=20_000, help="Rows per run (default 20,000)")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per case; the fastest is reported")
+    args = parser.parse_args()
+
+    print(f"{args.rows:,} rows, best of {args.repeat}, microseconds per row\n")
+    print(f"{'columns':>7}  {'two-pass':>9}  {'single-pass':>11}  {'speedup':>7}  {'markdown':>8}")
+    for width in (4, 8, 32):
+        columns = [f"col_{i}" for i in range(width)]
+        rows = make_rows(args.rows, width)
+        old = per_row_us(two_pass, columns, rows, args.repeat)
+        new = per_row_us(single_pass, columns, rows, args.repeat)
+        markdown = per_row_us(format_markdown, columns, rows, args.repeat)
+        print(f"{width:>7}  {old:>9.2f}  {new:>11.2f}  {old / new:>6.1f}x  {markdown:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""
+Load tests for the demo-data MCP server.
+
+Builds databases at several scales with setup_sample_data.py, then runs
+N concurrent simulated agents through the analyze workload in
+workload.py, two ways:
+
+- inproc: calling the tools through FastMCP's call_tool in one process
+- stdio:  through a real MCP client session to `server.py` over stdio
+
+Each run happens in a fresh process, with its own empty tmp/ and
+database, and reports per-tool and overall p50/p95/p99 latency, calls per
+second, peak RSS of the process serving the tools, and the bytes of the
+result files it saved.
+
+Usage:
+    python benchmarks/load_test.py                          # small + medium, both modes
+    python benchmarks/load_test.py --scales large --agents 16
+    python benchmarks/load_test.py --save-baseline main     # write baselines/main.json
+    python benchmarks/load_test.py --baseline main          # compare; exit 1 on regression
+
+Databases are built once into benchmarks/data/. Baselines are per
+machine; save one before a change and compare after it.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:
+    resource = None         # Windows - peak RSS is not reported
+
+BENCH_DIR = Path(__file__).resolve().parent
+SERVER_DIR = BENCH_DIR.parent
+DATA_DIR = BENCH_DIR / "data"
+BASELINE_DIR = BENCH_DIR / "baselines"
+
+sys.path.insert(0, str(SERVER_DIR))
+sys.path.insert(0, str(BENCH_DIR))
+
+from instrumentation import percentile  # noqa: E402
+from workload import session_calls  # noqa: E402
+
+# setup_sample_data.py options per scale; None means a copy of the shipped sample_data.db
+SCALES = {
+    "small": None,
+    "medium": ["--years", "5", "--ticket-multiplier", "5"],
+    "large": ["--years", "10", "--ticket-multiplier", "25"],
+}
+PERCENTILES = (50, 95, 99)
+REGRESSION_THRESHOLD = 0.20     # Default allowed p95 growth / throughput drop vs the baseline
+
+
+def build_database(scale, backend):
+    """Path of the database for a scale, generating (and importing) it on first use."""
+    db_path = DATA_DIR / f"{scale}.db"
+    if not db_path.exists():
+        DATA_DIR.mkdir(parents=True, exist_ok=True)
+        if SCALES[scale] is None:
+            shutil.copyfile(SERVER_DIR / "sample_data.db", db_path)
+        else:
+            print(f"Building {scale} database...", flush=True)
+            subprocess.run(
+                [sys.executable, str(SERVER_DIR / "setup_sample_data.py"), "--engine", "numpy",
+                 "--output", str(db_path), *SCALES[scale]],
+                check=True, stdout=subprocess.DEVNULL,
+            )
+
+    # The server looks for the DuckDB copy next to DEMO_DATA_DB
+    duckdb_path = db_path.with_suffix(".duckdb")
+    if backend == "duckdb" and not duckdb_path.exists():
+        print(f"Importing {scale} database into DuckDB...", flush=True)
+        subprocess.run(
+            [sys.executable, str(SERVER_DIR / "import_duckdb.py"), "--source", str(db_path),
+             "--output", str(duckdb_path)],
+            check=True, stdout=subprocess.DEVNULL,
+        )
+    return db_path
+
+
+def workload_years(db_path):
+    conn = sqlite3.connect(f"{db_path.resolve().as_uri()}?mode=ro", uri=True)
+    first, last = conn.execute("SELECT MIN(date), MAX(date) FROM daily_metrics").fetchone()
+    conn.close()
+    return list(range(int(first[:4]), int(last[:4]) + 1))
+
+
+def peak_rss_mb(who):
+    if resource is None:
+        return None
+    peak = resource.getrusage(who).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+async def run_agents(call, agents, sessions, seed, years):
+    """Run the agents concurrently. Returns ({tool: [latency ms]}, errors, elapsed seconds)."""
+    latencies = {}
+    errors = []
+
+    async def agent(index):
+        rng = random.Random(seed * 1000 + index)
+        for _ in range(sessions):
+            for tool, arguments in session_calls(rng, years):
+                started = time.perf_counter()
+                text = await call(tool, arguments)
+                latencies.setdefault(tool, []).append((time.perf_counter() - started) * 1000)
+                if text.startswith(("Error", "Query aborted")):
+                    errors.append(f"{tool}: {text[:200]}")
+
+    started = time.perf_counter()
+    await asyncio.gather(*(agent(i) for i in range(agents)))
+    return latencies, errors, time.perf_counter() - started
+
+
+async def run_inproc(agents, sessions, seed, years):
+    import server
+
+    # Match the stdio server, which builds the catalog before serving
+    with server.backend.connection() as conn:
+        server.catalog.tables(conn)
+
+    async def call(tool, arguments):
+        content = await server.mcp.call_tool(tool, arguments)
+        return content[0][0].text
+
+    result = await run_agents(call, agents, sessions, seed, years)
+    return result, peak_rss_mb(resource.RUSAGE_SELF if resource else None)
+
+
+async def run_stdio(agents, sessions, seed, years):
+    from mcp import ClientSession, StdioServerParameters
+    from mcp.client.stdio import stdio_client
+
+    params = StdioServerParameters(
+        command=sys.executable, args=[str(SERVER_DIR / "server.py")], env=dict(os.environ),
+        cwd=str(SERVER_DIR),
+    )
+    async with stdio_client(params) as (read, write):
+        async with ClientSession(read, write) as session:
+            await session.initialize()
+
+            async def call(tool, arguments):
+                result = await session.call_tool(tool, arguments)
+                return result.content[0].text
+
+            result = await run_agents(call, agents, sessions, seed, years)
+    # The server has exited, so it shows up in the children's usage
+    return result, peak_rss_mb(resource.RUSAGE_CHILDREN if resource else None)
+
+
+def summarize(latencies):
+    values = sorted(v for tool_values in latencies.values() for v in tool_values)
+    summary = {"all": {f"p{p}": round(percentile(values, p), 2) for p in PERCENTILES}}
+    for tool, tool_values in sorted(latencies.items()):
+        tool_values = sorted(tool_values)
+        summary[tool] = {f"p{p}": round(percentile(tool_values, p), 2) for p in PERCENTILES}
+    return summary
+
+
+def run_one(args):
+    """Child process body: one (scale, mode) run, printed as JSON on the last line of stdout."""
+    years = workload_years(Path(os.environ["DEMO_DATA_DB"]))
+    runner = run_inproc if args.run == "inproc" else run_stdio
+    (latencies, errors, elapsed), rss = asyncio.run(runner(args.agents, args.sessions, args.seed, years))
+
+    csv_dir = Path(os.environ["DEMO_DATA_TMP"]) / "csv"
+    artifacts = [p for p in csv_dir.iterdir() if p.is_file()] if csv_dir.exists() else []
+    calls = sum(len(v) for v in latencies.values())
+    print(json.dumps({
+        "calls": calls,
+        "errors": len(errors),
+        "error_samples": errors[:3],
+        "seconds": round(elapsed, 3),
+        "calls_per_second": round(calls / elapsed, 1),
+        "latency_ms": summarize(latencies),
+        "peak_rss_mb": rss,
+        "artifacts": len(artifacts),
+        "artifact_bytes": sum(p.stat().st_size for p in artifacts),
+    }))
+
+
+def launch(scale, mode, args):
+    """Run one (scale, mode) combination in a fresh process with an empty tmp/."""
+    db_path = build_database(scale, args.backend)
+    tmp_root = Path(tempfile.mkdtemp(prefix="demo-data-bench-"))
+    env = dict(os.environ, DEMO_DATA_DB=str(db_path), DEMO_DATA_BACKEND=args.backend,
+               DEMO_DATA_TMP=str(tmp_root))
+    try:
+        completed = subprocess.run(
+            [sys.executable, str(Path(__file__).resolve()), "--run", mode, "--agents", str(args.agents),
+             "--sessions", str(args.sessions), "--seed", str(args.seed)],
+            env=env, capture_output=True, text=True, cwd=str(SERVER_DIR),
+        )
+    finally:
+        shutil.rmtree(tmp_root, ignore_errors=True)
+    if completed.returncode != 0:
+        raise RuntimeError(f"{scale}/{mode} run failed:\n{completed.stderr[-2000:]}")
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    return {"scale": scale, "mode": mode, "backend": args.backend, "agents": args.agents,
+            "sessions": args.sessions, **result}
+
+
+def print_results(results):
+    print(f"\n{'scale':<7} {'mode':<7} {'backend':<7} {'agents':>6} {'calls':>6} {'err':>4} "
+          f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'calls/s':>8} {'RSS MB':>7} {'artifact MB':>11}")
+    for r in results:
+        lat = r["latency_ms"]["all"]
+        rss = f"{r['peak_rss_mb']:.0f}" if r["peak_rss_mb"] is not None else "-"
+        print(f"{r['scale']:<7} {r['mode']:<7} {r['backend']:<7} {r['agents']:>6} {r['calls']:>6} {r['errors']:>4} "
+              f"{lat['p50']:>8.1f} {lat['p95']:>8.1f} {lat['p99']:>8.1f} {r['calls_per_second']:>8.1f} "
+              f"{rss:>7} {r['artifact_bytes'] / 1e6:>11.1f}")
+    for r in results:
+        print(f"\n{r['scale']} / {r['mode']} per tool (p50 / p95 / p99 ms):")
+        for tool, lat in r["latency_ms"].items():
+            if tool != "all":
+                print(f"  {tool:<15} {lat['p50']:>8.1f} {lat['p95']:>8.1f} {lat['p99']:>8.1f}")
+        for sample in r["error_samples"]:
+            print(f"  error: {sample}")
+
+
+def compare(results, baseline, threshold):
+    """Print changes against a baseline. Returns True if anything regressed past threshold."""
+    def key(r):
+        return (r["scale"], r["mode"], r["backend"], r["agents"], r["sessions"])
+
+    previous = {key(r): r for r in baseline["results"]}
+    regressed = False
+    print(f"\nAgainst baseline from {baseline['created']} (regression = >{threshold:.0%} worse):")
+    for r in results:
+        old = previous.get(key(r))
+        if old is None:
+            print(f"- {r['scale']}/{r['mode']}: not in baseline")
+            continue
+        p95_change = r["latency_ms"]["all"]["p95"] / max(old["latency_ms"]["all"]["p95"], 1e-9) - 1
+        rate_change = r["calls_per_second"] / max(old["calls_per_second"], 1e-9) - 1
+        flags = []
+        if p95_change > threshold:
+            flags.append("p95 REGRESSION")
+        if rate_change < -threshold:
+            flags.append("throughput REGRESSION")
+        regressed = regressed or bool(flags)
+        print(f"- {r['scale']}/{r['mode']}: p95 {p95_change:+.1%}, calls/s {rate_change:+.1%}, "
+              f"artifact bytes {r['artifact_bytes'] - old['artifact_bytes']:+,}"
+              + (f"  <- {', '.join(flags)}" if flags else ""))
+    return regressed
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Load-test the demo-data MCP server.")
+    parser.add_argument("--scales", default="small,medium", help=f"Comma-separated: {', '.join(SCALES)}")
+    parser.add_argument("--modes", default="inproc,stdio", help="Comma-separated: inproc, stdio")
+    parser.add_argument("--backend", choices=["sqlite", "duckdb"], default="sqlite")
+    parser.add_argument("--agents", type=int, default=8, help="Concurrent simulated agents (default 8)")
+    parser.add_argument("--sessions", type=int, default=3, help="Analyze sessions per agent (default 3)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--save-baseline", metavar="NAME", help="Save results to baselines/NAME.json")
+    parser.add_argument("--baseline", metavar="NAME", help="Compare with baselines/NAME.json")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD,
+                        help="Allowed relative p95 growth / throughput drop (default 0.2)")
+    parser.add_argument("--run", choices=["inproc", "stdio"], help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if args.run:
+        run_one(args)
+        return
+
+    scales = [s.strip() for s in args.scales.split(",") if s.strip()]
+    modes = [m.strip() for m in args.modes.split(",") if m.strip()]
+    for scale in scales:
+        if scale not in SCALES:
+            raise SystemExit(f"Unknown scale '{scale}' (expected: {', '.join(SCALES)})")
+
+    results = []
+    for scale in scales:
+        for mode in modes:
+            print(f"Running {scale} / {mode} ({args.agents} agents x {args.sessions} sessions)...", flush=True)
+            results.append(launch(scale, mode, args))
+    print_results(results)
+
+    regressed = False
+    if args.baseline:
+        baseline = json.loads((BASELINE_DIR / f"{args.baseline}.json").read_text())
+        regressed = compare(results, baseline, args.threshold)
+
+    if args.save_baseline:
+        BASELINE_DIR.mkdir(parents=True, exist_ok=True)
+        path = BASELINE_DIR / f"{args.save_baseline}.json"
+        path.write_text(json.dumps({
+            "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "results": results,
+        }, indent=2) + "\n")
+        print(f"\nBaseline saved to {path}")
+
+    if regressed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+The simulated analyze-skill session used by load_test.py.
+
+Each session looks around the schema the way an agent does (list_tables,
+describe_table, get_date_range), then runs the analyses the skill leans
+on: YoY on daily_metrics (364 days back, so weekdays line up), channel
+mix, support-ticket category trends, funnel conversion math, and one raw
+pull large enough to be saved and paged. Each analysis picks a year at
+random, so concurrent agents repeat some queries (cache hits, shared
+artifacts) and not others, as parallel sub-agents do.
+
+The SQL runs unchanged on SQLite and DuckDB.
+"""
+
+DESCRIBED_TABLES = ["daily_metrics", "channel_metrics", "support_tickets", "weekly_funnel"]
+
+
+def year_filter(column, year):
+    return f"{column} >= '{year}-01-01' AND {column} < '{year + 1}-01-01'"
+
+
+def yoy_sql(year):
+    # daily_metrics has one row per day, so 364 rows back is 364 days back
+    return f"""
+WITH daily AS (
+    SELECT date, revenue, conversions, signups,
+           LAG(revenue, 364) OVER (ORDER BY date) AS revenue_prior,
+           LAG(conversions, 364) OVER (ORDER BY date) AS conversions_prior,
+           LAG(signups, 364) OVER (ORDER BY date) AS signups_prior
+    FROM daily_metrics
+)
+SELECT substr(date, 1, 7) AS month,
+       ROUND(SUM(revenue), 2) AS revenue,
+       ROUND(SUM(revenue_prior), 2) AS revenue_prior,
+       ROUND(100.0 * (SUM(revenue) - SUM(revenue_prior)) / NULLIF(SUM(revenue_prior), 0), 1) AS revenue_yoy_pct,
+       SUM(conversions) AS conversions,
+       SUM(conversions_prior) AS conversions_prior,
+       SUM(signups) AS signups,
+       SUM(signups_prior) AS signups_prior
+FROM daily
+WHERE {year_filter("date", year)}
+GROUP BY 1
+ORDER BY 1"""
+
+
+def channel_mix_sql(year):
+    return f"""
+SELECT substr(date, 1, 7) AS month,
+       channel_name,
+       SUM(sessions) AS sessions,
+       ROUND(100.0 * SUM(sessions) / SUM(SUM(sessions)) OVER (PARTITION BY substr(date, 1, 7)), 1) AS session_share_pct,
+       ROUND(1.0 * SUM(conversions) / NULLIF(SUM(sessions), 0), 4) AS conversion_rate,
+       ROUND(SUM(revenue), 2) AS revenue
+FROM channel_metrics
+WHERE {year_filter("date", year)}
+GROUP BY 1, 2
+ORDER BY 1, 2"""
+
+
+def ticket_trend_sql(year):
+    return f"""
+SELECT substr(created_date, 1, 7) AS month,
+       category,
+       COUNT(*) AS tickets,
+       ROUND(AVG(resolution_hours), 1) AS avg_resolution_hours,
+       ROUND(AVG(sentiment_score), 2) AS avg_sentiment,
+       SUM(escalated) AS escalated
+FROM support_tickets
+WHERE {year_filter("created_date", year)}
+GROUP BY 1, 2
+ORDER BY 1, 2"""
+
+
+def funnel_sql(year):
+    return f"""
+SELECT week_start,
+       visitors,
+       ROUND(1.0 * product_views / NULLIF(visitors, 0), 4) AS view_rate,
+       ROUND(1.0 * add_to_cart / NULLIF(product_views, 0), 4) AS cart_rate,
+       ROUND(1.0 * checkout_started / NULLIF(add_to_cart, 0), 4) AS checkout_rate,
+       ROUND(1.0 * checkout_completed / NULLIF(checkout_started, 0), 4) AS completion_rate,
+       ROUND(1.0 * checkout_completed / NULLIF(visitors, 0), 4) AS overall_rate
+FROM weekly_funnel
+WHERE {year_filter("week_start", year)}
+ORDER BY week_start"""
+
+
+def raw_tickets_sql(year, month):
+    return f"""
+SELECT * FROM support_tickets
+WHERE created_date >= '{year}-{month:02d}-01' AND created_date < '{year}-{month:02d}-32'
+ORDER BY ticket_id"""
+
+
+def session_calls(rng, years):
+    """(tool, arguments) pairs for one simulated analyze session."""
+    calls = [
+        ("list_tables", {}),
+        ("describe_table", {"table_name": rng.choice(DESCRIBED_TABLES)}),
+        ("get_date_range", {"table_name": "daily_metrics"}),
+    ]
+    # YoY needs a full prior year of history
+    yoy_years = years[1:] or years
+    calls.append(("query", {"sql": yoy_sql(rng.choice(yoy_years))}))
+    calls.append(("query", {"sql": channel_mix_sql(rng.choice(years))}))
+    calls.append(("query", {"sql": ticket_trend_sql(rng.choice(years))}))
+    calls.append(("query", {"sql": funnel_sql(rng.choice(years))}))
+    calls.append(("query", {"sql": raw_tickets_sql(rng.choice(years), rng.randint(1, 12))}))
+    return calls
@@ -0,0 +1,119 @@
+"""
+Date coverage for the time-series tables.
+
+A date column is any column whose catalog min and max are YYYY-MM-DD
+strings. For each one this works out the cadence the data follows (daily,
+weekdays only, weekly, monthly or quarterly), which dates that cadence
+expects but the table is missing, and the collapsed gap ranges. Freshness
+is left to the caller since it depends on when it is asked.
+"""
+
+import re
+from datetime import date
+
+_DATE_RE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+WEEKEND = {5, 6}
+
+
+def is_date(value):
+    return isinstance(value, str) and bool(_DATE_RE.match(value))
+
+
+def date_columns(table):
+    """Names of a catalog table's columns that hold YYYY-MM-DD dates."""
+    return [c["name"] for c in table["columns"] if is_date(c.get("min")) and is_date(c.get("max"))]
+
+
+def month_starts(first, last, months=1):
+    """Ordinals of every `months`-th first-of-month from first through last."""
+    day = date.fromordinal(first)
+    index = day.year * 12 + day.month - 1
+    starts = []
+    while True:
+        start = date(index // 12, index % 12 + 1, 1).toordinal()
+        if start > last:
+            return starts
+        starts.append(start)
+        index += months
+
+
+def infer_cadence(days):
+    """Cadence name for sorted, distinct date ordinals."""
+    if len(days) > 1:
+        dates = [date.fromordinal(d) for d in days]
+        if all(d.day == 1 for d in dates):
+            if all((d.month - dates[0].month) % 3 == 0 for d in dates):
+                return "quarterly"
+            return "monthly"
+        if all((d - days[0]) % 7 == 0 for d in days):
+            return "weekly"
+    weekdays = {date.fromordinal(d).weekday() for d in days}
+    if days[-1] - days[0] >= 7 and weekdays.isdisjoint(WEEKEND):
+        return "weekdays"
+    return "daily"
+
+
+def expected_days(first, last, cadence):
+    """Date ordinals a cadence expects between first and last, inclusive."""
+    if cadence == "weekly":
+        return range(first, last + 1, 7)
+    if cadence in ("monthly", "quarterly"):
+        return month_starts(first, last, 3 if cadence == "quarterly" else 1)
+    days = range(first, last + 1)
+    if cadence == "weekdays":
+        return [d for d in days if date.fromordinal(d).weekday() not in WEEKEND]
+    return days
+
+
+def gap_ranges(expected, present):
+    """Runs of consecutive expected-but-missing days as [(first, last)] ordinals."""
+    gaps = []
+    run = None
+    for day in expected:
+        if day in present:
+            if run:
+                gaps.append(tuple(run))
+                run = None
+        elif run:
+            run[1] = day
+        else:
+            run = [day, day]
+    if run:
+        gaps.append(tuple(run))
+    return gaps
+
+
+def table_coverage(cursor, table, column):
+    """
+    Coverage of one date column as a dict: first/last date, distinct dates,
+    cadence, missing count and gap ranges (as YYYY-MM-DD pairs).
+
+    Reads the distinct dates in order; when the column leads an index
+    that is a scan of the index, not the table.
+    """
+    cursor.execute(
+        f'SELECT DISTINCT "{column}" FROM "{table}" WHERE "{column}" IS NOT NULL ORDER BY 1'
+    )
+    days = [date.fromisoformat(v).toordinal() for (v,) in cursor.fetchall() if is_date(v)]
+    if not days:
+        return None
+
+    cadence = infer_cadence(days)
+    present = set(days)
+    gaps = gap_ranges(expected_days(days[0], days[-1], cadence), present)
+    missing = sum(
+        len(expected_days(first, last, cadence)) for first, last in gaps
+    )
+    return {
+        "table": table,
+        "column": column,
+        "first": date.fromordinal(days[0]).isoformat(),
+        "last": date.fromordinal(days[-1]).isoformat(),
+        "dates": len(days),
+        "cadence": cadence,
+        "missing": missing,
+        "gaps": [
+            (date.fromordinal(first).isoformat(), date.fromordinal(last).isoformat())
+            for first, last in gaps
+        ],
+    }
@@ -0,0 +1,201 @@
+"""
+Read-only SQLite connection pool for the demo-data MCP server.
+
+Connections are opened once with a `file:...?mode=ro` URI and tuned PRAGMAs,
+then reused across tool calls. Borrow one with `pool.connection()`; it is
+always returned to the pool, even when the query raises.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+# Applied to every new connection. query_only blocks writes even if the
+# URI mode is ever loosened; the rest keep hot pages in memory.
+READ_PRAGMAS = {
+    "query_only": "ON",
+    "mmap_size": 256 * 1024 * 1024,   # 256 MB memory-mapped I/O
+    "cache_size": -32 * 1024,         # 32 MB page cache (negative = KiB)
+    "temp_store": "MEMORY",           # Sorts and temp b-trees stay in RAM
+}
+
+# SQLite VM instructions between progress-handler checks for time limits
+PROGRESS_INTERVAL = 1000
+
+
+def db_signature(db_path):
+    """
+    Identity of the database on disk: (inode, size, mtime_ns) of the file,
+    plus (size, mtime_ns) of its -wal file. In WAL mode commits land in the
+    -wal file and leave the main file untouched until a checkpoint.
+    """
+    st = os.stat(db_path)
+    try:
+        wal = os.stat(f"{db_path}-wal")
+        wal_sig = (wal.st_size, wal.st_mtime_ns)
+    except FileNotFoundError:
+        wal_sig = None
+    return (st.st_ino, st.st_size, st.st_mtime_ns, wal_sig)
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection frees up within the checkout timeout."""
+
+
+class QueryTimeout(Exception):
+    """Raised when a statement is interrupted for running past its time limit."""
+
+
+class StepLimitExceeded(Exception):
+    """Raised when a statement is interrupted for executing too many VM instructions."""
+
+
+class ConnectionPool:
+    """Bounded pool of read-only SQLite connections."""
+
+    def __init__(self, db_path, max_size=4, timeout=30.0):
+        self.db_path = Path(db_path)
+        self.max_size = max_size
+        self.timeout = timeout
+
+        self._idle = []                       # LIFO: most recently used first
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._lock = threading.Lock()
+        self._signature = None
+
+        self.hits = 0          # Checkouts served by an idle connection
+        self.misses = 0        # Checkouts that had to open a new connection
+        self.waits = 0         # Checkouts that blocked on a full pool
+        self.recycled = 0      # Connections dropped because the file changed
+
+    def _open(self):
+        uri = f"{self.db_path.resolve().as_uri()}?mode=ro"
+        conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        for name, value in READ_PRAGMAS.items():
+            conn.execute(f"PRAGMA {name} = {value}")
+        return conn
+
+    def _check_file(self):
+        """Drop idle connections if the database file was swapped out."""
+        signature = db_signature(self.db_path)
+        with self._lock:
+            if signature != self._signature:
+                if self._signature is not None:
+                    self.recycled += len(self._idle)
+                for conn in self._idle:
+                    conn.close()
+                self._idle.clear()
+                self._signature = signature
+            return signature
+
+    def _acquire(self, timeout=None):
+        timeout = self.timeout if timeout is None else timeout
+        if not self._slots.acquire(blocking=False):
+            if timeout <= 0:
+                raise PoolTimeout(f"No database connection free ({self.max_size} in use)")
+            with self._lock:
+                self.waits += 1
+            if not self._slots.acquire(timeout=timeout):
+                raise PoolTimeout(
+                    f"No database connection available after {timeout:.0f}s "
+                    f"({self.max_size} in use)"
+                )
+        try:
+            signature = self._check_file()
+            with self._lock:
+                if self._idle:
+                    self.hits += 1
+                    conn = self._idle.pop()
+                    return conn, signature
+                self.misses += 1
+            return self._open(), signature
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def _release(self, conn, signature, discard=False):
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+            with self._lock:
+                if discard or signature != self._signature:
+                    conn.close()
+                else:
+                    self._idle.append(conn)
+        except sqlite3.Error:
+            conn.close()
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def connection(self, time_limit=None, cancelled=None, max_steps=None, timeout=None):
+        """
+        Borrow a connection for the duration of a `with` block.
+
+        time_limit: seconds from checkout before running statements are interrupted
+        cancelled: threading.Event that interrupts running statements when set
+        max_steps: VM instructions (across all statements in the block) before interrupting
+        timeout: seconds to wait for a free connection (default: the pool's; 0 = don't wait)
+        """
+        conn, signature = self._acquire(timeout)
+        discard = False
+        deadline = time.monotonic() + time_limit if time_limit is not None else None
+        steps = [0]
+
+        if deadline is not None or cancelled is not None or max_steps is not None:
+            def should_abort():
+                steps[0] += PROGRESS_INTERVAL
+                if cancelled is not None and cancelled.is_set():
+                    return 1
+                if deadline is not None and time.monotonic() > deadline:
+                    return 1
+                if max_steps is not None and steps[0] > max_steps:
+                    return 1
+                return 0
+            conn.set_progress_handler(should_abort, PROGRESS_INTERVAL)
+
+        try:
+            yield conn
+        except sqlite3.OperationalError as e:
+            if "interrupt" in str(e):
+                if deadline is not None and time.monotonic() > deadline:
+                    raise QueryTimeout(f"Query exceeded the {time_limit:g}s time limit and was cancelled") from e
+                if max_steps is not None and steps[0] > max_steps:
+                    raise StepLimitExceeded(
+                        f"Query exceeded the budget of {max_steps:,} SQLite VM steps and was cancelled"
+                    ) from e
+            raise
+        except sqlite3.DatabaseError as e:
+            # A bare DatabaseError means corruption or a swapped file and the
+            # handle is unusable; SQL mistakes raise subclasses and are fine.
+            discard = type(e) is sqlite3.DatabaseError
+            raise
+        finally:
+            conn.set_progress_handler(None, 0)
+            self._release(conn, signature, discard=discard)
+
+    def stats(self):
+        """Snapshot of pool usage counters."""
+        with self._lock:
+            checkouts = self.hits + self.misses
+            return {
+                "max_size": self.max_size,
+                "idle": len(self._idle),
+                "checkouts": checkouts,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / checkouts if checkouts else 0.0,
+                "waits": self.waits,
+                "recycled": self.recycled,
+            }
+
+    def close_all(self):
+        """Close every idle connection (checked-out ones close on release)."""
+        with self._lock:
+            for conn in self._idle:
+                conn.close()
+            self._idle.clear()
+            self._signature = None
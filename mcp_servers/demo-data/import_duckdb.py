@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Copy sample_data.db into a DuckDB database for BACKEND = "duckdb".
+
+Every table (rollups included, SQLite's internal sqlite_* tables not) is
+recreated with DuckDB types from its SQLite type affinity - INTEGER ->
+BIGINT, REAL -> DOUBLE, TEXT -> VARCHAR - and copied in batches that
+DuckDB scans as Arrow tables (with pyarrow installed, the faster path) or
+pandas frames. Dates stay YYYY-MM-DD text, as in SQLite, so the catalog and
+date coverage read them the same way; cast with `date::DATE` in queries.
+
+The database is built under a temporary name and renamed into place, so a
+running server never opens a half-built file.
+
+Usage:
+    python import_duckdb.py
+    python import_duckdb.py --source other.db --output other.duckdb
+
+Needs `pip install duckdb`.
+"""
+
+import argparse
+import os
+import sqlite3
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from setup_sample_data import load_rate
+
+try:
+    import duckdb
+except ImportError:
+    duckdb = None
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+SOURCE_PATH = Path(__file__).parent / "sample_data.db"
+OUTPUT_PATH = Path(__file__).parent / "sample_data.duckdb"
+BATCH_SIZE = 100_000        # Rows per batch handed to DuckDB
+
+
+def quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def duckdb_type(declared):
+    """DuckDB column type for a declared SQLite type, by SQLite's affinity rules."""
+    declared = declared.upper()
+    if "INT" in declared:
+        return "BIGINT"
+    if any(word in declared for word in ("CHAR", "CLOB", "TEXT")):
+        return "VARCHAR"
+    if "BLOB" in declared:
+        return "BLOB"
+    if any(word in declared for word in ("REAL", "FLOA", "DOUB")):
+        return "DOUBLE"
+    if not declared:
+        return "VARCHAR"
+    return "DOUBLE"     # NUMERIC affinity
+
+
+def arrow_table(values, columns, types):
+    """
+    One batch as an Arrow table. A column whose values don't fit its type
+    (SQLite types values, not columns) goes over as text for DuckDB to cast;
+    a value that still does not convert fails the import.
+    """
+    arrow_types = {"BIGINT": pa.int64(), "DOUBLE": pa.float64(), "VARCHAR": pa.string(), "BLOB": pa.binary()}
+    arrays = []
+    for column, col_type in zip(values, types):
+        try:
+            arrays.append(pa.array(column, type=arrow_types[col_type]))
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            arrays.append(pa.array([None if v is None else str(v) for v in column], type=pa.string()))
+    return pa.table(arrays, names=columns)
+
+
+def pandas_frame(values, columns, types):
+    """
+    One batch as a pandas frame. Integer columns use the nullable Int64
+    dtype so NULLs don't turn them into floats; a column whose values don't
+    fit its type is left as objects for DuckDB to cast.
+    """
+    data = {}
+    for name, column, col_type in zip(columns, values, types):
+        dtype = {"BIGINT": "Int64", "DOUBLE": "float64"}.get(col_type, object)
+        try:
+            data[name] = pd.array(column, dtype=dtype)
+        except (TypeError, ValueError):
+            data[name] = pd.array(column, dtype=object)
+    return pd.DataFrame(data)
+
+
+def copy_table(source, target, table):
+    info = source.execute(f"PRAGMA table_info({quote(table)})").fetchall()
+    columns = [row[1] for row in info]
+    types = [duckdb_type(row[2]) for row in info]
+    target.execute(
+        f"CREATE TABLE {quote(table)} ("
+        + ", ".join(f"{quote(name)} {col_type}" for name, col_type in zip(columns, types))
+        + ")"
+    )
+
+    cursor = source.execute(f"SELECT * FROM {quote(table)}")
+    while True:
+        batch = cursor.fetchmany(BATCH_SIZE)
+        if not batch:
+            break
+        values = list(zip(*batch))          # Row tuples -> column tuples
+        build = arrow_table if pa is not None else pandas_frame
+        target.register("batch", build(values, columns, types))
+        target.execute(f"INSERT INTO {quote(table)} SELECT * FROM batch")
+        target.unregister("batch")
+
+
+def import_database(source_path, output_path):
+    source = sqlite3.connect(f"{Path(source_path).resolve().as_uri()}?mode=ro", uri=True)
+    tables = [name for (name,) in source.execute(
+        "SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%' ORDER BY name"
+    )]
+
+    temp_path = output_path.with_name(f".{output_path.name}.{os.getpid()}.tmp")
+    temp_path.unlink(missing_ok=True)
+    target = duckdb.connect(str(temp_path))
+    try:
+        for table in tables:
+            started = time.perf_counter()
+            copy_table(source, target, table)
+            print(f"  {table}: {load_rate(target, quote(table), time.perf_counter() - started)}")
+        target.execute("CHECKPOINT")
+        target.close()
+        os.replace(temp_path, output_path)
+    except BaseException:
+        target.close()
+        temp_path.unlink(missing_ok=True)
+        Path(f"{temp_path}.wal").unlink(missing_ok=True)
+        raise
+    finally:
+        source.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Copy the demo SQLite database into DuckDB.")
+    parser.add_argument("--source", type=Path, default=SOURCE_PATH, help="SQLite database to read")
+    parser.add_argument("--output", type=Path, default=OUTPUT_PATH, help="DuckDB database to write")
+    args = parser.parse_args()
+
+    if duckdb is None:
+        raise SystemExit("duckdb is not installed (pip install duckdb).")
+
+    print(f"Importing {args.source} into {args.output}...")
+    import_database(args.source, args.output)
+    print(f"Done. Set BACKEND = \"duckdb\" in server.py to serve {args.output.name}.")
+
+
+if __name__ == "__main__":
+    main()
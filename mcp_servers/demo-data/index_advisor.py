@@ -0,0 +1,139 @@
+"""
+EXPLAIN QUERY PLAN analysis for the demo-data MCP server.
+
+Runs SQLite's planner on a query, flags full table scans, and suggests an
+index from the columns the query filters or joins on. Column detection is
+regex-based - good enough for the short analytical SELECTs agents write,
+not a SQL parser.
+"""
+
+import re
+
+_LITERAL_RE = re.compile(r"'(?:[^']|'')*'")
+_COMMENT_RE = re.compile(r"--[^\n]*|/\*.*?\*/", re.DOTALL)
+_TABLE_REF_RE = re.compile(
+    r"(?:\bFROM|\bJOIN|,)\s+([A-Za-z_]\w*)(?:\s+(?:AS\s+)?([A-Za-z_]\w*))?",
+    re.IGNORECASE,
+)
+_SCAN_RE = re.compile(r"^SCAN (\w+)(?: USING (COVERING )?INDEX (\w+))?")
+
+# Words that can follow a table name but are never an alias
+_NOT_ALIASES = {
+    "where", "join", "inner", "left", "right", "full", "cross", "outer", "natural",
+    "on", "using", "group", "order", "limit", "union", "except", "intersect",
+    "having", "window", "as",
+}
+
+EQUALITY_OPS = {"=", "==", "in", "is"}
+
+
+def strip_sql(sql):
+    """Remove comments and blank out string literals so regexes only see SQL."""
+    return _LITERAL_RE.sub("?", _COMMENT_RE.sub(" ", sql))
+
+
+def explain(conn, sql):
+    """EXPLAIN QUERY PLAN rows as (id, parent, detail)."""
+    cursor = conn.cursor()
+    cursor.execute(f"EXPLAIN QUERY PLAN {sql}")
+    return [(row[0], row[1], row[3]) for row in cursor.fetchall()]
+
+
+def table_aliases(sql, tables):
+    """Map every name a base table is referred to by (alias or own name) to the table."""
+    aliases = {}
+    for name, alias in _TABLE_REF_RE.findall(strip_sql(sql)):
+        table = tables.get(name.lower())
+        if table is None:
+            continue
+        aliases[table.lower()] = table
+        if alias and alias.lower() not in _NOT_ALIASES:
+            aliases[alias.lower()] = table
+    return aliases
+
+
+def predicate_columns(sql, table, columns, aliases):
+    """
+    Columns of one table used in comparisons, as {column: 'eq' | 'range'}.
+
+    A qualified reference (alias.col) counts only for its own table; an
+    unqualified one counts for every table that has the column.
+    """
+    found = {}
+    text = strip_sql(sql)
+    col_pattern = "|".join(re.escape(c) for c in sorted(columns, key=len, reverse=True))
+    pattern = re.compile(
+        rf"(?:\b(\w+)\.)?\b({col_pattern})\b\s*(==|=|<=|>=|<>|!=|<|>|\bIN\b|\bIS\b|\bBETWEEN\b)",
+        re.IGNORECASE,
+    )
+    for qualifier, column, op in pattern.findall(text):
+        if qualifier and aliases.get(qualifier.lower()) != table:
+            continue
+        if op in ("<>", "!="):
+            continue                    # Inequality can't use an index
+        kind = "eq" if op.lower() in EQUALITY_OPS else "range"
+        column = next(c for c in columns if c.lower() == column.lower())
+        if found.get(column) != "eq":
+            found[column] = kind
+    return found
+
+
+def index_prefixes(conn, table):
+    """Leading column lists of every index on a table (primary keys included)."""
+    cursor = conn.cursor()
+    cursor.execute(f"PRAGMA index_list({table})")
+    prefixes = []
+    for row in cursor.fetchall():
+        cursor.execute(f"PRAGMA index_info({row[1]})")
+        prefixes.append([info[2] for info in cursor.fetchall()])
+    return prefixes
+
+
+def advise(conn, sql):
+    """
+    Explain a query and look for full scans.
+
+    Returns (plan rows, findings). Each finding is a dict with the scanned
+    table, its alias, the filtered columns and a suggested CREATE INDEX
+    statement (None when there is nothing to index on).
+    """
+    plan = explain(conn, sql)
+
+    cursor = conn.cursor()
+    cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
+    tables = {name.lower(): name for (name,) in cursor.fetchall()}
+    aliases = table_aliases(sql, tables)
+
+    findings = []
+    for _, _, detail in plan:
+        match = _SCAN_RE.match(detail)
+        if not match:
+            continue
+        alias, covering, index = match.groups()
+        table = aliases.get(alias.lower())
+        if table is None:
+            continue                    # CTE, subquery or constant row
+
+        cursor.execute(f"PRAGMA table_info({table})")
+        columns = [row[1] for row in cursor.fetchall()]
+        filters = predicate_columns(sql, table, columns, aliases)
+
+        suggestion = None
+        if filters:
+            # Equality columns first so the range column can bound the search
+            ordered = [c for c, k in filters.items() if k == "eq"]
+            ordered += [c for c, k in filters.items() if k == "range"][:1]
+            existing = index_prefixes(conn, table)
+            if not any(prefix[:len(ordered)] == ordered for prefix in existing):
+                name = f"idx_{table}_{'_'.join(ordered)}"
+                suggestion = f"CREATE INDEX {name} ON {table}({', '.join(ordered)});"
+
+        findings.append({
+            "table": table,
+            "alias": alias if alias.lower() != table.lower() else None,
+            "via_index": index,
+            "covering": bool(covering),
+            "filters": filters,
+            "suggestion": suggestion,
+        })
+    return plan, findings
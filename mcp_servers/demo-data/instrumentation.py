@@ -0,0 +1,184 @@
+"""
+Per-call timing for the demo-data MCP tools.
+
+Each traced tool call collects wall time per phase (connect, plan,
+execute, fetch, write, format, ...) plus rows returned, bytes written and
+the SQL fingerprint. Finished traces go into a fixed-size ring buffer
+that server_stats summarizes as percentiles, and optionally into a
+JSON-lines log.
+
+The active trace lives in a context variable, so code anywhere under a
+tool call can time a phase with `with phase("fetch"):` and does nothing
+when no trace is active.
+"""
+
+import contextvars
+import functools
+import json
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+
+_current = contextvars.ContextVar("trace", default=None)
+
+
+class Trace:
+    """
+    Timings and counters for one tool call. query_batch adds to it from
+    several threads at once, so the sums are taken under a lock.
+    """
+
+    def __init__(self, tool):
+        self.tool = tool
+        self.started_at = datetime.now().isoformat(timespec="milliseconds")
+        self.phases = {}            # phase -> seconds, summed over repeats
+        self.rows = None
+        self.bytes_written = 0
+        self.fingerprint = None
+        self.error = False
+        self.total = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, name, seconds):
+        with self._lock:
+            self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def add_bytes(self, count):
+        with self._lock:
+            self.bytes_written += count
+
+    def as_dict(self):
+        return {
+            "tool": self.tool,
+            "started_at": self.started_at,
+            "total_ms": round(self.total * 1000, 3),
+            "phases_ms": {name: round(s * 1000, 3) for name, s in self.phases.items()},
+            "rows": self.rows,
+            "bytes_written": self.bytes_written,
+            "fingerprint": self.fingerprint,
+            "error": self.error,
+        }
+
+
+@contextmanager
+def phase(name):
+    """Add the block's wall time to the current trace under `name`."""
+    trace = _current.get()
+    if trace is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.add(name, time.perf_counter() - started)
+
+
+def add_phase(name, seconds):
+    """Add an already measured duration to the current trace."""
+    trace = _current.get()
+    if trace is not None:
+        trace.add(name, seconds)
+
+
+def annotate(**fields):
+    """Set rows / fingerprint on the current trace, or add to bytes_written."""
+    trace = _current.get()
+    if trace is None:
+        return
+    for name, value in fields.items():
+        if name == "bytes_written":
+            trace.add_bytes(value)
+        else:
+            setattr(trace, name, value)
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, math.ceil(pct / 100 * len(sorted_values)) - 1)
+    return sorted_values[rank]
+
+
+class Recorder:
+    """Ring buffer of finished traces with an optional JSON-lines log."""
+
+    def __init__(self, size=2000, log_path=None):
+        self.size = size
+        self.log_path = log_path
+        self._traces = deque(maxlen=size)
+        self._lock = threading.Lock()
+        self.recorded = 0
+
+    def record(self, trace):
+        line = json.dumps(trace.as_dict()) if self.log_path else None
+        with self._lock:
+            self._traces.append(trace)
+            self.recorded += 1
+            if line is not None:
+                self.log_path.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.log_path, "a", encoding="utf-8") as f:
+                    f.write(line + "\n")
+
+    def traced(self, fn):
+        """Decorator: run a tool body under a new trace and record it."""
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            trace = Trace(fn.__name__)
+            token = _current.set(trace)
+            started = time.perf_counter()
+            try:
+                result = fn(*args, **kwargs)
+                # Tools report failures as text rather than raising
+                trace.error = isinstance(result, str) and result.startswith(("Error", "Query aborted"))
+                return result
+            except BaseException:
+                trace.error = True
+                raise
+            finally:
+                trace.total = time.perf_counter() - started
+                _current.reset(token)
+                self.record(trace)
+        return wrapper
+
+    def summary(self, percentiles=(50, 95, 99)):
+        """
+        Per tool: call count, errors and percentiles (ms) of total time and
+        of each phase over the calls in the ring buffer.
+        """
+        with self._lock:
+            traces = list(self._traces)
+
+        by_tool = {}
+        for trace in traces:
+            by_tool.setdefault(trace.tool, []).append(trace)
+
+        summary = {}
+        for tool, calls in sorted(by_tool.items()):
+            totals = sorted(t.total * 1000 for t in calls)
+            phases = {}
+            for trace in calls:
+                for name, seconds in trace.phases.items():
+                    phases.setdefault(name, []).append(seconds * 1000)
+            summary[tool] = {
+                "calls": len(calls),
+                "errors": sum(t.error for t in calls),
+                "total_ms": {p: percentile(totals, p) for p in percentiles},
+                "phases_ms": {
+                    name: {p: percentile(sorted(values), p) for p in percentiles}
+                    for name, values in phases.items()
+                },
+                "rows": sum(t.rows or 0 for t in calls),
+                "bytes_written": sum(t.bytes_written for t in calls),
+            }
+        return summary
+
+    def slowest(self, n=5, tool=None):
+        """The n slowest traces in the ring buffer, optionally for one tool."""
+        with self._lock:
+            traces = [t for t in self._traces if tool is None or t.tool == tool]
+        return sorted(traces, key=lambda t: t.total, reverse=True)[:n]
@@ -0,0 +1,93 @@
+"""
+Volume / mix / rate decomposition for the decompose_change tool.
+
+A summed metric (revenue, conversions, form completions) is a volume
+(sessions, units, landing page visits) times a rate, per dimension value:
+
+    metric = sum over values i of  V * share_i * rate_i
+
+Between a prior window (0) and a current one (1), each value's change
+splits exactly into three effects, taken in this order:
+
+    volume_i = (V1 / V0 - 1) * metric0_i            total volume grew or shrank
+    mix_i    = V1 * (share1_i - share0_i) * rate0_i  the value's share of it moved
+    rate_i   = change_i - volume_i - mix_i           its rate changed
+
+so the three add up to the value's own change, and over all values to the
+total change. Where the value had prior volume, rate_i works out to
+volume1_i * (rate1_i - rate0_i). Values with no prior volume are treated as
+having the prior overall rate, so their arrival counts as mix and only a
+better or worse rate than average as rate; any prior metric they had with
+no volume behind it also lands in rate.
+
+The inputs are compare_periods windows (per-date aggregates of every
+metric, see period_compare.py), so a decomposition after a comparison of
+the same windows, or of another metric over them, runs no SQL.
+"""
+
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+# Table -> (dimension, default metric, default volume)
+DECOMPOSITION_SOURCES = {
+    "channel_metrics": ("channel_id", "revenue", "sessions"),
+    "product_metrics": ("product_id", "revenue", "units_sold"),
+    "lead_form_metrics": ("campaign_id", "form_completions", "lp_visits"),
+    "support_tickets": ("category", "escalated", "rows"),
+}
+
+EFFECTS = ["volume_effect", "mix_effect", "rate_effect"]
+
+Decomposition = namedtuple("Decomposition", "totals effects segments")
+
+
+def window_totals(frame, dimension, metric, volume):
+    """metric and volume summed over a window per dimension value."""
+    return frame.groupby(dimension)[[metric, volume]].sum(min_count=1)
+
+
+def decompose(current, prior, dimension, metric, volume):
+    """
+    Decomposition of metric's change between two loaded windows.
+
+    totals: prior / current / change of metric, volume and rate. effects:
+    the three effects summed over all values. segments: one row per
+    dimension value with its metric, volume, share and rate in both
+    windows and its three effects, largest absolute change first.
+    """
+    cur = window_totals(current, dimension, metric, volume)
+    pri = window_totals(prior, dimension, metric, volume)
+    values = sorted(set(cur.index) | set(pri.index), key=str)
+    cur, pri = cur.reindex(values).fillna(0.0), pri.reindex(values).fillna(0.0)
+
+    volume0, volume1 = pri[volume].sum(), cur[volume].sum()
+    metric0, metric1 = pri[metric].sum(), cur[metric].sum()
+    if volume0 <= 0 or volume1 <= 0:
+        raise ValueError(f"{volume} is 0 in the {'prior' if volume0 <= 0 else 'current'} window; "
+                         f"there is no rate to decompose.")
+    rate0, rate1 = metric0 / volume0, metric1 / volume1
+
+    seg = pd.DataFrame(index=pd.Index(values, name=dimension))
+    seg["metric_prior"], seg["metric_current"] = pri[metric], cur[metric]
+    seg["change"] = seg["metric_current"] - seg["metric_prior"]
+    seg["volume_prior"], seg["volume_current"] = pri[volume], cur[volume]
+    seg["share_prior"], seg["share_current"] = pri[volume] / volume0, cur[volume] / volume1
+    with np.errstate(divide="ignore", invalid="ignore"):
+        seg["rate_prior"] = np.where(pri[volume] > 0, pri[metric] / pri[volume], np.nan)
+        seg["rate_current"] = np.where(cur[volume] > 0, cur[metric] / cur[volume], np.nan)
+    base_rate = seg["rate_prior"].fillna(rate0)     # New values enter at the prior overall rate
+
+    seg["volume_effect"] = (volume1 / volume0 - 1) * seg["metric_prior"]
+    seg["mix_effect"] = volume1 * (seg["share_current"] - seg["share_prior"]) * base_rate
+    seg["rate_effect"] = seg["change"] - seg["volume_effect"] - seg["mix_effect"]
+    seg = seg.reindex(seg["change"].abs().sort_values(ascending=False, kind="stable").index)
+
+    totals = pd.DataFrame(
+        {"prior": [metric0, volume0, rate0], "current": [metric1, volume1, rate1]},
+        index=pd.Index([metric, volume, f"{metric} per {volume}"], name="measure"),
+    )
+    totals["change"] = totals["current"] - totals["prior"]
+    totals["pct_change"] = 100 * totals["change"] / totals["prior"].where(totals["prior"] != 0)
+    return Decomposition(totals=totals, effects=seg[EFFECTS].sum(), segments=seg.reset_index())
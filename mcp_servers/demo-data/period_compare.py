@@ -0,0 +1,236 @@
+"""
+Period-over-period comparison for the compare_periods tool.
+
+A window is one table's rows between two dates, aggregated per date (and
+per dimension value) in SQL and held as a pandas frame. Two windows are
+lined up by day offset - day i of the current window against day i of the
+prior one - so with the default 364-day lookback every day meets the same
+weekday a year earlier (see docs/demo-db/schema.md). Totals, deltas,
+percent changes and the aligned daily series then come from whole-column
+pandas operations instead of a SQL self-join per metric.
+
+Counts and amounts are summed; averages, rates, scores and per-row
+measures such as resolution_hours are averaged (METRIC_AGGREGATION).
+`rows` counts rows, e.g. tickets per day in support_tickets.
+"""
+
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from rollups import YOY_LOOKBACK_DAYS
+
+ROW_COUNT = "rows"
+ALL_GROUPS = "(all)"        # Group label of the overall totals when split by a dimension
+NUMERIC_TYPES = ("INT", "REAL", "FLOA", "DOUB", "NUMERIC", "DECIMAL")
+
+Comparison = namedtuple("Comparison", "totals aligned changes")
+
+# How each metric of the sample tables combines over rows and days. Counts
+# and amounts are summed; averages, rates, scores and per-row measures
+# (a ticket's resolution_hours) are averaged, since their sum would only
+# track row volume. Other tables fall back to the name rule in is_averaged.
+METRIC_AGGREGATION = {
+    "daily_metrics": {
+        "sessions": "sum", "new_users": "sum", "signups": "sum", "trials_started": "sum",
+        "conversions": "sum", "revenue": "sum", "avg_order_value": "avg",
+    },
+    "channel_metrics": {"sessions": "sum", "signups": "sum", "conversions": "sum", "revenue": "sum"},
+    "product_metrics": {"units_sold": "sum", "revenue": "sum", "refunds": "sum", "refund_amount": "sum"},
+    "support_tickets": {"sentiment_score": "avg", "resolution_hours": "avg", "escalated": "sum"},
+    "lead_form_metrics": {
+        "lp_visits": "sum", "form_starts": "sum", "form_completions": "sum", "conversion_rate": "avg",
+    },
+    "weekly_funnel": {
+        "visitors": "sum", "product_views": "sum", "add_to_cart": "sum", "checkout_started": "sum",
+        "checkout_completed": "sum", "conversion_rate": "avg",
+    },
+}
+
+
+def quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def is_averaged(metric, table=None):
+    """
+    Metrics averaged rather than summed: as declared in METRIC_AGGREGATION
+    for table, else those named as means or ratios (avg_*, *_rate, *_score).
+    """
+    if metric == ROW_COUNT:
+        return False
+    declared = METRIC_AGGREGATION.get(table, {}).get(metric)
+    if declared is not None:
+        return declared == "avg"
+    return metric.startswith("avg_") or metric.endswith(("_rate", "_score"))
+
+
+def metric_columns(table, dimension=None):
+    """A catalog table's numeric columns usable as metrics: not ids, not the dimension."""
+    return [
+        c["name"] for c in table["columns"]
+        if any(word in (c["type"] or "").upper() for word in NUMERIC_TYPES)
+        and c["name"] != dimension and c["name"] != "id" and not c["name"].endswith("_id")
+    ]
+
+
+def window_sql(table, date_column, metrics, dimension=None):
+    """Per-date (and per-dimension) aggregates of the rows between two dates, bound as (start, end)."""
+    keys = [quote(date_column)] + ([quote(dimension)] if dimension else [])
+    aggregates = []
+    for metric in metrics:
+        if metric == ROW_COUNT:
+            aggregates.append(f"COUNT(*) AS {quote(ROW_COUNT)}")
+        else:
+            function = "AVG" if is_averaged(metric, table) else "SUM"
+            aggregates.append(f"{function}({quote(metric)}) AS {quote(metric)}")
+    return (
+        f"SELECT {', '.join(keys + aggregates)} FROM {quote(table)} "
+        f"WHERE {quote(date_column)} BETWEEN ? AND ? GROUP BY {', '.join(keys)}"
+    )
+
+
+def load_window(cursor, table, date_column, metrics, dimension, start, end):
+    """
+    One window as a frame: the date, the dimension, one float column per
+    metric, and `offset` (days since start) to align windows on.
+    """
+    columns = [date_column] + ([dimension] if dimension else []) + list(metrics)
+    cursor.execute(window_sql(table, date_column, metrics, dimension), (start.isoformat(), end.isoformat()))
+    frame = pd.DataFrame.from_records(cursor.fetchall(), columns=columns)
+    frame[list(metrics)] = frame[list(metrics)].astype("float64")
+    frame["offset"] = (pd.to_datetime(frame[date_column]) - pd.Timestamp(start)).dt.days
+    return frame
+
+
+def aggregate(data, metrics, table=None):
+    """Sum or average each metric of table over a frame (-> Series) or a groupby (-> DataFrame)."""
+    summed = [m for m in metrics if not is_averaged(m, table)]
+    averaged = [m for m in metrics if is_averaged(m, table)]
+    parts = []
+    if summed:
+        parts.append(data[summed].sum(min_count=1))
+    if averaged:
+        parts.append(data[averaged].mean())
+    grouped = isinstance(data, pd.core.groupby.DataFrameGroupBy)
+    return pd.concat(parts, axis=1 if grouped else 0)[metrics]
+
+
+def group_totals(frame, metrics, dimension=None, table=None):
+    """Window totals as a frame indexed by group: ALL_GROUPS, then each dimension value."""
+    overall = aggregate(frame, metrics, table).to_frame(ALL_GROUPS).T
+    if not dimension:
+        return overall
+    return pd.concat([overall, aggregate(frame.groupby(dimension), metrics, table)])
+
+
+def window_values(window_totals, groups, metrics, table=None):
+    """
+    One window's totals for groups x metrics, flattened. A group with no
+    rows in the window counts 0 for summed metrics (and `rows`) and stays
+    missing for averaged ones.
+    """
+    values = window_totals.reindex(groups)[metrics]
+    summed = [m for m in metrics if not is_averaged(m, table)]
+    values.loc[~values.index.isin(window_totals.index), summed] = 0.0
+    return values.to_numpy(dtype="float64").ravel()
+
+
+def totals(current, prior, metrics, dimension=None, table=None):
+    """current / prior / delta / pct_change per (group, metric), overall totals first."""
+    current_totals = group_totals(current, metrics, dimension, table)
+    prior_totals = group_totals(prior, metrics, dimension, table)
+    values = set(current_totals.index) | set(prior_totals.index)
+    values.discard(ALL_GROUPS)
+    groups = [ALL_GROUPS] + sorted(values, key=str)
+
+    index = pd.MultiIndex.from_product([groups, metrics], names=["group", "metric"])
+    result = pd.DataFrame({
+        "current": window_values(current_totals, groups, metrics, table),
+        "prior": window_values(prior_totals, groups, metrics, table),
+    }, index=index)
+    result["delta"] = result["current"] - result["prior"]
+    result["pct_change"] = 100 * result["delta"] / result["prior"].where(result["prior"] != 0)
+    return result
+
+
+def align(current, prior, metrics, date_column, dimension=None):
+    """
+    The aligned daily series: one row per day offset (and dimension value)
+    with each metric's current value, prior value and delta.
+    """
+    keys = ["offset"] + ([dimension] if dimension else [])
+    aligned = current.merge(prior, on=keys, how="outer", suffixes=("", "_prior"), sort=True)
+    columns = ["offset", date_column, f"{date_column}_prior"] + ([dimension] if dimension else [])
+    for metric in metrics:
+        aligned[f"{metric}_delta"] = aligned[metric] - aligned[f"{metric}_prior"]
+        columns += [metric, f"{metric}_prior", f"{metric}_delta"]
+    return aligned[columns]
+
+
+def daily_changes(aligned, metrics, current_start, prior_start, table=None):
+    """
+    Per metric over the aligned days (dimension values combined): days up,
+    days down, and the days with the largest gain and drop. The gain is
+    empty when no day rose, the drop when none fell.
+    """
+    by_day = aligned.groupby("offset")
+    rows = []
+    for metric in metrics:
+        pair = [metric, f"{metric}_prior"]
+        day = by_day[pair].mean() if is_averaged(metric, table) else by_day[pair].sum(min_count=1)
+        delta = (day[metric] - day[f"{metric}_prior"]).dropna()
+        if delta.empty:
+            rows.append((metric, 0, 0, None, "", None, ""))
+            continue
+
+        def label(offset):
+            current = (current_start + pd.Timedelta(days=int(offset))).date().isoformat()
+            prior = (prior_start + pd.Timedelta(days=int(offset))).date().isoformat()
+            return f"{current} vs {prior}"
+
+        up, down = int((delta > 0).sum()), int((delta < 0).sum())
+        gain, drop = delta.idxmax(), delta.idxmin()
+        rows.append((
+            metric, up, down,
+            delta[gain] if up else None, label(gain) if up else "",
+            delta[drop] if down else None, label(drop) if down else "",
+        ))
+    return pd.DataFrame(rows, columns=["metric", "days_up", "days_down",
+                                       "largest_gain", "gain_on", "largest_drop", "drop_on"])
+
+
+def compare(current, prior, metrics, date_column, dimension, current_start, prior_start, table=None):
+    """Totals, aligned daily series and daily change summary for two loaded windows of table."""
+    aligned = align(current, prior, metrics, date_column, dimension)
+    return Comparison(
+        totals=totals(current, prior, metrics, dimension, table),
+        aligned=aligned,
+        changes=daily_changes(aligned, metrics, pd.Timestamp(current_start), pd.Timestamp(prior_start), table),
+    )
+
+
+def default_prior(start, end):
+    """The window YOY_LOOKBACK_DAYS earlier: same length, same weekdays."""
+    lookback = pd.Timedelta(days=YOY_LOOKBACK_DAYS)
+    return (pd.Timestamp(start) - lookback).date(), (pd.Timestamp(end) - lookback).date()
+
+
+def display_value(value, digits=2):
+    """
+    A number for display: blank if missing, whole numbers without a decimal
+    point, and two more digits below 1 so small rates don't round to 0.
+    """
+    if value is None or pd.isna(value):
+        return ""
+    value = float(value)
+    if value.is_integer() and abs(value) < 1e15:
+        return int(value)
+    return round(value, digits + 2 if abs(value) < 1 else digits) + 0.0     # + 0.0 turns -0.0 into 0.0
+
+
+def ranked_groups(totals_frame, metric, limit):
+    """Dimension values with the largest absolute change in metric, most changed first."""
+    deltas = totals_frame.xs(metric, level="metric")["delta"].drop(ALL_GROUPS)
+    return list(deltas.abs().fillna(-np.inf).sort_values(ascending=False, kind="stable").index[:limit])
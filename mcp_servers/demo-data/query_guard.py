@@ -0,0 +1,95 @@
+"""
+Cost guard for ad-hoc `query` calls.
+
+Two layers:
+- Before running, EXPLAIN QUERY PLAN is checked for full scans nested
+  inside each other (a cartesian product, or a join with no usable
+  index). Using the catalog's row counts, a nest whose row combinations
+  exceed the budget is rejected; smaller ones, and single full scans of
+  large tables, come back as warnings.
+- While running, budgets cap the rows returned and the bytes of result
+  text (truncated), and the SQLite VM steps (aborted). Wall time is the
+  server's per-call timeout.
+"""
+
+import re
+from dataclasses import dataclass
+
+from index_advisor import explain, table_aliases
+
+# Full scans of a table, CTE or subquery (SCAN CONSTANT ROW is a VALUES row)
+_SCAN_RE = re.compile(r"^SCAN (?!CONSTANT ROW)(\w+)")
+
+
+@dataclass
+class QueryBudget:
+    max_rows: int = 1_000_000               # Rows returned before truncating
+    max_result_bytes: int = 256 * 1024**2   # Approx. result text size before truncating
+    max_vm_steps: int = 2_000_000_000       # SQLite VM instructions before aborting
+    max_scan_product: int = 50_000_000      # Nested full-scan row combinations before rejecting
+    large_scan_rows: int = 1_000_000        # Single full scans at or above this get a warning
+
+
+class QueryRejected(Exception):
+    """Raised when the plan pre-check refuses to run a query."""
+
+
+def nested_scans(plan):
+    """Groups of two or more full SCANs under the same plan node, in loop order."""
+    siblings = {}
+    for node_id, parent, detail in plan:
+        match = _SCAN_RE.match(detail)
+        if match:
+            siblings.setdefault(parent, []).append(match.group(1))
+    return [names for names in siblings.values() if len(names) > 1]
+
+
+def check_plan(conn, sql, row_counts, budget):
+    """
+    Pre-check a query's plan. Returns a list of warning strings, or raises
+    QueryRejected. row_counts maps table name -> (approximate) rows.
+    """
+    plan = explain(conn, sql)
+    aliases = table_aliases(sql, {name.lower(): name for name in row_counts})
+    warnings = []
+
+    for names in nested_scans(plan):
+        tables = [aliases.get(name.lower()) for name in names]
+        described = " x ".join(
+            f"{table} ({row_counts[table]:,} rows)" if table else f"{name} (derived)"
+            for name, table in zip(names, tables)
+        )
+        if None in tables:
+            warnings.append(
+                f"Nested full scans of {described} - check the join condition, "
+                f"this may be a cartesian product."
+            )
+            continue
+
+        combinations = 1
+        for table in tables:
+            combinations *= max(row_counts[table], 1)
+        if combinations > budget.max_scan_product:
+            raise QueryRejected(
+                f"Query rejected: the plan nests full scans of {described}, about "
+                f"{combinations:,} row combinations (budget {budget.max_scan_product:,}). "
+                f"This is a cartesian product or a join with no usable index - add a join "
+                f"condition on indexed columns, or aggregate each table first."
+            )
+        warnings.append(
+            f"Nested full scans of {described} ({combinations:,} row combinations) - "
+            f"check the join condition."
+        )
+
+    nested = {name for names in nested_scans(plan) for name in names}
+    for _, _, detail in plan:
+        match = _SCAN_RE.match(detail)
+        if not match or match.group(1) in nested:
+            continue
+        table = aliases.get(match.group(1).lower())
+        if table and row_counts[table] >= budget.large_scan_rows:
+            warnings.append(
+                f"Full scan of {table} ({row_counts[table]:,} rows) - filter on an indexed "
+                f"column to narrow it (see explain_query)."
+            )
+    return warnings
@@ -0,0 +1,80 @@
+"""
+Text encoding for `query` and `fetch_page` output.
+
+CSV text comes from one csv.writer over a reused buffer, so every value
+is converted and quoted in C, once: a batch encoded for the saved CSV file
+also gives its size for the result-size budget, and the displayed rows
+use the same encoder. Values containing commas, quotes or newlines are
+quoted, so the text parses back to the same rows.
+
+Markdown tables convert each cell once, size the columns from those
+strings and build the table in one join.
+"""
+
+import csv
+import io
+
+DISPLAY_FORMATS = ("csv", "markdown")
+
+
+class CsvEncoder:
+    """Encodes batches of rows to CSV text ('\\n' line endings, NULL as empty)."""
+
+    def __init__(self):
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer, lineterminator="\n")
+
+    def encode(self, rows):
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        self._writer.writerows(rows)
+        return self._buffer.getvalue()
+
+
+def format_csv(columns, rows):
+    """Header plus rows as CSV text, without a trailing newline."""
+    encoder = CsvEncoder()
+    return (encoder.encode([columns]) + encoder.encode(rows)).rstrip("\n")
+
+
+def _cell(value):
+    if value is None:
+        return ""
+    text = str(value)
+    if "|" in text or "\n" in text:
+        text = text.replace("|", "\\|").replace("\r\n", "<br>").replace("\n", "<br>")
+    return text
+
+
+def format_markdown(columns, rows):
+    """Rows as a padded markdown table; numeric columns are right-aligned."""
+    header = [_cell(name) for name in columns]
+    cells = [[_cell(value) for value in row] for row in rows]
+    widths = [max(3, len(name)) for name in header]
+    for row in cells:
+        widths = [max(width, len(text)) for width, text in zip(widths, row)]
+
+    # A column is numeric when every non-NULL value is an int or float
+    numeric = [True] * len(columns)
+    for row in rows:
+        numeric = [is_num and (value is None or isinstance(value, (int, float)))
+                   for is_num, value in zip(numeric, row)]
+
+    def line(texts):
+        return "| " + " | ".join(
+            text.rjust(width) if right else text.ljust(width)
+            for text, width, right in zip(texts, widths, numeric)
+        ) + " |"
+
+    rule = "|" + "|".join(
+        "-" * (width + 1) + ":" if right else "-" * (width + 2)
+        for width, right in zip(widths, numeric)
+    ) + "|"
+    return "\n".join([line(header), rule] + [line(row) for row in cells])
+
+
+def format_rows(columns, rows, display_format="csv"):
+    """Display text for rows in one of DISPLAY_FORMATS."""
+    if display_format == "markdown":
+        return format_markdown(columns, rows)
+    return format_csv(columns, rows)
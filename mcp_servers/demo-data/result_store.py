@@ -0,0 +1,180 @@
+"""
+Spilled query results for paging with `fetch_page`.
+
+Results longer than the display limit are copied, as they stream, into a
+small SQLite file of their own, one row per rowid. A page is then a
+rowid range seek - O(page), whatever the result size - instead of
+re-running the query or re-reading the saved CSV.
+
+Results are kept for a TTL after their last use and capped in number;
+expired files are deleted on the next store operation. A file's mtime is
+its last use, so at startup only files idle past the TTL are removed:
+those left by an earlier process, not those of other live servers sharing
+the directory.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+
+
+class ResultNotFound(Exception):
+    """Raised for an unknown or expired result id."""
+
+
+def _connect(path):
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode = OFF")
+    conn.execute("PRAGMA synchronous = OFF")
+    return conn
+
+
+class SpillWriter:
+    """Appends rows for one result; publish with close(), or abort()."""
+
+    def __init__(self, store, result_id, path, columns):
+        self.store = store
+        self.result_id = result_id
+        self.path = path
+        self.columns = columns
+        self.rows = 0
+        self._conn = _connect(path)
+        # Untyped columns keep every value exactly as SQLite returned it
+        self._conn.execute(f"CREATE TABLE rows ({', '.join(f'c{i}' for i in range(len(columns)))})")
+        self._insert = f"INSERT INTO rows VALUES ({', '.join('?' * len(columns))})"
+
+    def write(self, rows):
+        self._conn.executemany(self._insert, rows)
+        self.rows += len(rows)
+
+    def close(self):
+        self._conn.commit()
+        self._conn.close()
+        self.store._publish(self)
+
+    def abort(self):
+        """Discard the result, also after a close() that failed part-way."""
+        self._conn.close()
+        self.store._discard(self.result_id)
+        self.path.unlink(missing_ok=True)
+
+
+class ResultStore:
+    """Thread-safe registry of spilled results with TTL and count-based eviction."""
+
+    def __init__(self, directory, ttl=1800, max_results=200):
+        self.directory = Path(directory)
+        self.ttl = ttl
+        self.max_results = max_results
+
+        self._results = OrderedDict()       # id -> {path, columns, rows, last_used}
+        self._lock = threading.Lock()
+
+        self.pages = 0
+        self.expired = 0
+        self.evicted = 0
+
+        # Spill files idle past the TTL are expired for whichever process wrote them
+        if self.directory.exists():
+            cutoff = time.time() - self.ttl
+            for stale in self.directory.glob("result_*.db"):
+                try:
+                    if stale.stat().st_mtime < cutoff:
+                        stale.unlink()
+                except FileNotFoundError:
+                    pass
+
+    def spill(self, columns):
+        """Start a new result. Returns a SpillWriter."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        result_id = uuid.uuid4().hex[:16]
+        return SpillWriter(self, result_id, self.directory / f"result_{result_id}.db", columns)
+
+    def _publish(self, writer):
+        with self._lock:
+            self._results[writer.result_id] = {
+                "path": writer.path,
+                "columns": writer.columns,
+                "rows": writer.rows,
+                "last_used": time.monotonic(),
+            }
+            self._evict()
+
+    def _discard(self, result_id):
+        with self._lock:
+            self._results.pop(result_id, None)
+
+    def _evict(self):
+        """Drop expired results, then the least recently used past max_results. Caller holds the lock."""
+        cutoff = time.monotonic() - self.ttl
+        for result_id, entry in list(self._results.items()):
+            if entry["last_used"] < cutoff:
+                del self._results[result_id]
+                entry["path"].unlink(missing_ok=True)
+                self.expired += 1
+        while len(self._results) > self.max_results:
+            _, entry = self._results.popitem(last=False)
+            entry["path"].unlink(missing_ok=True)
+            self.evicted += 1
+
+    def renew(self, path):
+        """
+        Mark the result spilled to path as just used, e.g. when a cached
+        response that names it is served again. False if it has expired or
+        been evicted.
+        """
+        result_id = Path(path).stem.removeprefix("result_")
+        with self._lock:
+            self._evict()
+            entry = self._results.get(result_id)
+            if entry is None:
+                return False
+            entry["last_used"] = time.monotonic()
+            self._results.move_to_end(result_id)
+        try:
+            os.utime(entry["path"])
+        except FileNotFoundError:
+            return False
+        return True
+
+    def page(self, result_id, offset, limit):
+        """
+        Rows offset..offset+limit-1 of a result (0-based). Returns
+        (columns, rows, total rows); raises ResultNotFound.
+        """
+        with self._lock:
+            self._evict()
+            entry = self._results.get(result_id)
+            if entry is None:
+                raise ResultNotFound(result_id)
+            entry["last_used"] = time.monotonic()
+            self._results.move_to_end(result_id)
+            self.pages += 1
+
+        try:
+            conn = sqlite3.connect(f"{entry['path'].resolve().as_uri()}?mode=ro", uri=True)
+            try:
+                rows = conn.execute(
+                    "SELECT * FROM rows WHERE rowid > ? ORDER BY rowid LIMIT ?", (offset, limit)
+                ).fetchall()
+            finally:
+                conn.close()
+            os.utime(entry["path"])     # Last use, for other processes' startup sweeps
+        except (sqlite3.OperationalError, FileNotFoundError) as e:
+            # Evicted by another call between the lookup and the read
+            raise ResultNotFound(result_id) from e
+        return entry["columns"], rows, entry["rows"]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "results": len(self._results),
+                "rows": sum(e["rows"] for e in self._results.values()),
+                "pages": self.pages,
+                "expired": self.expired,
+                "evicted": self.evicted,
+            }
@@ -0,0 +1,198 @@
+"""
+Artifact writers for large `query` results.
+
+Rows arrive in fetchmany batches and each writer appends one batch at a
+time, so nothing beyond the current batch is held in memory. CSV is always
+available. Parquet and Feather keep column types (INTEGER/REAL/TEXT/BLOB)
+and need pyarrow (`pip install pyarrow`); without it the server falls back
+to CSV.
+
+Files are named after a hash of the normalized SQL and the database
+version, so re-running a query names the same file. Each file is written
+under a temporary name and renamed into place on close: a reader never
+sees a half-written file, and two calls writing the same artifact at once
+both leave a complete copy.
+"""
+
+import hashlib
+import os
+import uuid
+
+from result_format import CsvEncoder
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+# Supported output formats and their file extensions
+OUTPUT_FORMATS = {
+    "csv": ".csv",
+    "parquet": ".parquet",
+    "feather": ".feather",
+}
+
+
+class ColumnTypeMismatch(Exception):
+    """A later batch holds values that don't fit the column type inferred so far."""
+
+
+def columnar_available():
+    return pa is not None
+
+
+def artifact_stem(normalized_sql, db_version, prefix="query"):
+    """File name stem shared by every run of one query (or other request) against one database version."""
+    digest = hashlib.sha1(f"{normalized_sql}\n{db_version}".encode("utf-8")).hexdigest()[:16]
+    return f"{prefix}_{digest}"
+
+
+def temp_path(path):
+    """Unique hidden sibling of `path` to write before renaming onto it."""
+    return path.with_name(f".{path.name}.{uuid.uuid4().hex[:8]}.tmp")
+
+
+def write_text_atomic(path, text):
+    temp = temp_path(path)
+    try:
+        with open(temp, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(temp, path)
+    except BaseException:
+        temp.unlink(missing_ok=True)
+        raise
+
+
+class CsvResultWriter:
+    """
+    Plain-text CSV with a header row. Callers that have already encoded a
+    batch (see result_format.CsvEncoder) pass the text to write_text.
+    """
+
+    def __init__(self, path, columns):
+        self.path = path
+        self._temp = temp_path(path)
+        self._encoder = CsvEncoder()
+        self._file = open(self._temp, "w", newline="", encoding="utf-8")
+        self._file.write(self._encoder.encode([columns]))
+
+    def write(self, rows):
+        self._file.write(self._encoder.encode(rows))
+
+    def write_text(self, text):
+        self._file.write(text)
+
+    def close(self):
+        self._file.close()
+        os.replace(self._temp, self.path)
+
+    def abort(self):
+        self._file.close()
+        self._temp.unlink(missing_ok=True)
+
+
+class ArrowResultWriter:
+    """
+    Parquet or Feather (Arrow IPC) file written one record batch per fetch.
+
+    The schema is inferred from the first batch: integer columns become
+    int64, mixed int/float become float64, text becomes string. Feather is
+    left uncompressed so pandas/pyarrow can memory-map it without copying.
+    """
+
+    def __init__(self, path, columns, fmt):
+        self.path = path
+        self.columns = columns
+        self.fmt = fmt
+        self._temp = temp_path(path)
+        self._schema = None
+        self._writer = None
+
+    def _infer_schema(self, arrays):
+        fields = []
+        for name, arr in zip(self.columns, arrays):
+            arrow_type = arr.type
+            if pa.types.is_null(arrow_type):
+                arrow_type = pa.string()     # All NULL so far - assume TEXT
+            fields.append(pa.field(name, arrow_type))
+        return pa.schema(fields)
+
+    def _open(self, schema):
+        if self.fmt == "parquet":
+            return pq.ParquetWriter(str(self._temp), schema)
+        return pa.ipc.new_file(str(self._temp), schema)
+
+    def write(self, rows):
+        try:
+            arrays = [pa.array(values) for values in zip(*rows)]
+        except (pa.ArrowInvalid, pa.ArrowTypeError) as e:
+            raise ColumnTypeMismatch(f"Mixed value types in one column: {e}") from e
+
+        if self._schema is None:
+            self._schema = self._infer_schema(arrays)
+            self._writer = self._open(self._schema)
+
+        # Safe casts only: int -> float is fine, float -> int is not, and
+        # numbers are never silently turned into text
+        cast = []
+        for arr, field in zip(arrays, self._schema):
+            if arr.type != field.type and not pa.types.is_null(arr.type):
+                mismatch = ColumnTypeMismatch(
+                    f"Column '{field.name}' changed type from {field.type} to {arr.type}"
+                )
+                if pa.types.is_string(field.type):
+                    raise mismatch
+                try:
+                    arr = arr.cast(field.type)
+                except (pa.ArrowInvalid, pa.ArrowNotImplementedError) as e:
+                    raise mismatch from e
+            elif pa.types.is_null(arr.type):
+                arr = pa.nulls(len(arr), field.type)
+            cast.append(arr)
+
+        batch = pa.RecordBatch.from_arrays(cast, schema=self._schema)
+        self._writer.write_batch(batch)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+            os.replace(self._temp, self.path)
+
+    def abort(self):
+        try:
+            if self._writer is not None:
+                self._writer.close()
+        finally:
+            self._temp.unlink(missing_ok=True)
+
+
+class ExistingArtifact:
+    """
+    Stands in for a writer when the artifact already exists: an identical
+    query against the same database version wrote it, so rows are dropped.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def write(self, rows):
+        pass
+
+    def write_text(self, text):
+        pass
+
+    def close(self):
+        pass
+
+    def abort(self):
+        pass
+
+
+def open_writer(fmt, path, columns):
+    """Create the writer for an output format. Callers must close() or abort()."""
+    if fmt == "csv":
+        return CsvResultWriter(path, columns)
+    return ArrowResultWriter(path, columns, fmt)
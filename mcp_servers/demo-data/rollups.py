@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+Pre-aggregated rollups for the daily time-series tables.
+
+Builds week / month / quarter sums for daily_metrics, channel_metrics and
+product_metrics, plus week-level YoY pairs aligned on a 364-day lookback
+(same weekday, see docs/demo-db/schema.md). Refresh is incremental: only
+periods on or after the last rolled-up date are recomputed, so appending
+new days is cheap.
+
+Run directly to refresh sample_data.db (setup_sample_data.py also calls it):
+    python rollups.py          # Incremental refresh
+    python rollups.py --full   # Rebuild everything
+"""
+
+import sqlite3
+import sys
+from datetime import datetime
+from pathlib import Path
+
+DB_PATH = Path(__file__).parent / "sample_data.db"
+
+# Source table -> (dimension column or None, additive metric columns)
+ROLLUP_SOURCES = {
+    "daily_metrics": (None, ["sessions", "new_users", "signups", "trials_started", "conversions", "revenue"]),
+    "channel_metrics": ("channel_id", ["sessions", "signups", "conversions", "revenue"]),
+    "product_metrics": ("product_id", ["units_sold", "revenue", "refunds", "refund_amount"]),
+}
+
+# Period-start expressions over a TEXT YYYY-MM-DD column. Weeks start Monday
+# to match weekly_funnel.week_start.
+GRAINS = {
+    "week": "date({col}, 'weekday 0', '-6 days')",
+    "month": "strftime('%Y-%m-01', {col})",
+    "quarter": "printf('%s-%02d-01', strftime('%Y', {col}), "
+               "((CAST(strftime('%m', {col}) AS INTEGER) - 1) / 3) * 3 + 1)",
+}
+
+YOY_LOOKBACK_DAYS = 364
+
+# Metrics stored as REAL; everything else is a count
+REAL_METRICS = {"revenue", "refund_amount"}
+
+
+def rollup_table(source, grain):
+    """Name of the rollup table for a source table and grain ('week', 'yoy_week', ...)."""
+    return f"rollup_{source}_{grain}"
+
+
+def period_expr(grain, col="date"):
+    return GRAINS[grain].format(col=col)
+
+
+def metric_type(metric):
+    return "REAL" if metric in REAL_METRICS else "INTEGER"
+
+
+def sum_expr(metric, col=None):
+    col = col or metric
+    return f"ROUND(SUM({col}), 2)" if metric in REAL_METRICS else f"SUM({col})"
+
+
+def create_rollup_tables(conn):
+    """Create rollup tables and the refresh-state table if missing."""
+    cursor = conn.cursor()
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS rollup_state (
+            source_table TEXT PRIMARY KEY,
+            last_date TEXT,
+            refreshed_at TEXT
+        )
+    """)
+
+    for source, (dimension, metrics) in ROLLUP_SOURCES.items():
+        key_cols = ["period_start TEXT"] + ([f"{dimension} TEXT"] if dimension else [])
+        key_names = ["period_start"] + ([dimension] if dimension else [])
+        metric_cols = [f"{m} {metric_type(m)}" for m in metrics]
+
+        for grain in GRAINS:
+            cursor.execute(f"""
+                CREATE TABLE IF NOT EXISTS {rollup_table(source, grain)} (
+                    {", ".join(key_cols)},
+                    days INTEGER,
+                    {", ".join(metric_cols)},
+                    PRIMARY KEY ({", ".join(key_names)})
+                )
+            """)
+
+        prior_cols = [f"{m}_prior {metric_type(m)}" for m in metrics]
+        cursor.execute(f"""
+            CREATE TABLE IF NOT EXISTS {rollup_table(source, "yoy_week")} (
+                {", ".join(key_cols)},
+                prior_period_start TEXT,
+                days INTEGER,
+                days_prior INTEGER,
+                {", ".join(metric_cols)},
+                {", ".join(prior_cols)},
+                PRIMARY KEY ({", ".join(key_names)})
+            )
+        """)
+
+    conn.commit()
+
+
+def refresh_source(conn, source, full=False):
+    """
+    Recompute rollups for one source table. Returns the number of source
+    days re-aggregated.
+
+    Incremental refresh restarts at the quarter containing the last
+    rolled-up date, which covers any partially filled week and month too.
+    """
+    dimension, metrics = ROLLUP_SOURCES[source]
+    cursor = conn.cursor()
+
+    cursor.execute("SELECT last_date FROM rollup_state WHERE source_table = ?", (source,))
+    row = cursor.fetchone()
+    last_date = None if full or row is None else row[0]
+
+    cursor.execute(f"SELECT MAX(date) FROM {source}")
+    max_date = cursor.fetchone()[0]
+    if max_date is None:
+        return 0
+
+    # Period boundaries use a named parameter because the expressions
+    # reference their column more than once
+    if last_date is None:
+        start = None
+        scope = ""
+    else:
+        cursor.execute(f"SELECT {period_expr('quarter', ':start')}", {"start": last_date})
+        start = cursor.fetchone()[0]
+    params = {"start": start}
+
+    dim_select = f", {dimension}" if dimension else ""
+    sums = ", ".join(sum_expr(m) for m in metrics)
+
+    for grain in GRAINS:
+        table = rollup_table(source, grain)
+        if start is not None:
+            scope = f" >= {period_expr(grain, ':start')}"
+        cursor.execute(f"DELETE FROM {table}" + (f" WHERE period_start{scope}" if scope else ""), params)
+        cursor.execute(f"""
+            INSERT INTO {table}
+            SELECT {period_expr(grain)} AS period_start{dim_select}, COUNT(DISTINCT date), {sums}
+            FROM {source}
+            {f"WHERE date{scope}" if scope else ""}
+            GROUP BY period_start{dim_select}
+        """, params)
+
+    # YoY pairs: a week's prior side is 52 weeks back, so only weeks on or
+    # after the refresh start can have changed on either side
+    week_table = rollup_table(source, "week")
+    yoy_table = rollup_table(source, "yoy_week")
+    join_dim = f" AND p.{dimension} = c.{dimension}" if dimension else ""
+    if start is not None:
+        scope = f" >= {period_expr('week', ':start')}"
+    cursor.execute(f"DELETE FROM {yoy_table}" + (f" WHERE period_start{scope}" if scope else ""), params)
+    cursor.execute(f"""
+        INSERT INTO {yoy_table}
+        SELECT c.period_start{", c." + dimension if dimension else ""},
+               p.period_start, c.days, p.days,
+               {", ".join(f"c.{m}" for m in metrics)},
+               {", ".join(f"p.{m}" for m in metrics)}
+        FROM {week_table} c
+        JOIN {week_table} p
+          ON p.period_start = date(c.period_start, '-{YOY_LOOKBACK_DAYS} days'){join_dim}
+        {f"WHERE c.period_start{scope}" if scope else ""}
+    """, params)
+
+    if start is None:
+        cursor.execute(f"SELECT COUNT(DISTINCT date) FROM {source}")
+    else:
+        cursor.execute(f"SELECT COUNT(DISTINCT date) FROM {source} WHERE date >= ?", (start,))
+    days = cursor.fetchone()[0]
+
+    cursor.execute("""
+        INSERT OR REPLACE INTO rollup_state VALUES (?, ?, ?)
+    """, (source, max_date, datetime.now().isoformat(timespec="seconds")))
+    return days
+
+
+def build_rollups(conn, full=False):
+    """Create (if needed) and refresh every rollup. Returns {source: days refreshed}."""
+    create_rollup_tables(conn)
+    refreshed = {}
+    for source in ROLLUP_SOURCES:
+        refreshed[source] = refresh_source(conn, source, full=full)
+    conn.commit()
+    return refreshed
+
+
+def rollup_sql(source, grain="week", start_date=None, end_date=None,
+               by_dimension=False, compare_yoy=False, use_rollups=True):
+    """
+    SELECT statement answering a period aggregation for one source table.
+
+    Reads the materialized rollup tables when use_rollups is True, otherwise
+    aggregates the source table inline with the same definitions. Dates must
+    already be validated as YYYY-MM-DD; they filter on period_start.
+    """
+    dimension, metrics = ROLLUP_SOURCES[source]
+    group_cols = ["period_start"]
+    if compare_yoy:
+        group_cols.append("prior_period_start")
+    if by_dimension and dimension:
+        group_cols.append(dimension)
+
+    ctes = []
+    if use_rollups:
+        week_source = rollup_table(source, "week")
+        base = rollup_table(source, "yoy_week" if compare_yoy else grain)
+    else:
+        dim_select = f", {dimension}" if dimension else ""
+        metric_sums = ", ".join(f"{sum_expr(m)} AS {m}" for m in metrics)
+        period_grain = "week" if compare_yoy else grain
+        ctes.append(f"""periods AS (
+            SELECT {period_expr(period_grain)} AS period_start{dim_select},
+                   COUNT(DISTINCT date) AS days, {metric_sums}
+            FROM {source}
+            GROUP BY period_start{dim_select}
+        )""")
+        week_source = base = "periods"
+
+    if compare_yoy and not use_rollups:
+        join_dim = f" AND p.{dimension} = c.{dimension}" if dimension else ""
+        ctes.append(f"""pairs AS (
+            SELECT c.period_start{", c." + dimension if dimension else ""},
+                   p.period_start AS prior_period_start,
+                   c.days, p.days AS days_prior,
+                   {", ".join(f"c.{m}" for m in metrics)},
+                   {", ".join(f"p.{m} AS {m}_prior" for m in metrics)}
+            FROM {week_source} c
+            JOIN {week_source} p
+              ON p.period_start = date(c.period_start, '-{YOY_LOOKBACK_DAYS} days'){join_dim}
+        )""")
+        base = "pairs"
+
+    select = list(group_cols) + ["MAX(days) AS days"]
+    if compare_yoy:
+        select.append("MAX(days_prior) AS days_prior")
+    for m in metrics:
+        select.append(f"{sum_expr(m)} AS {m}")
+        if compare_yoy:
+            select.append(f"{sum_expr(m, m + '_prior')} AS {m}_prior")
+            select.append(
+                f"ROUND(100.0 * (SUM({m}) - SUM({m}_prior)) / NULLIF(SUM({m}_prior), 0), 1) AS {m}_yoy_pct"
+            )
+
+    where = []
+    if start_date:
+        where.append(f"period_start >= '{start_date}'")
+    if end_date:
+        where.append(f"period_start <= '{end_date}'")
+
+    sql = ""
+    if ctes:
+        sql += "WITH " + ",\n".join(ctes) + "\n"
+    sql += f"SELECT {', '.join(select)}\nFROM {base}\n"
+    if where:
+        sql += f"WHERE {' AND '.join(where)}\n"
+    sql += f"GROUP BY {', '.join(group_cols)}\nORDER BY {', '.join(group_cols)}"
+    return sql
+
+
+def rollups_available(conn):
+    """True if rollup tables exist and every source has been refreshed."""
+    cursor = conn.cursor()
+    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='rollup_state'")
+    if cursor.fetchone() is None:
+        return False
+    cursor.execute("SELECT COUNT(*) FROM rollup_state")
+    return cursor.fetchone()[0] >= len(ROLLUP_SOURCES)
+
+
+def main():
+    full = "--full" in sys.argv[1:]
+    conn = sqlite3.connect(DB_PATH)
+    refreshed = build_rollups(conn, full=full)
+    conn.close()
+    for source, days in refreshed.items():
+        print(f"{source}: re-aggregated {days} day(s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+In-memory schema catalog for `list_tables` and `describe_table`.
+
+Holds every table's columns, types, row count and per-column min / max /
+sample values. It is built once per database version (same file
+signature the pool and result cache use) so the tools answer from memory
+instead of scanning tables on every call. The engine-specific parts -
+listing tables and columns, stored row counts, which columns an index
+answers MIN/MAX for - come from the backend (see backends.py).
+
+On SQLite, row counts come from sqlite_stat1 when the database has been
+ANALYZEd (setup_sample_data.py does this) and are marked approximate;
+otherwise the table is counted once while building the catalog.
+
+Date coverage (see date_coverage.py) is computed on first request and
+cached with the rest of the catalog.
+"""
+
+import threading
+import time
+
+from date_coverage import date_columns, table_coverage
+
+SAMPLE_ROWS = 10_000        # Rows scanned per column for sample values
+SAMPLE_VALUES = 5           # Distinct sample values kept per column
+
+
+def quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def describe(cursor, table, row_counts, backend):
+    """Catalog entry for one table."""
+    columns = [{"name": name, "type": col_type} for name, col_type in backend.columns(cursor, table)]
+
+    if table in row_counts:
+        row_count, exact = row_counts[table], False
+    else:
+        cursor.execute(f"SELECT COUNT(*) FROM {quote(table)}")
+        row_count, exact = cursor.fetchone()[0], True
+
+    # A lone MIN() or MAX() on a column that leads an index (or is the rowid)
+    # is a single b-tree seek; everything else shares one pass over the table
+    indexed = backend.seek_columns(cursor, table)
+
+    for column in columns:
+        if column["name"] in indexed:
+            name = quote(column["name"])
+            cursor.execute(f"SELECT MIN({name}) FROM {quote(table)}")
+            column["min"] = cursor.fetchone()[0]
+            cursor.execute(f"SELECT MAX({name}) FROM {quote(table)}")
+            column["max"] = cursor.fetchone()[0]
+
+    scanned = [c for c in columns if c["name"] not in indexed]
+    if scanned:
+        aggregates = ", ".join(f"MIN({quote(c['name'])}), MAX({quote(c['name'])})" for c in scanned)
+        cursor.execute(f"SELECT {aggregates} FROM {quote(table)}")
+        bounds = cursor.fetchone()
+        for i, column in enumerate(scanned):
+            column["min"], column["max"] = bounds[2 * i], bounds[2 * i + 1]
+
+    for column in columns:
+        name = quote(column["name"])
+        cursor.execute(
+            f"SELECT DISTINCT {name} FROM (SELECT {name} FROM {quote(table)} LIMIT ?) "
+            f"WHERE {name} IS NOT NULL LIMIT ?",
+            (SAMPLE_ROWS, SAMPLE_VALUES + 1),
+        )
+        values = [row[0] for row in cursor.fetchall()]
+        column["samples"] = values[:SAMPLE_VALUES]
+        column["more_values"] = len(values) > SAMPLE_VALUES
+
+    return {"name": table, "row_count": row_count, "row_count_exact": exact, "columns": columns}
+
+
+class SchemaCatalog:
+    """Thread-safe catalog rebuilt whenever the database file signature changes."""
+
+    def __init__(self, backend):
+        self.backend = backend
+
+        self._tables = {}                   # lowercased name -> entry
+        self._coverage = None               # Date coverage rows, computed on demand
+        self._signature = None
+        self._lock = threading.Lock()
+
+        self.builds = 0
+        self.lookups = 0
+        self.last_build_seconds = None
+
+    def _current(self, conn):
+        """Tables for the database as it is now, rebuilding with conn if it changed."""
+        signature = self.backend.signature()
+        with self._lock:
+            self.lookups += 1
+            if signature != self._signature:
+                self._build(conn, signature)
+            return self._tables
+
+    def _build(self, conn, signature):
+        started = time.perf_counter()
+        cursor = conn.cursor()
+        row_counts = self.backend.row_counts(cursor)
+        names = self.backend.table_names(cursor)
+        self._tables = {name.lower(): describe(cursor, name, row_counts, self.backend) for name in names}
+        self._coverage = None
+        self._signature = signature
+        self.builds += 1
+        self.last_build_seconds = time.perf_counter() - started
+
+    def tables(self, conn):
+        """All catalog entries, ordered by table name."""
+        return list(self._current(conn).values())
+
+    def table(self, conn, name):
+        """Catalog entry for one table (case-insensitive), or None."""
+        return self._current(conn).get(name.lower())
+
+    def coverage(self, conn):
+        """Date coverage for every date column in the database (see date_coverage.py)."""
+        self._current(conn)
+        with self._lock:
+            if self._coverage is None:
+                cursor = conn.cursor()
+                rows = (
+                    table_coverage(cursor, table["name"], column)
+                    for table in self._tables.values()
+                    for column in date_columns(table)
+                )
+                self._coverage = [row for row in rows if row is not None]
+            return self._coverage
+
+    def stats(self):
+        with self._lock:
+            return {
+                "tables": len(self._tables),
+                "builds": self.builds,
+                "lookups": self.lookups,
+                "last_build_seconds": self.last_build_seconds,
+            }
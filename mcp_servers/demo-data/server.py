@@ -3,103 +3,664 @@
 Demo Data MCP Server
 
 A lightweight SQLite MCP server for demoing the ProductAIFlows analyze skill.
-Ships with sample LearnFlow metrics data. Swap in your own database by replacing sample_data.db.
+Ships with sample LearnFlow metrics data. Swap in your own database by replacing sample_data.db,
+or set BACKEND = "duckdb" to serve a DuckDB copy built by import_duckdb.py (see backends.py).
 """
 
+import asyncio
+import contextvars
+import functools
+import os
 import sqlite3
-import csv
-import io
-from datetime import datetime
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from queue import Empty, SimpleQueue
+from contextlib import ExitStack, contextmanager, nullcontext
+from datetime import date, datetime, timedelta
 from pathlib import Path
 from mcp.server.fastmcp import FastMCP
 
+from anomalies import ANOMALY_SOURCES, AnomalyScanner
+from artifact_manifest import ArtifactManifest
+from backends import open_backend
+from date_coverage import date_columns
+from db_pool import PoolTimeout, QueryTimeout, StepLimitExceeded
+from result_cache import ResultCache
+from result_format import DISPLAY_FORMATS, CsvEncoder, format_rows
+from result_store import ResultNotFound, ResultStore
+from result_writers import (
+    OUTPUT_FORMATS, ColumnTypeMismatch, ExistingArtifact, artifact_stem, columnar_available, open_writer,
+    write_text_atomic,
+)
+from index_advisor import advise
+from instrumentation import Recorder, add_phase, annotate, phase
+from mix_decomposition import DECOMPOSITION_SOURCES, EFFECTS, decompose
+from period_compare import (
+    ALL_GROUPS, ROW_COUNT, compare, default_prior, display_value, is_averaged, load_window, metric_columns,
+    ranked_groups,
+)
+from query_guard import QueryBudget, QueryRejected, check_plan
+from rollups import GRAINS, ROLLUP_SOURCES, rollup_sql, rollups_available
+from schema_catalog import SchemaCatalog
+from sql_parser import ReadOnlyAuthorizer, parse
+from statement_stats import StatementStats
+
 # Initialize MCP server
 mcp = FastMCP("demo-data")
 
-# Database path (same directory as this script)
-DB_PATH = Path(__file__).parent / "sample_data.db"
+# Database path (same directory as this script). DEMO_DATA_DB, DEMO_DATA_BACKEND
+# and DEMO_DATA_TMP override the database, engine and tmp/ root, e.g. for
+# the load tests in benchmarks/
+DB_PATH = Path(os.environ.get("DEMO_DATA_DB", Path(__file__).parent / "sample_data.db"))
+
+# Database engine: "sqlite" serves DB_PATH; "duckdb" serves DUCKDB_PATH, a
+# columnar copy built by `python import_duckdb.py` (needs `pip install duckdb`)
+BACKEND = os.environ.get("DEMO_DATA_BACKEND", "sqlite")
+DUCKDB_PATH = DB_PATH.with_suffix(".duckdb")
 
 # Auto-save and display thresholds
 CSV_SAVE_THRESHOLD = 3      # Save CSV when rows exceed this
 DISPLAY_ROW_LIMIT = 20      # Truncate display output beyond this
-TMP_DIR = Path(__file__).parent.parent.parent / "tmp" / "csv"
+FETCH_BATCH_SIZE = 1000     # Rows pulled per fetchmany() while streaming
+TMP_DIR = Path(os.environ.get("DEMO_DATA_TMP", Path(__file__).parent.parent.parent / "tmp")) / "csv"
+
+# Saved results are listed (and touched on reuse) in tmp/manifest.jsonl so
+# scripts/cleanup_tmp.py can evict them without walking tmp/
+manifest = ArtifactManifest(TMP_DIR.parent / "manifest.jsonl")
+
+# Read-only connection pool shared by all tools
+POOL_SIZE = 4               # Max concurrent connections
+backend = open_backend(BACKEND, DUCKDB_PATH if BACKEND == "duckdb" else DB_PATH, pool_size=POOL_SIZE)
+
+# Tool bodies run on a worker pool sized to the connection pool, so a slow
+# query never blocks the event loop or cheap calls like list_tables
+QUERY_TIMEOUT_SECONDS = 30  # Statements running longer are interrupted
+executor = ThreadPoolExecutor(max_workers=POOL_SIZE, thread_name_prefix="demo-data-sql")
+
+# query_batch runs its statements at one database snapshot on up to
+# BATCH_CONNECTIONS pooled connections. Only the first connection waits for
+# the pool; the others are taken if free. Statements fan out on their own
+# threads, since the tool body already holds one of the executor's workers.
+MAX_BATCH_STATEMENTS = 20
+BATCH_CONNECTIONS = POOL_SIZE - 1
+SNAPSHOT_ATTEMPTS = 3       # Retries when the database changes while the snapshot opens
+batch_executor = ThreadPoolExecutor(max_workers=POOL_SIZE * BATCH_CONNECTIONS,
+                                    thread_name_prefix="demo-data-batch")
+
+# Per-query cost budgets for `query` (see query_guard.py); wall time is
+# QUERY_TIMEOUT_SECONDS
+QUERY_BUDGET = QueryBudget(
+    max_rows=1_000_000,
+    max_result_bytes=256 * 1024 * 1024,
+    max_vm_steps=2_000_000_000,
+    max_scan_product=50_000_000,
+    large_scan_rows=1_000_000,
+)
+
+# (time_limit, cancel event) for the tool call running on this worker
+_call_limits = contextvars.ContextVar("call_limits", default=(None, None))
+
+# LRU cache of query output, keyed on normalized SQL + database file version
+RESULT_CACHE_ENTRIES = 128
+RESULT_CACHE_BYTES = 16 * 1024 * 1024
+result_cache = ResultCache(max_entries=RESULT_CACHE_ENTRIES, max_bytes=RESULT_CACHE_BYTES)
+
+# compare_periods and decompose_change windows (per-date aggregates of every
+# metric), keyed on table, dimension, dates and database file version
+WINDOW_CACHE_ENTRIES = 64
+WINDOW_CACHE_BYTES = 32 * 1024 * 1024
+window_cache = ResultCache(max_entries=WINDOW_CACHE_ENTRIES, max_bytes=WINDOW_CACHE_BYTES)
+COMPARE_GROUPS_SHOWN = 10   # Dimension values listed by compare_periods, most changed first
+
+# detect_anomalies keeps each table's series and detector state between
+# calls and scores only days appended since (see anomalies.py)
+anomaly_scanner = AnomalyScanner()
+MAX_ANOMALIES_SHOWN = 100
+
+# Call counts and timings per query fingerprint (SQL with literals replaced)
+statement_stats = StatementStats()
+STATEMENT_STATS_SHOWN = 5   # Statements listed by server_stats
+
+# Results longer than DISPLAY_ROW_LIMIT are spilled for fetch_page
+RESULT_TTL_SECONDS = 30 * 60        # Kept this long after their last page
+MAX_SPILLED_RESULTS = 200
+PAGE_LIMIT_MAX = 500                # Largest page fetch_page serves
+result_store = ResultStore(TMP_DIR.parent / "results", ttl=RESULT_TTL_SECONDS,
+                           max_results=MAX_SPILLED_RESULTS)
+
+# Per-call phase timings for server_stats (see instrumentation.py). Set
+# TRACE_LOG to also append every call to a JSON-lines file under tmp/
+TRACE_RING_SIZE = 2000      # Most recent calls kept for percentiles
+TRACE_LOG = False
+TRACE_PERCENTILES = (50, 95, 99)
+TRACE_LOG_PATH = TMP_DIR.parent / "traces" / "calls.jsonl"
+recorder = Recorder(size=TRACE_RING_SIZE, log_path=TRACE_LOG_PATH if TRACE_LOG else None)
+
+# Table/column metadata for list_tables and describe_table, rebuilt when
+# the database file changes
+catalog = SchemaCatalog(backend)
+GAP_RANGE_LIMIT = 5         # Gap ranges listed per column by get_date_coverage
+
+
+@contextmanager
+def get_connection(max_steps=None):
+    """Borrow a pooled read-only connection. Use as `with get_connection() as conn:`."""
+    time_limit, cancelled = _call_limits.get()
+    started = time.perf_counter()
+    with backend.connection(time_limit=time_limit, cancelled=cancelled, max_steps=max_steps) as conn:
+        add_phase("connect", time.perf_counter() - started)
+        yield conn
 
 
-def get_connection():
-    """Get a database connection."""
-    return sqlite3.connect(DB_PATH)
+class SnapshotChanged(Exception):
+    """Raised when the database kept changing while a snapshot was being opened."""
+
+
+@contextmanager
+def snapshot_connections(count, max_steps=None):
+    """
+    Borrow up to `count` pooled connections that all read the same version
+    of the database. Yields (connections, database signature).
+
+    Each connection opens a read transaction; if the database signature
+    changed while they were being opened (a commit or a swapped file), they
+    are released and the snapshot is retried.
+    """
+    time_limit, cancelled = _call_limits.get()
+    for _ in range(SNAPSHOT_ATTEMPTS):
+        with ExitStack() as stack:
+            signature = backend.signature()
+            conns = [stack.enter_context(get_connection(max_steps=max_steps))]
+            started = time.perf_counter()
+            while len(conns) < count:
+                try:
+                    conns.append(stack.enter_context(backend.connection(
+                        time_limit=time_limit, cancelled=cancelled, max_steps=max_steps, timeout=0,
+                    )))
+                except PoolTimeout:
+                    break
+            add_phase("connect", time.perf_counter() - started)
+            with phase("snapshot"):
+                for conn in conns:
+                    backend.begin_snapshot(conn)
+                consistent = backend.signature() == signature
+            if consistent:
+                yield conns, signature
+                return
+    raise SnapshotChanged(f"The database changed during each of {SNAPSHOT_ATTEMPTS} attempts to open a snapshot")
+
+
+def offload(fn):
+    """
+    Turn a blocking tool body into an async handler that runs on the worker
+    pool with QUERY_TIMEOUT_SECONDS. If the call is cancelled, the running
+    statement is interrupted instead of finishing in the background.
+    """
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        cancelled = threading.Event()
+        ctx = contextvars.copy_context()
+        ctx.run(_call_limits.set, (QUERY_TIMEOUT_SECONDS, cancelled))
+        call = functools.partial(ctx.run, fn, *args, **kwargs)
+        try:
+            return await asyncio.get_running_loop().run_in_executor(executor, call)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+    return wrapper
 
 
 @mcp.tool()
-def query(sql: str) -> str:
+@offload
+@recorder.traced
+def query(sql: str, output_format: str = "csv", display_format: str = "csv") -> str:
     """
     Execute a SQL query against the demo database.
 
     Args:
-        sql: The SQL query to execute (SELECT only for safety)
+        sql: The SQL query to execute - one read-only statement (SELECT,
+            WITH, VALUES, EXPLAIN or a schema PRAGMA such as table_info);
+            comments are fine
+        output_format: File format for saved results - 'csv' (default),
+            'parquet' or 'feather'. Parquet/Feather keep column types and
+            load into pandas much faster than CSV.
+        display_format: How the returned rows are shown - 'csv' (default)
+            or 'markdown' for a padded table
 
     Returns:
-        Query results as a formatted table, or error message
-    """
-    # Safety check - only allow SELECT queries
-    sql_upper = sql.strip().upper()
-    if not sql_upper.startswith("SELECT") and not sql_upper.startswith("WITH"):
-        return "Error: Only SELECT queries are allowed for safety."
-
-    try:
-        conn = get_connection()
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        cursor.execute(sql)
-        rows = cursor.fetchall()
-
-        if not rows:
-            return "Query returned no results."
-
-        # Get column names
-        columns = [description[0] for description in cursor.description]
-        conn.close()
-
-        # Format all rows as CSV text
-        def format_rows(row_list):
-            lines = [",".join(columns)]
-            for row in row_list:
-                lines.append(",".join(str(val) if val is not None else "" for val in row))
-            return "\n".join(lines)
-
-        total = len(rows)
-        csv_note = ""
-
-        # Auto-save CSV and SQL to tmp when result set is large enough
-        if total > CSV_SAVE_THRESHOLD:
-            TMP_DIR.mkdir(parents=True, exist_ok=True)
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            csv_path = TMP_DIR / f"query_{timestamp}.csv"
-            with open(csv_path, "w", newline="", encoding="utf-8") as f:
-                writer = csv.writer(f)
-                writer.writerow(columns)
-                for row in rows:
-                    writer.writerow([(val if val is not None else "") for val in row])
-            sql_path = TMP_DIR / f"query_{timestamp}.sql"
-            with open(sql_path, "w", encoding="utf-8") as f:
-                f.write(sql)
-            csv_note = f"\nFull results saved to: {csv_path}\nQuery saved to: {sql_path}"
-
-        # Truncate display if needed
-        if total > DISPLAY_ROW_LIMIT:
-            display = format_rows(rows[:DISPLAY_ROW_LIMIT])
-            return f"{display}\n\nShowing {DISPLAY_ROW_LIMIT} of {total} rows.{csv_note}"
-
-        display = format_rows(rows)
-        if csv_note:
-            return f"{display}{csv_note}"
-        return display
+        Query results as a formatted table, or error message. Queries whose
+        plan nests full scans past the cost budget are rejected; results past
+        the row or size budget are truncated, and queries past the VM step
+        or time budget are aborted.
+    """
+    # Read-only is enforced by SQLite's authorizer when the statement is
+    # prepared; parsing here only splits statements and normalizes
+    parsed = parse(sql)
+    if parsed.statements == 0:
+        return "Error: No SQL statement given."
+    if parsed.statements > 1:
+        return "Error: Only one statement per call is allowed."
+
+    output_format = output_format.strip().lower()
+    if output_format not in OUTPUT_FORMATS:
+        return f"Error: output_format must be one of: {', '.join(OUTPUT_FORMATS)}."
+    display_format = display_format.strip().lower()
+    if display_format not in DISPLAY_FORMATS:
+        return f"Error: display_format must be one of: {', '.join(DISPLAY_FORMATS)}."
 
+    annotate(fingerprint=parsed.fingerprint)
+    try:
+        return execute_cached(sql, parsed, output_format, display_format)
+    except QueryRejected as e:
+        return f"Error: {str(e)}"
+    except (QueryTimeout, StepLimitExceeded) as e:
+        return f"Query aborted: {str(e)}. Add filters or aggregate in SQL to reduce the work."
     except Exception as e:
         return f"Error executing query: {str(e)}"
 
 
+def execute_cached(sql, parsed, output_format, display_format, conn=None, signature=None):
+    """
+    Serve one statement from the result cache or run it under QUERY_BUDGET,
+    recording statement stats either way. Returns the output text; errors
+    are raised. query_batch passes its snapshot connection and the database
+    signature of that snapshot.
+    """
+    started = time.perf_counter()
+    authorizer = ReadOnlyAuthorizer() if backend.read_only_authorizer else None
+    try:
+        # Serve repeats from the cache unless their saved files were cleaned up
+        # or the result id they print has expired from the result store
+        with phase("cache"):
+            cache_key = (parsed.normalized, output_format, display_format, signature or backend.signature())
+            cached = result_cache.get(cache_key)
+        if cached is not None:
+            output, artifacts = cached
+            spilled = artifacts[2:]
+            if all(path.exists() for path in artifacts) and all(result_store.renew(path) for path in spilled):
+                if artifacts:
+                    manifest.record(artifacts[:2])
+                statement_stats.record(parsed, time.perf_counter() - started, cached=True)
+                return output
+            result_cache.discard(cache_key)
+
+        output, artifacts = run_query(sql, output_format, budget=QUERY_BUDGET,
+                                      authorizer=authorizer,
+                                      plan_check=backend.plan_check and parsed.keyword in ("select", "with", "values"),
+                                      display_format=display_format, conn=conn)
+        result_cache.put(cache_key, (output, artifacts), len(output.encode("utf-8")))
+        statement_stats.record(parsed, time.perf_counter() - started, tables_read(authorizer))
+        return output
+    except Exception:
+        statement_stats.record(parsed, time.perf_counter() - started, tables_read(authorizer), error=True)
+        raise
+
+
+def tables_read(authorizer):
+    return authorizer.tables if authorizer is not None else ()
+
+
+def run_query(sql, output_format="csv", budget=None, authorizer=None, plan_check=True,
+              display_format="csv", conn=None):
+    """
+    Execute a query and format it. Returns (output, saved artifact paths).
+    Runs on `conn` when given (one of query_batch's snapshot connections),
+    otherwise on a connection borrowed from the pool.
+
+    With a QueryBudget the plan is pre-checked first (raising QueryRejected)
+    and the run is capped; aborts raise StepLimitExceeded or QueryTimeout.
+    With a ReadOnlyAuthorizer, statements that would write are refused
+    (QueryRejected) and the authorizer records the tables read.
+    """
+    format_note = ""
+    if output_format != "csv" and not columnar_available():
+        format_note = f"\n(pyarrow is not installed - saved as CSV instead of {output_format})"
+        output_format = "csv"
+
+    warnings = []
+    try:
+        max_steps = budget.max_vm_steps if budget and backend.step_budget else None
+        source = nullcontext(conn) if conn is not None else get_connection(max_steps=max_steps)
+        with source as active:
+            if budget is not None:
+                with phase("catalog"):
+                    row_counts = {t["name"]: t["row_count"] for t in catalog.tables(active)}
+            if authorizer is not None:
+                active.set_authorizer(authorizer)
+            try:
+                if budget is not None and plan_check:
+                    with phase("plan"):
+                        warnings = check_plan(active, sql, row_counts, budget)
+                cursor = active.cursor()
+                with phase("execute"):
+                    cursor.execute(sql)
+                columns = [description[0] for description in cursor.description or []]
+                head, total, artifacts, truncated, result_id = stream_rows(
+                    cursor, columns, sql, output_format, budget
+                )
+                cursor.close()
+            except sqlite3.DatabaseError as e:
+                if authorizer is not None and authorizer.denied:
+                    raise QueryRejected(
+                        f"Only read-only queries are allowed (the statement needs {authorizer.denied_action(sql)})."
+                    ) from e
+                raise
+            finally:
+                if authorizer is not None:
+                    active.set_authorizer(None)
+    except ColumnTypeMismatch as e:
+        # SQLite typing is per value, not per column - fall back to text
+        output, artifacts = run_query(sql, "csv", budget, authorizer, plan_check, display_format, conn)
+        return f"{output}\n({e}; saved as CSV instead of {output_format})", artifacts
+
+    annotate(rows=total)
+    with phase("format"):
+        output = format_output(columns, head, total, artifacts, truncated, warnings, format_note, result_id,
+                               display_format)
+    return output, artifacts
+
+
+def format_output(columns, head, total, artifacts, truncated, warnings, format_note="", result_id=None,
+                  display_format="csv"):
+    """Text returned to the agent for a streamed result."""
+    guard_note = ""
+    if truncated:
+        guard_note += f"\n\nTruncated: stopped after {total:,} rows ({truncated}). Saved results hold only these rows."
+    if warnings:
+        guard_note += "\n\nCost warnings:\n" + "\n".join(f"- {w}" for w in warnings)
+
+    if total == 0:
+        return f"Query returned no results.{guard_note}"
+
+    csv_note = ""
+    if artifacts:
+        data_path, sql_path = artifacts[:2]
+        csv_note = f"\nFull results saved to: {data_path}\nQuery saved to: {sql_path}{format_note}"
+
+    # Truncate display if needed
+    display = format_rows(columns, head, display_format)
+    if total > DISPLAY_ROW_LIMIT:
+        page_note = ""
+        if result_id:
+            page_note = (f"\nResult id: {result_id} - fetch_page(result_id='{result_id}', "
+                         f"offset={DISPLAY_ROW_LIMIT}) returns the next rows.")
+        return f"{display}\n\nShowing {DISPLAY_ROW_LIMIT} of {total} rows.{page_note}{csv_note}{guard_note}"
+
+    return f"{display}{csv_note}{guard_note}"
+
+
+def stream_rows(cursor, columns, sql, output_format="csv", budget=None):
+    """
+    Pull rows in fetchmany batches, writing them straight to a file once the
+    result passes CSV_SAVE_THRESHOLD. Only the first DISPLAY_ROW_LIMIT rows
+    are kept in memory; the rest are counted and written, never held.
+    A budget stops fetching at its row or result-size cap. Results longer
+    than DISPLAY_ROW_LIMIT are also spilled to the result store for paging.
+
+    For CSV output each batch is encoded once; the same text is measured
+    for the size budget and written to the file.
+
+    Returns (display rows, total row count, [data_path, sql_path, spill_path]
+    or [], truncation reason or None, result id or None).
+    """
+    head = []
+    pending = []        # Rows seen before we know a file is needed
+    total = 0
+    result_bytes = 0
+    truncated = None
+    writer = None
+    spill = None
+    encoder = CsvEncoder() if output_format == "csv" else None
+    pending_text = ""
+
+    try:
+        while truncated is None:
+            fetch_started = time.perf_counter()
+            batch = cursor.fetchmany(FETCH_BATCH_SIZE)
+            add_phase("fetch", time.perf_counter() - fetch_started)
+            if not batch:
+                break
+
+            if budget is not None and total + len(batch) > budget.max_rows:
+                batch = batch[:budget.max_rows - total]
+                truncated = f"max_rows budget of {budget.max_rows:,}"
+                if not batch:
+                    break
+
+            text = None
+            if encoder is not None:
+                with phase("encode"):
+                    text = encoder.encode(batch)
+
+            if budget is not None:
+                if text is not None:
+                    result_bytes += len(text)
+                else:
+                    # Size of the rows as text, one separator per value
+                    result_bytes += sum(len(str(val)) + 1 for row in batch for val in row)
+                if result_bytes > budget.max_result_bytes:
+                    truncated = f"result size budget of {budget.max_result_bytes:,} bytes"
+
+            with phase("spill"):
+                if spill is not None:
+                    spill.write(batch)
+                elif total + len(batch) > DISPLAY_ROW_LIMIT:
+                    # Until now head has held every row, so it seeds the spill
+                    spill = result_store.spill(columns)
+                    spill.write(head + batch)
+
+            if len(head) < DISPLAY_ROW_LIMIT:
+                head.extend(batch[:DISPLAY_ROW_LIMIT - len(head)])
+            total += len(batch)
+
+            write_started = time.perf_counter()
+            if writer is None:
+                if total <= CSV_SAVE_THRESHOLD:
+                    pending.extend(batch)
+                    pending_text += text or ""
+                    continue
+                # Result is large enough to save - open the file and flush,
+                # unless the same query already saved it for this database
+                TMP_DIR.mkdir(parents=True, exist_ok=True)
+                stem = artifact_stem(parse(sql).normalized, backend.signature())
+                data_path = TMP_DIR / f"{stem}{OUTPUT_FORMATS[output_format]}"
+                if data_path.exists() and data_path.with_suffix(".sql").exists():
+                    writer = ExistingArtifact(data_path)
+                else:
+                    writer = open_writer(output_format, data_path, columns)
+                batch = pending + batch
+                if text is not None:
+                    text = pending_text + text
+                pending = pending_text = None
+
+            if text is not None:
+                writer.write_text(text)
+            else:
+                writer.write(batch)
+            add_phase("write", time.perf_counter() - write_started)
+
+        # Publishing can fail too (disk full, permissions); abort below covers it
+        if writer is not None:
+            sql_path = writer.path.with_suffix(".sql")
+            if not isinstance(writer, ExistingArtifact):
+                with phase("write"):
+                    writer.close()
+                    write_text_atomic(sql_path, sql)
+                annotate(bytes_written=writer.path.stat().st_size + sql_path.stat().st_size)
+        if spill is not None:
+            with phase("spill"):
+                spill.close()
+    except BaseException:
+        if writer is not None:
+            writer.abort()
+        if spill is not None:
+            spill.abort()
+        raise
+
+    if writer is None:
+        return head, total, [], truncated, None
+
+    manifest.record([writer.path, sql_path])
+    if spill is None:
+        return head, total, [writer.path, sql_path], truncated, None
+    return head, total, [writer.path, sql_path, spill.path], truncated, spill.result_id
+
+
+@mcp.tool()
+@offload
+@recorder.traced
+def fetch_page(result_id: str, offset: int = 0, limit: int = DISPLAY_ROW_LIMIT,
+               display_format: str = "csv") -> str:
+    """
+    Fetch more rows of a large query result without re-running it.
+
+    `query` prints a result id when it shows only the first rows. Results
+    are kept for 30 minutes after their last use.
+
+    Args:
+        result_id: The id printed by `query`
+        offset: Rows to skip (0-based; the first page shown by query is offset 0)
+        limit: Rows to return (default 20, max 500)
+        display_format: 'csv' (default) or 'markdown'
+
+    Returns:
+        The requested rows as CSV text (or a markdown table) and the offset
+        of the next page
+    """
+    if offset < 0 or limit < 1:
+        return "Error: offset must be >= 0 and limit >= 1."
+    display_format = display_format.strip().lower()
+    if display_format not in DISPLAY_FORMATS:
+        return f"Error: display_format must be one of: {', '.join(DISPLAY_FORMATS)}."
+    limit = min(limit, PAGE_LIMIT_MAX)
+
+    try:
+        with phase("page"):
+            columns, rows, total = result_store.page(result_id.strip(), offset, limit)
+        annotate(rows=len(rows))
+    except ResultNotFound:
+        return (f"Error: result '{result_id}' not found or expired (results are kept "
+                f"{RESULT_TTL_SECONDS // 60} minutes after last use). Re-run the query.")
+    except Exception as e:
+        return f"Error fetching page: {str(e)}"
+
+    if not rows:
+        return f"No rows at offset {offset:,} - the result has {total:,} rows."
+
+    with phase("format"):
+        result = format_rows(columns, rows, display_format)
+    end = offset + len(rows)
+    result += f"\n\nRows {offset + 1:,}-{end:,} of {total:,}."
+    if end < total:
+        result += f" Next page: fetch_page(result_id='{result_id}', offset={end})"
+    return result
+
+
+@mcp.tool()
+@offload
+@recorder.traced
+def query_batch(queries: dict[str, str], output_format: str = "csv", display_format: str = "csv") -> str:
+    """
+    Run several named SQL queries against one consistent snapshot of the demo database.
+
+    Use this for the related queries of one analysis - current period, prior
+    year, a per-channel split: they all see the same data even if the
+    database changes partway through, and independent queries run in
+    parallel. Each query follows the rules of `query` and gets the same
+    output (rows, saved file paths, result ids for fetch_page).
+
+    Args:
+        queries: Query name -> SQL, e.g. {"current": "SELECT ...",
+            "prior_year": "SELECT ..."}. At most 20, one statement each
+        output_format: File format for saved results - 'csv' (default),
+            'parquet' or 'feather'
+        display_format: How returned rows are shown - 'csv' (default) or
+            'markdown'
+
+    Returns:
+        A "## <name>" section per query, in the order given, holding its
+        results or its error, then a line on how the batch ran. A batch
+        past the time budget is aborted as a whole.
+    """
+    if not queries:
+        return "Error: No queries given."
+    if len(queries) > MAX_BATCH_STATEMENTS:
+        return f"Error: At most {MAX_BATCH_STATEMENTS} queries per batch (got {len(queries)})."
+
+    output_format = output_format.strip().lower()
+    if output_format not in OUTPUT_FORMATS:
+        return f"Error: output_format must be one of: {', '.join(OUTPUT_FORMATS)}."
+    display_format = display_format.strip().lower()
+    if display_format not in DISPLAY_FORMATS:
+        return f"Error: display_format must be one of: {', '.join(DISPLAY_FORMATS)}."
+
+    outputs = {}
+    pending = SimpleQueue()
+    for name, sql in queries.items():
+        parsed = parse(sql)
+        if parsed.statements == 1:
+            pending.put((name, sql, parsed))
+        else:
+            outputs[name] = "Error: Each query must be exactly one SQL statement."
+    runnable = len(queries) - len(outputs)
+
+    started = time.perf_counter()
+    connections = 0
+    try:
+        if runnable:
+            max_steps = QUERY_BUDGET.max_vm_steps if backend.step_budget else None
+            with snapshot_connections(min(runnable, BATCH_CONNECTIONS), max_steps) as (conns, signature):
+                connections = len(conns)
+
+                def drain(conn):
+                    """Run queued statements on conn until none are left."""
+                    while True:
+                        try:
+                            name, sql, parsed = pending.get_nowait()
+                        except Empty:
+                            return
+                        outputs[name] = batch_statement(sql, parsed, output_format, display_format, conn, signature)
+
+                # Each worker gets its own copy of the call's context (trace, time limit)
+                futures = [batch_executor.submit(contextvars.copy_context().run, drain, conn) for conn in conns]
+                wait(futures)
+                for future in futures:
+                    future.result()     # Interrupts are raised here, inside the pool's connection blocks
+    except (QueryTimeout, StepLimitExceeded) as e:
+        return f"Query aborted: {str(e)}. Split the batch, or add filters or aggregate in SQL to reduce the work."
+    except SnapshotChanged as e:
+        return f"Error: {str(e)}. Try again."
+    except Exception as e:
+        return f"Error running batch: {str(e)}"
+
+    sections = [f"## {name}\n{outputs[name]}" for name in queries]
+    elapsed = (time.perf_counter() - started) * 1000
+    footer = (f"Batch: {runnable} of {len(queries)} queries ran at one database snapshot "
+              f"on {connections} connection{'s' if connections != 1 else ''} in {elapsed:,.0f} ms.")
+    return "\n\n".join(sections + [footer])
+
+
+def batch_statement(sql, parsed, output_format, display_format, conn, signature):
+    """
+    One query_batch statement on a snapshot connection, as text. Its errors
+    are reported inline; interrupts (time limit, step budget, cancel) are
+    raised to abort the batch.
+    """
+    try:
+        return execute_cached(sql, parsed, output_format, display_format, conn, signature)
+    except QueryRejected as e:
+        return f"Error: {str(e)}"
+    except Exception as e:
+        if backend.is_interrupt(e):
+            raise
+        backend.resume_snapshot(conn)
+        return f"Error executing query: {str(e)}"
+
+
 @mcp.tool()
+@offload
+@recorder.traced
 def list_tables() -> str:
     """
     List all tables in the demo database.
@@ -108,20 +669,16 @@ def list_tables() -> str:
         List of table names with row counts
     """
     try:
-        conn = get_connection()
-        cursor = conn.cursor()
+        with get_connection() as conn, phase("catalog"):
+            tables = catalog.tables(conn)
 
-        # Get all tables
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' ORDER BY name")
-        tables = cursor.fetchall()
+        with phase("format"):
+            result = []
+            for table in tables:
+                approx = "" if table["row_count_exact"] else "~"
+                result.append(f"- {table['name']} ({approx}{table['row_count']:,} rows)")
+        annotate(rows=len(tables))
 
-        result = []
-        for (table_name,) in tables:
-            cursor.execute(f"SELECT COUNT(*) FROM {table_name}")
-            count = cursor.fetchone()[0]
-            result.append(f"- {table_name} ({count:,} rows)")
-
-        conn.close()
         return "Tables in database:\n" + "\n".join(result)
 
     except Exception as e:
@@ -129,6 +686,8 @@ def list_tables() -> str:
 
 
 @mcp.tool()
+@offload
+@recorder.traced
 def describe_table(table_name: str) -> str:
     """
     Show the schema for a specific table.
@@ -137,34 +696,28 @@ def describe_table(table_name: str) -> str:
         table_name: Name of the table to describe
 
     Returns:
-        Column names, types, and sample values
+        Column names, types, min/max and sample values
     """
     try:
-        conn = get_connection()
-        cursor = conn.cursor()
-
-        # Get column info
-        cursor.execute(f"PRAGMA table_info({table_name})")
-        columns = cursor.fetchall()
+        with get_connection() as conn, phase("catalog"):
+            table = catalog.table(conn, table_name)
 
-        if not columns:
+        if table is None or not table["columns"]:
             return f"Table '{table_name}' not found."
 
-        # Get sample row
-        cursor.execute(f"SELECT * FROM {table_name} LIMIT 1")
-        sample = cursor.fetchone()
+        with phase("format"):
+            approx = "" if table["row_count_exact"] else "~"
+            result = [f"Schema for {table['name']} ({approx}{table['row_count']:,} rows):", ""]
+            result.append("| Column | Type | Min | Max | Sample values |")
+            result.append("|--------|------|-----|-----|---------------|")
 
-        result = [f"Schema for {table_name}:", ""]
-        result.append("| Column | Type | Sample |")
-        result.append("|--------|------|--------|")
+            for col in table["columns"]:
+                samples = ", ".join(str(v) for v in col["samples"]) or "NULL"
+                if col["more_values"]:
+                    samples += ", ..."
+                result.append(f"| {col['name']} | {col['type']} | {col['min']} | {col['max']} | {samples} |")
+        annotate(rows=len(table["columns"]))
 
-        for col in columns:
-            col_name = col[1]
-            col_type = col[2]
-            sample_val = sample[col[0]] if sample else "NULL"
-            result.append(f"| {col_name} | {col_type} | {sample_val} |")
-
-        conn.close()
         return "\n".join(result)
 
     except Exception as e:
@@ -172,6 +725,8 @@ def describe_table(table_name: str) -> str:
 
 
 @mcp.tool()
+@offload
+@recorder.traced
 def get_date_range(table_name: str, date_column: str = "date") -> str:
     """
     Get the date range available in a table.
@@ -184,18 +739,796 @@ def get_date_range(table_name: str, date_column: str = "date") -> str:
         Min and max dates in the table
     """
     try:
-        conn = get_connection()
-        cursor = conn.cursor()
-
-        cursor.execute(f"SELECT MIN({date_column}), MAX({date_column}) FROM {table_name}")
-        min_date, max_date = cursor.fetchone()
+        with get_connection() as conn:
+            table = catalog.table(conn, table_name)
+            column = None
+            if table is not None:
+                column = next((c for c in table["columns"] if c["name"].lower() == date_column.lower()), None)
+            if column is not None:
+                min_date, max_date = column["min"], column["max"]
+            else:
+                # Unknown to the catalog - let SQLite report the error
+                cursor = conn.cursor()
+                cursor.execute(f"SELECT MIN({date_column}), MAX({date_column}) FROM {table_name}")
+                min_date, max_date = cursor.fetchone()
 
-        conn.close()
         return f"Date range in {table_name}: {min_date} to {max_date}"
 
     except Exception as e:
         return f"Error getting date range: {str(e)}"
 
 
+@mcp.tool()
+@offload
+@recorder.traced
+def get_date_coverage(tables: str = "") -> str:
+    """
+    Date coverage, gaps and freshness for every date column, in one call.
+
+    Use at the start of an analysis instead of calling get_date_range per table.
+
+    Args:
+        tables: Optional comma-separated table names to limit the report (default: all)
+
+    Returns:
+        Per table and date column: first/last date, cadence (daily, weekdays,
+        weekly, monthly, quarterly), missing dates, days behind the freshest
+        table, and gap ranges
+    """
+    try:
+        with get_connection() as conn:
+            coverage = catalog.coverage(conn)
+
+        if not coverage:
+            return "No date columns found."
+
+        newest = max(row["last"] for row in coverage)
+        wanted = {t.strip().lower() for t in tables.split(",") if t.strip()}
+        if wanted:
+            unknown = wanted - {row["table"].lower() for row in coverage}
+            if unknown:
+                return f"Error: no date columns in table(s): {', '.join(sorted(unknown))}"
+            coverage = [row for row in coverage if row["table"].lower() in wanted]
+
+        newest_day = datetime.strptime(newest, "%Y-%m-%d")
+        age = (datetime.now() - newest_day).days
+        result = [f"Date coverage (newest data: {newest}, {age:,} days ago):", ""]
+        result.append("| Table | Column | First | Last | Dates | Cadence | Missing | Days behind newest |")
+        result.append("|-------|--------|-------|------|-------|---------|---------|--------------------|")
+        for row in coverage:
+            behind = (newest_day - datetime.strptime(row["last"], "%Y-%m-%d")).days
+            result.append(
+                f"| {row['table']} | {row['column']} | {row['first']} | {row['last']} | "
+                f"{row['dates']:,} | {row['cadence']} | {row['missing']:,} | {behind:,} |"
+            )
+
+        gapped = [row for row in coverage if row["gaps"]]
+        if gapped:
+            result.append("")
+            result.append("Gaps:")
+            for row in gapped:
+                shown = [a if a == b else f"{a} to {b}" for a, b in row["gaps"][:GAP_RANGE_LIMIT]]
+                more = len(row["gaps"]) - GAP_RANGE_LIMIT
+                if more > 0:
+                    shown.append(f"... {more:,} more")
+                result.append(f"- {row['table']}.{row['column']}: {', '.join(shown)}")
+
+        return "\n".join(result)
+
+    except Exception as e:
+        return f"Error getting date coverage: {str(e)}"
+
+
+@mcp.tool()
+@offload
+@recorder.traced
+def explain_query(sql: str) -> str:
+    """
+    Show SQLite's query plan and flag full table scans with suggested indexes.
+
+    Use before running a heavy query to check it can use an index.
+
+    Args:
+        sql: The SELECT query to analyze (not executed)
+
+    Returns:
+        The query plan, scan warnings and suggested CREATE INDEX statements
+    """
+    parsed = parse(sql)
+    if parsed.statements != 1 or parsed.keyword not in ("select", "with", "values"):
+        return "Error: Only a single SELECT query can be explained."
+    if not backend.plan_check:
+        return f"Error: explain_query reads SQLite query plans; the server is using the {backend.name} backend."
+
+    authorizer = ReadOnlyAuthorizer()
+    try:
+        with get_connection() as conn:
+            conn.set_authorizer(authorizer)
+            try:
+                plan, findings = advise(conn, sql)
+            finally:
+                conn.set_authorizer(None)
+
+        # Indent plan steps under their parents
+        depth = {0: -1}
+        result = ["Query plan:"]
+        for node_id, parent, detail in plan:
+            depth[node_id] = depth.get(parent, -1) + 1
+            result.append(f"{'  ' * depth[node_id]}- {detail}")
+
+        result.append("")
+        if not findings:
+            result.append("No full table scans.")
+            return "\n".join(result)
+
+        result.append("Full scans:")
+        for finding in findings:
+            name = finding["table"]
+            if finding["alias"]:
+                name += f" (as {finding['alias']})"
+            how = " via index " + finding["via_index"] if finding["via_index"] else ""
+            result.append(f"- {name}: every row is read{how}")
+            if finding["filters"]:
+                cols = ", ".join(f"{c} ({k})" for c, k in finding["filters"].items())
+                result.append(f"  Filtered on: {cols}")
+            else:
+                result.append("  No filter on this table - add a date range or other predicate to avoid the scan.")
+            if finding["suggestion"]:
+                result.append(f"  Suggested index: {finding['suggestion']}")
+        return "\n".join(result)
+
+    except Exception as e:
+        return f"Error explaining query: {str(e)}"
+
+
+@mcp.tool()
+@offload
+@recorder.traced
+def get_rollup(
+    table_name: str,
+    grain: str = "week",
+    start_date: str = "",
+    end_date: str = "",
+    by_dimension: bool = False,
+    compare_yoy: bool = False,
+) -> str:
+    """
+    Get weekly, monthly or quarterly totals for a daily metrics table.
+
+    Answers from pre-aggregated rollup tables instead of scanning the daily
+    rows. Weeks start Monday. YoY pairs each week with the week 364 days
+    earlier so weekdays line up.
+
+    Args:
+        table_name: daily_metrics, channel_metrics or product_metrics
+        grain: 'week', 'month' or 'quarter'
+        start_date: First period start to include, YYYY-MM-DD (optional)
+        end_date: Last period start to include, YYYY-MM-DD (optional)
+        by_dimension: Split by channel_id / product_id instead of summing them
+        compare_yoy: Add prior-year values and % change (grain='week' only)
+
+    Returns:
+        Period totals (with a 'days' column to flag partial periods), or error message
+    """
+    if table_name not in ROLLUP_SOURCES:
+        return f"Error: Rollups are available for: {', '.join(ROLLUP_SOURCES)}."
+    if grain not in GRAINS:
+        return f"Error: grain must be one of: {', '.join(GRAINS)}."
+    if compare_yoy and grain != "week":
+        return "Error: compare_yoy needs grain='week' (364-day alignment only lines up whole weeks)."
+    for value in (start_date, end_date):
+        if value:
+            try:
+                datetime.strptime(value, "%Y-%m-%d")
+            except ValueError:
+                return f"Error: Dates must be YYYY-MM-DD, got '{value}'."
+
+    try:
+        with get_connection() as conn:
+            use_rollups = rollups_available(conn)
+        if not use_rollups and backend.name != "sqlite":
+            # The daily-row fallback is written in SQLite's date functions
+            return ("Error: Rollup tables not found. Build them in sample_data.db with rollups.py, "
+                    "then re-run import_duckdb.py.")
+
+        sql = rollup_sql(
+            table_name, grain, start_date, end_date,
+            by_dimension=by_dimension, compare_yoy=compare_yoy, use_rollups=use_rollups,
+        )
+        output, _ = run_query(sql)
+        if not use_rollups:
+            output += "\n(Rollup tables not built - aggregated from daily rows. Run rollups.py to build them.)"
+        return output
+
+    except Exception as e:
+        return f"Error getting rollup: {str(e)}"
+
+
+@mcp.tool()
+@offload
+@recorder.traced
+def compare_periods(
+    table_name: str,
+    current_start: str,
+    current_end: str,
+    metrics: str = "",
+    dimension: str = "",
+    prior_start: str = "",
+    prior_end: str = "",
+    display_format: str = "csv",
+) -> str:
+    """
+    Compare metrics between two date windows, e.g. this year against last.
+
+    Use instead of hand-written self-joins for YoY and period-over-period
+    questions. By default the prior window is 364 days earlier, so each day
+    is compared with the same weekday a year before. Days are aligned by
+    position in the window: the first current day against the first prior
+    day, and so on.
+
+    Args:
+        table_name: A table with a date column, e.g. daily_metrics,
+            channel_metrics, product_metrics, lead_form_metrics
+        current_start: First day of the current window, YYYY-MM-DD
+        current_end: Last day of the current window, YYYY-MM-DD (inclusive)
+        metrics: Optional comma-separated numeric columns (default: all).
+            Averages, rates, scores and per-row measures such as
+            resolution_hours are averaged, the rest summed; 'rows' counts rows
+        dimension: Optional column to split by, e.g. channel_id
+        prior_start: First day of the prior window (default: 364 days
+            before current_start)
+        prior_end: Last day of the prior window (default: prior_start plus
+            the current window's length)
+        display_format: 'csv' (default) or 'markdown'
+
+    Returns:
+        Totals with delta and % change per metric (and per dimension value,
+        most changed first), days up/down with the largest daily gain and
+        drop, and the paths of the saved aligned daily series and totals
+    """
+    display_format = display_format.strip().lower()
+    if display_format not in DISPLAY_FORMATS:
+        return f"Error: display_format must be one of: {', '.join(DISPLAY_FORMATS)}."
+    try:
+        current, prior = parse_windows(current_start, current_end, prior_start, prior_end)
+    except ValueError as e:
+        return f"Error: {e}"
+
+    try:
+        with get_connection() as conn:
+            table = catalog.table(conn, table_name.strip())
+            if table is None:
+                return f"Error: Table '{table_name}' not found. Use list_tables to see available tables."
+            dated = date_columns(table)
+            if not dated:
+                return f"Error: {table['name']} has no YYYY-MM-DD date column."
+            date_column = "date" if "date" in dated else dated[0]
+
+            names = {c["name"].lower(): c["name"] for c in table["columns"]}
+            dimension = dimension.strip()
+            if dimension:
+                if dimension.lower() not in names:
+                    return f"Error: {table['name']} has no column '{dimension}'."
+                dimension = names[dimension.lower()]
+
+            available = metric_columns(table, dimension) + [ROW_COUNT]
+            by_name = {m.lower(): m for m in available}
+            wanted = [m.strip() for m in metrics.split(",") if m.strip()]
+            unknown = [m for m in wanted if m.lower() not in by_name]
+            if unknown:
+                return (f"Error: Unknown metric(s) {', '.join(unknown)}. "
+                        f"Metrics for {table['name']}: {', '.join(available)}.")
+            chosen = list(dict.fromkeys(by_name[m.lower()] for m in wanted)) or available[:-1]
+
+            # Repeats are answered from the query result cache, like `query`
+            with phase("cache"):
+                cache_key = ("compare_periods", table["name"], tuple(chosen), dimension, current, prior,
+                             display_format, backend.signature())
+                cached = result_cache.get(cache_key)
+            if cached is not None:
+                output, artifacts = cached
+                if all(path.exists() for path in artifacts):
+                    manifest.record(artifacts)
+                    return output
+                result_cache.discard(cache_key)
+
+            windows = [comparison_window(conn, table, date_column, dimension, *window)
+                       for window in (current, prior)]
+
+        with phase("compare"):
+            result = compare(*windows, chosen, date_column, dimension, current[0], prior[0], table["name"])
+        with phase("write"):
+            series_path, totals_path = save_comparison(result, table["name"], chosen, dimension, current, prior)
+
+        annotate(rows=len(result.aligned))
+        with phase("format"):
+            output = format_comparison(result, table["name"], chosen, dimension, date_column, current, prior,
+                                       windows, series_path, totals_path, display_format)
+        result_cache.put(cache_key, (output, [series_path, totals_path]), len(output.encode("utf-8")))
+        return output
+
+    except Exception as e:
+        return f"Error comparing periods: {str(e)}"
+
+
+def parse_windows(current_start, current_end, prior_start, prior_end):
+    """
+    (current, prior) windows as (start, end) dates from compare_periods-style
+    arguments; the prior window defaults to default_prior(). Raises
+    ValueError with the message to show.
+    """
+    if prior_end and not prior_start:
+        raise ValueError("prior_end needs prior_start.")
+    try:
+        current = (date.fromisoformat(current_start.strip()), date.fromisoformat(current_end.strip()))
+        if prior_start:
+            start = date.fromisoformat(prior_start.strip())
+            end = date.fromisoformat(prior_end.strip()) if prior_end else start + (current[1] - current[0])
+            prior = (start, end)
+        else:
+            prior = default_prior(*current)
+    except ValueError:
+        raise ValueError("Dates must be YYYY-MM-DD.") from None
+    if current[1] < current[0] or prior[1] < prior[0]:
+        raise ValueError("Each window must end on or after its start.")
+    return current, prior
+
+
+def comparison_window(conn, table, date_column, dimension, start, end):
+    """
+    Per-date aggregates of every metric of a table in one window, from
+    window_cache when the same window was loaded against this database
+    version. Caching all metrics lets any later metric choice reuse it.
+    """
+    key = (table["name"], date_column, dimension, start, end, backend.signature())
+    with phase("cache"):
+        frame = window_cache.get(key)
+    if frame is None:
+        metrics = metric_columns(table, dimension) + [ROW_COUNT]
+        with phase("execute"):
+            frame = load_window(conn.cursor(), table["name"], date_column, metrics, dimension, start, end)
+        window_cache.put(key, frame, int(frame.memory_usage(deep=True).sum()))
+    return frame
+
+
+def save_comparison(result, table_name, metrics, dimension, current, prior):
+    """Write the aligned daily series and the totals to tmp/csv (reused if already saved). Returns both paths."""
+    request = f"compare_periods {table_name} {','.join(metrics)} {dimension} {current} {prior}"
+    stem = artifact_stem(request, backend.signature(), prefix="compare")
+    series_path = TMP_DIR / f"{stem}.csv"
+    totals_path = TMP_DIR / f"{stem}_totals.csv"
+    if not (series_path.exists() and totals_path.exists()):
+        TMP_DIR.mkdir(parents=True, exist_ok=True)
+        # Nullable integer columns where values are whole, so counts aren't written as 123.0
+        for path, frame in ((series_path, result.aligned), (totals_path, result.totals.reset_index())):
+            write_text_atomic(path, frame.round(4).convert_dtypes().to_csv(index=False))
+        annotate(bytes_written=series_path.stat().st_size + totals_path.stat().st_size)
+    manifest.record([series_path, totals_path])
+    return series_path, totals_path
+
+
+def format_comparison(result, table_name, metrics, dimension, date_column, current, prior, windows,
+                      series_path, totals_path, display_format):
+    """Summary text for compare_periods: the windows, totals, daily changes and saved paths."""
+    lookback = (current[0] - prior[0]).days
+    shift = f"{lookback:,} days earlier"
+    if lookback % 7 == 0:
+        shift += ", same weekdays"
+    by = f" by {dimension}" if dimension else ""
+    lines = [f"{table_name}{by}, days aligned by position in each window:"]
+    for name, (start, end), frame, note in (("Current", current, windows[0], ""),
+                                            ("Prior", prior, windows[1], f"; {shift}")):
+        lines.append(f"- {name}: {start} to {end} ({(end - start).days + 1:,} days, "
+                     f"{frame[date_column].nunique():,} with data{note})")
+    if current[1] - current[0] != prior[1] - prior[0]:
+        lines.append("- The windows differ in length; totals cover each whole window.")
+
+    groups = [ALL_GROUPS]
+    shown = ""
+    if dimension:
+        ranked = ranked_groups(result.totals, metrics[0], COMPARE_GROUPS_SHOWN)
+        groups += ranked
+        values = result.totals.index.get_level_values("group").nunique() - 1
+        if values > len(ranked):
+            shown = (f"\nShowing the {len(ranked)} of {values:,} {dimension} values that changed most "
+                     f"in {metrics[0]}; all are in the saved totals.")
+
+    rows = []
+    for group in groups:
+        for metric in metrics:
+            entry = result.totals.loc[(group, metric)]
+            row = [metric, display_value(entry["current"]), display_value(entry["prior"]),
+                   display_value(entry["delta"]), display_value(entry["pct_change"], 1)]
+            rows.append([group] + row if dimension else row)
+    columns = (["group"] if dimension else []) + ["metric", "current", "prior", "delta", "pct_change"]
+    lines += ["", "Totals:", format_rows(columns, rows, display_format) + shown]
+
+    changes = [[row.metric, row.days_up, row.days_down, display_value(row.largest_gain), row.gain_on,
+                display_value(row.largest_drop), row.drop_on] for row in result.changes.itertuples()]
+    lines += ["", "Daily changes (current minus prior, per aligned day):",
+              format_rows(list(result.changes.columns), changes, display_format)]
+
+    lines += ["", f"Aligned daily series ({len(result.aligned):,} rows) saved to: {series_path}",
+              f"Totals saved to: {totals_path}"]
+    return "\n".join(lines)
+
+
+@mcp.tool()
+@offload
+@recorder.traced
+def decompose_change(
+    table_name: str,
+    current_start: str,
+    current_end: str,
+    metric: str = "",
+    volume: str = "",
+    dimension: str = "",
+    prior_start: str = "",
+    prior_end: str = "",
+    display_format: str = "csv",
+) -> str:
+    """
+    Split a metric's change between two date windows into volume, mix and
+    rate effects per dimension value.
+
+    Use for "why did revenue / conversions change" instead of per-channel
+    queries and share arithmetic: how much came from total volume, from
+    volume moving between channels, products or campaigns, and from each
+    one's rate. Windows work as in compare_periods (prior defaults to 364
+    days earlier), and reuse its cached per-date aggregates.
+
+    Args:
+        table_name: channel_metrics, product_metrics, lead_form_metrics or
+            support_tickets (other tables need metric, volume and dimension)
+        current_start: First day of the current window, YYYY-MM-DD
+        current_end: Last day of the current window, YYYY-MM-DD (inclusive)
+        metric: Summed column to explain (default: revenue; form_completions
+            for lead_form_metrics, escalated for support_tickets)
+        volume: Summed column the metric is a rate of (default: sessions,
+            units_sold, lp_visits, rows); 'rows' counts rows
+        dimension: Column to split by (default: channel_id, product_id,
+            campaign_id, category)
+        prior_start: First day of the prior window (default: 364 days
+            before current_start)
+        prior_end: Last day of the prior window (default: prior_start plus
+            the current window's length)
+        display_format: 'csv' (default) or 'markdown'
+
+    Returns:
+        Metric, volume and rate in both windows, the change split into
+        volume, mix and rate effects overall and per dimension value (most
+        changed first), and the path of the saved per-value breakdown
+    """
+    display_format = display_format.strip().lower()
+    if display_format not in DISPLAY_FORMATS:
+        return f"Error: display_format must be one of: {', '.join(DISPLAY_FORMATS)}."
+    try:
+        current, prior = parse_windows(current_start, current_end, prior_start, prior_end)
+    except ValueError as e:
+        return f"Error: {e}"
+
+    try:
+        with get_connection() as conn:
+            table = catalog.table(conn, table_name.strip())
+            if table is None:
+                return f"Error: Table '{table_name}' not found. Use list_tables to see available tables."
+            dated = date_columns(table)
+            if not dated:
+                return f"Error: {table['name']} has no YYYY-MM-DD date column."
+            date_column = "date" if "date" in dated else dated[0]
+
+            defaults = DECOMPOSITION_SOURCES.get(table["name"], ("", "", ""))
+            names = {c["name"].lower(): c["name"] for c in table["columns"]}
+            dimension = dimension.strip() or defaults[0]
+            if not dimension:
+                return f"Error: {table['name']} has no default dimension; pass one, e.g. a category column."
+            if dimension.lower() not in names:
+                return f"Error: {table['name']} has no column '{dimension}'."
+            dimension = names[dimension.lower()]
+
+            available = [m for m in metric_columns(table, dimension) + [ROW_COUNT]
+                         if not is_averaged(m, table["name"])]
+            by_name = {m.lower(): m for m in available}
+            chosen = []
+            for role, name, default in (("metric", metric, defaults[1]), ("volume", volume, defaults[2])):
+                name = name.strip() or default
+                if not name:
+                    return f"Error: {table['name']} has no default {role}; pass one."
+                if name.lower() not in by_name:
+                    return (f"Error: '{name}' can't be the {role}. Summed columns of {table['name']}: "
+                            f"{', '.join(available)}. For averages, rates and per-row measures, decompose "
+                            f"their numerator over their denominator.")
+                chosen.append(by_name[name.lower()])
+            metric, volume = chosen
+            if metric == volume:
+                return "Error: metric and volume must differ."
+
+            with phase("cache"):
+                cache_key = ("decompose_change", table["name"], metric, volume, dimension, current, prior,
+                             display_format, backend.signature())
+                cached = result_cache.get(cache_key)
+            if cached is not None:
+                output, artifacts = cached
+                if all(path.exists() for path in artifacts):
+                    manifest.record(artifacts)
+                    return output
+                result_cache.discard(cache_key)
+
+            windows = [comparison_window(conn, table, date_column, dimension, *window)
+                       for window in (current, prior)]
+
+        with phase("compare"):
+            try:
+                result = decompose(*windows, dimension, metric, volume)
+            except ValueError as e:
+                return f"Error: {e}"
+        with phase("write"):
+            path = save_decomposition(result, table["name"], metric, volume, dimension, current, prior)
+
+        annotate(rows=len(result.segments))
+        with phase("format"):
+            output = format_decomposition(result, table["name"], metric, volume, dimension, current, prior,
+                                          path, display_format)
+        result_cache.put(cache_key, (output, [path]), len(output.encode("utf-8")))
+        return output
+
+    except Exception as e:
+        return f"Error decomposing change: {str(e)}"
+
+
+def save_decomposition(result, table_name, metric, volume, dimension, current, prior):
+    """Write the per-value breakdown to tmp/csv (reused if already saved). Returns the path."""
+    request = f"decompose_change {table_name} {metric} {volume} {dimension} {current} {prior}"
+    path = TMP_DIR / f"{artifact_stem(request, backend.signature(), prefix='decompose')}.csv"
+    if not path.exists():
+        TMP_DIR.mkdir(parents=True, exist_ok=True)
+        write_text_atomic(path, result.segments.round(4).convert_dtypes().to_csv(index=False))
+        annotate(bytes_written=path.stat().st_size)
+    manifest.record([path])
+    return path
+
+
+def format_decomposition(result, table_name, metric, volume, dimension, current, prior, path, display_format):
+    """Summary text for decompose_change: the windows, totals, overall effects and per-value effects."""
+    lines = [f"{table_name}: {metric} = {volume} x ({metric} per {volume}), by {dimension}:"]
+    for name, (start, end) in (("Current", current), ("Prior", prior)):
+        lines.append(f"- {name}: {start} to {end} ({(end - start).days + 1:,} days)")
+
+    rows = [[measure] + [display_value(row[c]) for c in ("prior", "current", "change")]
+            + [display_value(row["pct_change"], 1)] for measure, row in result.totals.iterrows()]
+    lines += ["", "Totals:", format_rows(["measure", "prior", "current", "change", "pct_change"], rows,
+                                         display_format)]
+
+    change = result.totals.loc[metric, "change"]
+    parts = []
+    for effect in EFFECTS:
+        value = result.effects[effect]
+        share = f" ({round(100 * value / change) + 0:+d}% of the change)" if change else ""
+        parts.append(f"{effect.removesuffix('_effect')} {display_value(value)}{share}")
+    lines += ["", f"Change in {metric}: {display_value(change)} = " + " + ".join(parts)]
+
+    segments = result.segments.head(COMPARE_GROUPS_SHOWN)
+    columns = [dimension, "metric_prior", "metric_current", "change"] + EFFECTS + [
+        "share_prior", "share_current", "rate_prior", "rate_current"]
+    rows = [[row[dimension]] + [display_value(row[c]) for c in columns[1:]] for _, row in segments.iterrows()]
+    shown = ""
+    if len(result.segments) > len(segments):
+        shown = (f"\nShowing the {len(segments)} of {len(result.segments):,} {dimension} values that changed "
+                 f"most; all are in the saved breakdown.")
+    lines += ["", f"By {dimension} (share = of {volume}, rate = {metric} per {volume}):",
+              format_rows(columns, rows, display_format) + shown]
+    lines += ["", f"Breakdown saved to: {path}"]
+    return "\n".join(lines)
+
+
+@mcp.tool()
+@offload
+@recorder.traced
+def detect_anomalies(
+    tables: str = "",
+    days: int = 90,
+    limit: int = 15,
+    full_rescan: bool = False,
+    display_format: str = "csv",
+) -> str:
+    """
+    Scan the daily tables for unusual days, recurring calendar effects,
+    level shifts and trend changes, ranked by strength.
+
+    Every numeric column is checked for the whole table and for each
+    channel, product, campaign and ticket category, against the same
+    weekday in recent weeks and the same time last year. Use it to find
+    what changed before deciding what to query.
+
+    Args:
+        tables: Optional comma-separated tables (default: daily_metrics,
+            channel_metrics, product_metrics, lead_form_metrics, support_tickets)
+        days: Only list findings in the last N days of data; 0 for all
+            history. Recurring day-of-month effects are always listed
+        limit: Max findings listed (default 15, max 100); all are saved
+        full_rescan: Rescore all history instead of only days added since
+            the last scan, e.g. after past rows were corrected in place
+        display_format: 'csv' (default) or 'markdown'
+
+    Returns:
+        Ranked findings (table, slice, metric, kind, dates, change vs
+        baseline, score in noise levels) and the path of the saved CSV
+        with every finding
+    """
+    display_format = display_format.strip().lower()
+    if display_format not in DISPLAY_FORMATS:
+        return f"Error: display_format must be one of: {', '.join(DISPLAY_FORMATS)}."
+    if days < 0 or not 1 <= limit <= MAX_ANOMALIES_SHOWN:
+        return f"Error: days must be >= 0 and limit between 1 and {MAX_ANOMALIES_SHOWN}."
+    chosen = [t.strip() for t in tables.split(",") if t.strip()] or list(ANOMALY_SOURCES)
+    unknown = [t for t in chosen if t not in ANOMALY_SOURCES]
+    if unknown:
+        return (f"Error: Unknown table(s) {', '.join(unknown)}. "
+                f"detect_anomalies scans: {', '.join(ANOMALY_SOURCES)}.")
+
+    try:
+        with get_connection() as conn:
+            entries = {name: catalog.table(conn, name) for name in chosen}
+            missing = [name for name, entry in entries.items() if entry is None]
+            if missing:
+                return f"Error: Table(s) {', '.join(missing)} not found. Use list_tables to see available tables."
+            signature = backend.signature()
+            with phase("execute"):
+                scanned = anomaly_scanner.scan(conn.cursor(), entries, signature[0], full=full_rescan)
+
+        with phase("compare"):
+            found = anomaly_scanner.findings(chosen)
+        coverage = anomaly_scanner.coverage(chosen)
+        skipped = [f"- {name}: skipped ({reason})" for name, (how, reason) in scanned.items() if how == "skipped"]
+        if not coverage:
+            return "\n".join(["No table had data to scan:"] + skipped)
+        latest = max(last for _, _, _, last in coverage)
+        listed = found
+        if days:
+            since = (latest - timedelta(days=days - 1)).isoformat()
+            listed = found[(found["end"] == "") | (found["end"] >= since)]
+
+        with phase("write"):
+            path = save_anomalies(found, chosen, signature)
+        annotate(rows=len(found))
+
+        with phase("format"):
+            lines = ["Scanned:"]
+            for name, series, first, last in coverage:
+                how, scored = scanned[name]
+                note = {"full": "all days scored", "tail": f"{scored:,} new days scored",
+                        "current": "no new days"}[how]
+                lines.append(f"- {name}: {series:,} series, {first} to {last} ({note})")
+            lines += skipped
+            window = f"in the last {days:,} days to {latest}" if days else "over all history"
+            lines += ["", f"{len(listed):,} findings {window}, strongest first:"]
+            rows = [[rank, row.table, row.slice, row.metric, row.kind, row.start, row.end, row.change,
+                     round(row.score, 1)] for rank, row in enumerate(listed.head(limit).itertuples(), 1)]
+            lines.append(format_rows(["rank"] + list(found.columns), rows, display_format) if rows else "(none)")
+            lines += [
+                "",
+                "change: vs the usual level (percent, or absolute for averages, rates and series that go "
+                "negative). score: how many noise levels the change is.",
+                f"All {len(found):,} findings saved to: {path}",
+            ]
+        return "\n".join(lines)
+
+    except Exception as e:
+        return f"Error detecting anomalies: {str(e)}"
+
+
+def save_anomalies(found, tables, signature):
+    """Write every finding to tmp/csv and record it in the manifest. Returns the path."""
+    stem = artifact_stem(f"detect_anomalies {','.join(tables)}", signature, prefix="anomalies")
+    path = TMP_DIR / f"{stem}.csv"
+    TMP_DIR.mkdir(parents=True, exist_ok=True)
+    write_text_atomic(path, found.round({"score": 2}).to_csv(index=False))
+    annotate(bytes_written=path.stat().st_size)
+    manifest.record([path])
+    return path
+
+
+@mcp.tool()
+def server_stats() -> str:
+    """
+    Show runtime statistics for the demo-data server.
+
+    Returns:
+        Per-tool latency percentiles by phase, slowest recent queries,
+        connection pool usage, query result cache hit rates and schema
+        catalog builds
+    """
+    result = []
+    summary = recorder.summary(TRACE_PERCENTILES)
+    if summary:
+        pcts = "/".join(f"p{p}" for p in TRACE_PERCENTILES)
+        result.append(f"Tool calls (last {TRACE_RING_SIZE:,}, {pcts} in ms):")
+        for tool, entry in summary.items():
+            totals = " / ".join(f"{v:,.1f}" for v in entry["total_ms"].values())
+            result.append(
+                f"- {tool}: {entry['calls']:,} calls, {entry['errors']:,} errors, total {totals}, "
+                f"{entry['rows']:,} rows, {entry['bytes_written'] / 1024:,.0f} KB written"
+            )
+            for name, values in entry["phases_ms"].items():
+                result.append(f"  {name}: {' / '.join(f'{v:,.1f}' for v in values.values())}")
+
+        slowest = recorder.slowest(STATEMENT_STATS_SHOWN, tool="query")
+        if slowest:
+            result.append("")
+            result.append("Slowest recent queries:")
+            for trace in slowest:
+                phases = ", ".join(f"{name} {s * 1000:,.1f}" for name, s in trace.phases.items())
+                result.append(
+                    f"- {trace.total * 1000:,.1f} ms {trace.fingerprint or ''} at {trace.started_at}, "
+                    f"{trace.rows or 0:,} rows ({phases})"
+                )
+        if recorder.log_path:
+            result.append(f"\nCall log: {recorder.log_path}")
+        result.append("")
+
+    stats = backend.stats()
+    result.append(f"Connection pool ({backend.name}):")
+    result.append(f"- size: {stats['max_size']} max, {stats['idle']} idle")
+    result.append(f"- checkouts: {stats['checkouts']:,} ({stats['hit_rate']:.1%} reused)")
+    result.append(f"- hits: {stats['hits']:,}, misses: {stats['misses']:,}")
+    result.append(f"- waits for a free connection: {stats['waits']:,}")
+    result.append(f"- recycled after database change: {stats['recycled']:,}")
+
+    stats = result_cache.stats()
+    result.append("")
+    result.append("Query result cache:")
+    result.append(f"- entries: {stats['entries']:,} of {stats['max_entries']:,}")
+    result.append(f"- memory: {stats['bytes'] / 1024:,.1f} KB of {stats['max_bytes'] / 1024:,.0f} KB")
+    result.append(f"- hits: {stats['hits']:,}, misses: {stats['misses']:,} ({stats['hit_rate']:.1%} hit rate)")
+    result.append(f"- evictions: {stats['evictions']:,}")
+
+    stats = window_cache.stats()
+    result.append("")
+    result.append("compare_periods / decompose_change window cache:")
+    result.append(f"- entries: {stats['entries']:,} of {stats['max_entries']:,}, "
+                  f"memory: {stats['bytes'] / 1024:,.1f} KB of {stats['max_bytes'] / 1024:,.0f} KB")
+    result.append(f"- hits: {stats['hits']:,}, misses: {stats['misses']:,} ({stats['hit_rate']:.1%} hit rate)")
+
+    stats = anomaly_scanner.stats()
+    result.append("")
+    result.append("detect_anomalies state:")
+    result.append(f"- tables: {stats['tables']:,}, series: {stats['series']:,}")
+    result.append(f"- full scans: {stats['full_scans']:,}, tail scans: {stats['tail_scans']:,}, "
+                  f"days scored: {stats['days_scored']:,}")
+
+    top = statement_stats.top(STATEMENT_STATS_SHOWN)
+    if top:
+        result.append("")
+        result.append(f"Top statements by total time ({len(statement_stats):,} distinct):")
+        for entry in top:
+            avg_ms = entry["total_seconds"] * 1000 / entry["calls"]
+            shape = entry["shape"] if len(entry["shape"]) <= 100 else entry["shape"][:97] + "..."
+            result.append(
+                f"- {entry['fingerprint']}: {entry['calls']:,} calls ({entry['cache_hits']:,} cached, "
+                f"{entry['errors']:,} failed), avg {avg_ms:,.1f} ms, max {entry['max_seconds'] * 1000:,.1f} ms"
+            )
+            if entry["tables"]:
+                result.append(f"  tables: {', '.join(entry['tables'])}")
+            result.append(f"  {shape}")
+
+    stats = result_store.stats()
+    result.append("")
+    result.append("Paged results (fetch_page):")
+    result.append(f"- live: {stats['results']:,} ({stats['rows']:,} rows), pages served: {stats['pages']:,}")
+    result.append(f"- expired: {stats['expired']:,}, evicted over {MAX_SPILLED_RESULTS}: {stats['evicted']:,}")
+
+    stats = catalog.stats()
+    result.append("")
+    result.append("Schema catalog:")
+    result.append(f"- tables: {stats['tables']:,}, lookups: {stats['lookups']:,}")
+    result.append(f"- builds: {stats['builds']:,}")
+    if stats["last_build_seconds"] is not None:
+        result.append(f"- last build: {stats['last_build_seconds'] * 1000:,.1f} ms")
+    return "\n".join(result)
+
+
 if __name__ == "__main__":
+    # Build the schema catalog up front so the first list_tables is instant
+    with backend.connection() as conn:
+        catalog.tables(conn)
     mcp.run()
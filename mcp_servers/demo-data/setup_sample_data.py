@@ -8,14 +8,20 @@ Creates a SQLite database with realistic LearnFlow metrics:
 - Support tickets with categories and sentiment
 - B2B lead form metrics by campaign
 
-Run this script to regenerate sample_data.db.
+Run this script to regenerate sample_data.db. For load testing, build a
+larger database with the NumPy engine, e.g.:
+    python setup_sample_data.py --engine numpy --years 20 --ticket-multiplier 10 --output big.db
 """
 
+import argparse
 import sqlite3
 import random
+import time
 from datetime import datetime, timedelta
 from pathlib import Path
 
+from rollups import build_rollups
+
 DB_PATH = Path(__file__).parent / "sample_data.db"
 
 # Date range: 2 years of data ending Jan 26, 2026 (Week 1 of demo)
@@ -76,6 +82,76 @@ TICKET_CHANNELS = [
     ("partner_escalation", 0.08),
 ]
 
+# Cancellation tickets skew toward public channels
+CANCELLATION_TICKET_CHANNELS = [
+    ("email", 0.25),
+    ("chat", 0.15),
+    ("app_review", 0.30),
+    ("social", 0.20),
+    ("partner_escalation", 0.10),
+]
+
+PRODUCT_SHARES = {
+    "core_curriculum": 0.45,
+    "professional_cert": 0.25,
+    "pathway_bundle": 0.20,
+    "enterprise": 0.10,
+}
+
+CAMPAIGNS = [
+    {
+        "id": "digital-badges",
+        "name": "Digital Badges for Graduates",
+        "launch": datetime(2024, 3, 1),
+        "base_visits": 120,
+        "conv_rate": (0.09, 0.12),  # 9-12%
+    },
+    {
+        "id": "bootcamp-completion",
+        "name": "Bootcamp Completion Certificates",
+        "launch": datetime(2024, 6, 1),
+        "base_visits": 90,
+        "conv_rate": (0.07, 0.10),  # 7-10%
+    },
+    {
+        "id": "ai-skills-verify",
+        "name": "AI-Powered Skills Verification",
+        "launch": datetime(2025, 10, 1),
+        "base_visits": 200,
+        "conv_rate": (0.02, 0.035),
+    },
+    {
+        "id": "higher-ed-micro",
+        "name": "Micro-Credentials for Higher Ed",
+        "launch": datetime(2025, 12, 1),
+        "base_visits": 150,
+        "conv_rate": (0.015, 0.03),
+    },
+]
+
+# Planted events the analyze demo is built around
+GROWTH_DECEL_START = datetime(2025, 9, 1)       # Growth slows from 15% to 8%
+CANCEL_PROBLEM_START = datetime(2025, 7, 15)    # Cancellation tickets ramp up
+PARTNER_ESCALATION_START = datetime(2026, 1, 10)
+BILLING_DAYS = [1, 2, 15, 16]
+
+DOW_FACTORS = [1.0, 1.05, 1.08, 1.06, 0.95, 0.75, 0.70]  # Mon-Sun
+
+SEASONALITY_FACTORS = {
+    1: 1.25,   # New year resolution bump
+    2: 1.10,
+    3: 1.05,
+    4: 1.00,
+    5: 0.95,
+    6: 0.85,   # Summer slowdown
+    7: 0.80,
+    8: 0.85,
+    9: 1.15,   # Back to school
+    10: 1.10,
+    11: 1.00,
+    12: 0.90,  # Holiday slowdown
+}
+
 
 def create_tables(conn):
     """Create the database schema."""
@@ -166,41 +242,85 @@ def create_tables(conn):
     conn.commit()
 
 
+# Secondary indexes, chosen from the queries the analyze skill runs most:
+# ticket investigations filter on created_date + category/channel, and the
+# dimension tables are sliced by channel/product/campaign over a date range.
+# The first ticket index covers category trend queries without a table lookup.
+INDEXES = [
+    ("idx_support_tickets_category_date", "support_tickets", "category, created_date, subcategory, channel"),
+    ("idx_support_tickets_channel_date", "support_tickets", "channel, created_date"),
+    ("idx_support_tickets_created_date", "support_tickets", "created_date"),
+    ("idx_channel_metrics_channel_date", "channel_metrics", "channel_id, date"),
+    ("idx_product_metrics_product_date", "product_metrics", "product_id, date"),
+    ("idx_lead_form_metrics_campaign_date", "lead_form_metrics", "campaign_id, date"),
+]
+
+
+def create_indexes(conn):
+    """Create secondary indexes and refresh planner statistics."""
+    cursor = conn.cursor()
+    for name, table, columns in INDEXES:
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table}({columns})")
+    cursor.execute("ANALYZE")
+    conn.commit()
+
+
+# Build-time settings for a file built from nothing: no rollback journal and
+# no fsyncs. A crash mid-build leaves a corrupt file, which is fine because
+# nothing in it existed before the build.
+SCRATCH_BUILD_PRAGMAS = [
+    "PRAGMA journal_mode = OFF",
+    "PRAGMA synchronous = OFF",
+]
+
+# Build-time settings that are safe on any database
+BULK_LOAD_PRAGMAS = [
+    "PRAGMA cache_size = -262144",     # 256 MB
+    "PRAGMA temp_store = MEMORY",
+]
+
+
+def bulk_load(conn, scratch=True):
+    """
+    Switch a connection to bulk-load settings for the duration of a build.
+    In-place rebuilds of an existing database (scratch=False) keep its
+    journal, so a failed table rolls back instead of corrupting the file.
+    """
+    for pragma in (SCRATCH_BUILD_PRAGMAS if scratch else []) + BULK_LOAD_PRAGMAS:
+        conn.execute(pragma)
+
+
+def finalize_for_serving(conn):
+    """Compact the built database and switch it to WAL so readers never block on a writer."""
+    conn.commit()
+    conn.execute("VACUUM")
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = NORMAL")
+
+
+def load_rate(conn, table, elapsed):
+    """One-line load report for a table: row count, time and rows/sec."""
+    rows = conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+    return f"{rows:,} rows in {elapsed:.1f}s ({rows / max(elapsed, 1e-9):,.0f} rows/s)"
+
+
 def day_of_week_factor(date):
     """Traffic varies by day of week."""
-    dow = date.weekday()
-    factors = [1.0, 1.05, 1.08, 1.06, 0.95, 0.75, 0.70]  # Mon-Sun
-    return factors[dow]
+    return DOW_FACTORS[date.weekday()]
 
 
 def seasonality_factor(date):
     """Seasonal patterns - higher in Jan, Sep; lower in summer."""
-    month = date.month
-    factors = {
-        1: 1.25,   # New year resolution bump
-        2: 1.10,
-        3: 1.05,
-        4: 1.00,
-        5: 0.95,
-        6: 0.85,   # Summer slowdown
-        7: 0.80,
-        8: 0.85,
-        9: 1.15,   # Back to school
-        10: 1.10,
-        11: 1.00,
-        12: 0.90,  # Holiday slowdown
-    }
-    return factors[month]
+    return SEASONALITY_FACTORS[date.month]
 
 
 def growth_factor(date, start_date):
     """Year-over-year growth trend with seasonal variation."""
     days_elapsed = (date - start_date).days
-    decel_start = datetime(2025, 9, 1)
-    if date < decel_start:
+    if date < GROWTH_DECEL_START:
         annual_growth = 0.15
     else:
-        days_into_decel = (date - decel_start).days
+        days_into_decel = (date - GROWTH_DECEL_START).days
         progress = min(days_into_decel / 150, 1.0)
         annual_growth = 0.15 - (0.07 * progress)
     daily_growth = (1 + annual_growth) ** (1/365)
@@ -210,6 +330,12 @@ def growth_factor(date, start_date):
 def generate_daily_metrics(conn):
     """Generate daily aggregate metrics."""
     cursor = conn.cursor()
+    cursor.executemany("INSERT INTO daily_metrics VALUES (?, ?, ?, ?, ?, ?, ?, ?)", daily_metrics_rows())
+    conn.commit()
+
+
+def daily_metrics_rows():
+    """Yield daily_metrics rows in date order."""
     current = START_DATE
 
     base_sessions = 8000
@@ -239,9 +365,7 @@ def generate_daily_metrics(conn):
         aov = random.gauss(85, 15)
         revenue = conversions * aov
 
-        cursor.execute("""
-            INSERT INTO daily_metrics VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
+        yield (
             current.strftime("%Y-%m-%d"),
             sessions,
             new_users,
@@ -250,12 +374,10 @@ def generate_daily_metrics(conn):
             conversions,
             round(revenue, 2),
             round(aov, 2)
-        ))
+        )
 
         current += timedelta(days=1)
 
-    conn.commit()
-
 
 def generate_channel_metrics(conn):
     """Generate channel-level breakdown."""
@@ -265,6 +387,12 @@ def generate_channel_metrics(conn):
     cursor.execute("SELECT date, sessions, signups, conversions, revenue FROM daily_metrics")
     daily_data = cursor.fetchall()
 
+    cursor.executemany("INSERT INTO channel_metrics VALUES (?, ?, ?, ?, ?, ?, ?)", channel_metrics_rows(daily_data))
+    conn.commit()
+
+
+def channel_metrics_rows(daily_data):
+    """Yield channel_metrics rows splitting each day's totals across channels."""
     for date, sessions, signups, conversions, revenue in daily_data:
         remaining_sessions = sessions
         remaining_signups = signups
@@ -292,9 +420,7 @@ def generate_channel_metrics(conn):
                 remaining_conversions -= ch_conversions
                 remaining_revenue -= ch_revenue
 
-            cursor.execute("""
-                INSERT INTO channel_metrics VALUES (?, ?, ?, ?, ?, ?, ?)
-            """, (
+            yield (
                 date,
                 channel_id,
                 channel_name,
@@ -302,9 +428,7 @@ def generate_channel_metrics(conn):
                 ch_signups,
                 ch_conversions,
                 round(ch_revenue, 2)
-            ))
-
-    conn.commit()
+            )
 
 
 def generate_product_metrics(conn):
@@ -315,17 +439,16 @@ def generate_product_metrics(conn):
     cursor.execute("SELECT date, conversions, revenue FROM daily_metrics")
     daily_data = cursor.fetchall()
 
+    cursor.executemany("INSERT INTO product_metrics VALUES (?, ?, ?, ?, ?, ?, ?)", product_metrics_rows(daily_data))
+    conn.commit()
+
+
+def product_metrics_rows(daily_data):
+    """Yield product_metrics rows splitting each day's conversions and revenue across products."""
     # Product mix
     for date_str, total_conversions, total_revenue in daily_data:
         date = datetime.strptime(date_str, "%Y-%m-%d")
 
-        shares = {
-            "core_curriculum": 0.45,
-            "professional_cert": 0.25,
-            "pathway_bundle": 0.20,
-            "enterprise": 0.10,
-        }
-
         remaining_units = total_conversions
         remaining_revenue = total_revenue
 
@@ -336,7 +459,7 @@ def generate_product_metrics(conn):
                 units = remaining_units
                 revenue = remaining_revenue
             else:
-                share = shares[product_id] * random.uniform(0.9, 1.1)
+                share = PRODUCT_SHARES[product_id] * random.uniform(0.9, 1.1)
                 units = int(total_conversions * share)
                 price_paid = base_price * random.uniform(0.85, 1.0)
                 revenue = units * price_paid
@@ -349,9 +472,7 @@ def generate_product_metrics(conn):
             refunds = int(units * refund_rate)
             refund_amount = refunds * base_price * 0.9
 
-            cursor.execute("""
-                INSERT INTO product_metrics VALUES (?, ?, ?, ?, ?, ?, ?)
-            """, (
+            yield (
                 date_str,
                 product_id,
                 product_name,
@@ -359,15 +480,18 @@ def generate_product_metrics(conn):
                 round(revenue, 2),
                 refunds,
                 round(refund_amount, 2)
-            ))
-
-    conn.commit()
+            )
 
 
 def generate_support_tickets(conn):
     """Generate support tickets with category and channel distributions."""
     cursor = conn.cursor()
+    cursor.executemany("INSERT INTO support_tickets VALUES (?, ?, ?, ?, ?, ?, ?, ?)", support_ticket_rows())
+    conn.commit()
+
 
+def support_ticket_rows():
+    """Yield support_tickets rows, day by day."""
     ticket_id = 1
     current = START_DATE
 
@@ -382,15 +506,14 @@ def generate_support_tickets(conn):
         daily_tickets = int(base_daily_tickets * growth * dow * random.uniform(0.8, 1.2))
 
         # Category distribution shifts over time
-        problem_start = datetime(2025, 7, 15)
-        if current >= problem_start:
-            days_into_problem = (current - problem_start).days
+        if current >= CANCEL_PROBLEM_START:
+            days_into_problem = (current - CANCEL_PROBLEM_START).days
             cancel_share_boost = min(days_into_problem / 180, 1.0) * 0.20
         else:
             cancel_share_boost = 0
 
         # Spike around billing dates (1st and 15th)
-        is_billing_day = current.day in [1, 2, 15, 16]
+        is_billing_day = current.day in BILLING_DAYS
         if is_billing_day:
             daily_tickets = int(daily_tickets * 1.4)
             cancel_share_boost += 0.10
@@ -431,13 +554,7 @@ def generate_support_tickets(conn):
                     break
 
             if category == "cancellation":
-                channel_weights = [
-                    ("email", 0.25),
-                    ("chat", 0.15),
-                    ("app_review", 0.30),
-                    ("social", 0.20),
-                    ("partner_escalation", 0.10),
-                ]
+                channel_weights = CANCELLATION_TICKET_CHANNELS
             else:
                 channel_weights = TICKET_CHANNELS
 
@@ -451,7 +568,7 @@ def generate_support_tickets(conn):
                     break
 
             if channel == "partner_escalation":
-                if current < datetime(2026, 1, 10):
+                if current < PARTNER_ESCALATION_START:
                     channel = "email"
 
             # Sentiment score
@@ -477,9 +594,7 @@ def generate_support_tickets(conn):
             elif sentiment < -0.8 and random.random() < 0.3:
                 escalated = 1
 
-            cursor.execute("""
-                INSERT INTO support_tickets VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
+            yield (
                 ticket_id,
                 current.strftime("%Y-%m-%d"),
                 category,
@@ -488,18 +603,23 @@ def generate_support_tickets(conn):
                 round(sentiment, 2),
                 round(resolution_hours, 1),
                 escalated
-            ))
+            )
 
             ticket_id += 1
 
         current += timedelta(days=1)
 
-    conn.commit()
-
 
 def generate_weekly_funnel(conn):
     """Generate weekly funnel metrics."""
     cursor = conn.cursor()
+    cursor.executemany("INSERT INTO weekly_funnel VALUES (?, ?, ?, ?, ?, ?, ?)", weekly_funnel_rows(conn))
+    conn.commit()
+
+
+def weekly_funnel_rows(conn):
+    """Yield weekly_funnel rows for each full Monday-Sunday week of daily_metrics."""
+    cursor = conn.cursor()
 
     current = START_DATE
     # Align to Monday
@@ -525,9 +645,7 @@ def generate_weekly_funnel(conn):
             checkout_completed = conversions or 0
             conv_rate = checkout_completed / visitors if visitors > 0 else 0
 
-            cursor.execute("""
-                INSERT INTO weekly_funnel VALUES (?, ?, ?, ?, ?, ?, ?)
-            """, (
+            yield (
                 current.strftime("%Y-%m-%d"),
                 visitors,
                 product_views,
@@ -535,48 +653,20 @@ def generate_weekly_funnel(conn):
                 checkout_started,
                 checkout_completed,
                 round(conv_rate, 4)
-            ))
+            )
 
         current += timedelta(days=7)
 
-    conn.commit()
-
 
 def generate_lead_form_metrics(conn):
     """Generate B2B lead form metrics by campaign."""
     cursor = conn.cursor()
+    cursor.executemany("INSERT INTO lead_form_metrics VALUES (?, ?, ?, ?, ?, ?, ?)", lead_form_metrics_rows())
+    conn.commit()
 
-    campaigns = [
-        {
-            "id": "digital-badges",
-            "name": "Digital Badges for Graduates",
-            "launch": datetime(2024, 3, 1),
-            "base_visits": 120,
-            "conv_rate": (0.09, 0.12),  # 9-12%
-        },
-        {
-            "id": "bootcamp-completion",
-            "name": "Bootcamp Completion Certificates",
-            "launch": datetime(2024, 6, 1),
-            "base_visits": 90,
-            "conv_rate": (0.07, 0.10),  # 7-10%
-        },
-        {
-            "id": "ai-skills-verify",
-            "name": "AI-Powered Skills Verification",
-            "launch": datetime(2025, 10, 1),
-            "base_visits": 200,
-            "conv_rate": (0.02, 0.035),
-        },
-        {
-            "id": "higher-ed-micro",
-            "name": "Micro-Credentials for Higher Ed",
-            "launch": datetime(2025, 12, 1),
-            "base_visits": 150,
-            "conv_rate": (0.015, 0.03),
-        },
-    ]
 
+def lead_form_metrics_rows():
+    """Yield lead_form_metrics rows for weekdays on which each campaign is live."""
     current = datetime(2024, 3, 1)  # Start when first campaign launches
     while current <= END_DATE:
         dow = day_of_week_factor(current)
@@ -585,7 +675,7 @@ def generate_lead_form_metrics(conn):
             current += timedelta(days=1)
             continue
 
-        for camp in campaigns:
+        for camp in CAMPAIGNS:
             if current < camp["launch"]:
                 continue
 
@@ -605,9 +695,7 @@ def generate_lead_form_metrics(conn):
             form_completions = int(visits * conv_rate)
             actual_rate = form_completions / visits if visits > 0 else 0
 
-            cursor.execute("""
-                INSERT INTO lead_form_metrics VALUES (?, ?, ?, ?, ?, ?, ?)
-            """, (
+            yield (
                 current.strftime("%Y-%m-%d"),
                 camp["id"],
                 camp["name"],
@@ -615,40 +703,106 @@ def generate_lead_form_metrics(conn):
                 form_starts,
                 form_completions,
                 round(actual_rate, 4)
-            ))
+            )
 
         current += timedelta(days=1)
 
-    conn.commit()
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Generate the demo SQLite database.")
+    parser.add_argument("--engine", choices=["python", "numpy"], default="python",
+                        help="python reproduces sample_data.db; numpy is vectorized for large builds")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed (default: 42)")
+    parser.add_argument("--output", type=Path, default=DB_PATH, help="Database file to write")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="numpy engine: worker processes (default: CPU count; 1 = in-process)")
+    parser.add_argument("--tables", default=None,
+                        help="numpy engine: comma-separated tables to rebuild in an existing database")
+
+    scale = parser.add_argument_group("scale (numpy engine only)")
+    scale.add_argument("--years", type=float, default=2, help="Years of daily history ending 2026-01-26")
+    scale.add_argument("--ticket-multiplier", type=float, default=1.0, help="Multiplier on daily ticket volume")
+    scale.add_argument("--channels", type=int, default=len(CHANNELS), help="Acquisition channels")
+    scale.add_argument("--products", type=int, default=len(PRODUCTS), help="Products")
+    scale.add_argument("--campaigns", type=int, default=len(CAMPAIGNS), help="Lead form campaigns")
+
+    args = parser.parse_args()
+    default_scale = (2, 1.0, len(CHANNELS), len(PRODUCTS), len(CAMPAIGNS))
+    requested = (args.years, args.ticket_multiplier, args.channels, args.products, args.campaigns)
+    if args.engine == "python" and requested != default_scale:
+        parser.error("scale options need --engine numpy")
+    if args.engine == "python" and (args.tables or args.workers):
+        parser.error("--tables and --workers need --engine numpy")
+    if args.tables:
+        from vectorized_data import GENERATORS
+
+        unknown = [t for t in args.tables.split(",") if t.strip() not in GENERATORS]
+        if unknown:
+            parser.error(f"unknown table(s): {', '.join(unknown)}")
+        if not args.output.exists():
+            parser.error(f"--tables rebuilds tables in place, but {args.output} does not exist")
+    if min(args.channels, args.products, args.campaigns) < 1 or args.years <= 0:
+        parser.error("years and channel/product/campaign counts must be positive")
+    return args
+
+
+# Table -> (label, generator) for the python engine, in generation order.
+# The order is part of the output: every generator draws from one stream.
+PYTHON_GENERATORS = {
+    "daily_metrics": ("daily metrics", generate_daily_metrics),
+    "channel_metrics": ("channel metrics", generate_channel_metrics),
+    "product_metrics": ("product metrics", generate_product_metrics),
+    "support_tickets": ("support tickets", generate_support_tickets),
+    "lead_form_metrics": ("lead form metrics", generate_lead_form_metrics),
+    "weekly_funnel": ("weekly funnel", generate_weekly_funnel),
+}
+
+
+def generate_python(conn):
+    """Row-by-row generators driven by the global `random` stream."""
+    for table, (label, generator) in PYTHON_GENERATORS.items():
+        started = time.perf_counter()
+        print(f"Generating {label}...")
+        generator(conn)
+        print(f"  {load_rate(conn, table, time.perf_counter() - started)}")
 
 
 def main():
-    # Remove existing database
-    if DB_PATH.exists():
-        DB_PATH.unlink()
+    args = parse_args()
+    db_path = args.output
 
-    conn = sqlite3.connect(DB_PATH)
+    # Remove existing database, unless only some tables are being rebuilt
+    if db_path.exists() and not args.tables:
+        db_path.unlink()
+
+    conn = sqlite3.connect(db_path)
+    bulk_load(conn, scratch=not args.tables)
 
     print("Creating tables...")
     create_tables(conn)
 
-    print("Generating daily metrics...")
-    generate_daily_metrics(conn)
-
-    print("Generating channel metrics...")
-    generate_channel_metrics(conn)
+    if args.engine == "numpy":
+        from vectorized_data import Scale, generate_all, generate_parallel
 
-    print("Generating product metrics...")
-    generate_product_metrics(conn)
+        scale = Scale(args.years, args.ticket_multiplier, args.channels, args.products, args.campaigns)
+        tables = [t.strip() for t in args.tables.split(",")] if args.tables else None
+        if args.workers == 1:
+            generate_all(conn, args.seed, scale, tables)
+        else:
+            generate_parallel(conn, db_path, args.seed, scale, tables, args.workers)
+    else:
+        random.seed(args.seed)  # Reproducible data
+        generate_python(conn)
 
-    print("Generating support tickets...")
-    generate_support_tickets(conn)
+    print("Building rollups...")
+    build_rollups(conn, full=True)
 
-    print("Generating lead form metrics...")
-    generate_lead_form_metrics(conn)
+    # Secondary indexes are built once, after every row is in
+    print("Creating indexes...")
+    create_indexes(conn)
 
-    print("Generating weekly funnel...")
-    generate_weekly_funnel(conn)
+    print("Compacting and switching to WAL...")
+    finalize_for_serving(conn)
 
     # Verify
     cursor = conn.cursor()
@@ -672,9 +826,8 @@ def main():
     print(f"lead_form_metrics: {cursor.fetchone()[0]} rows")
 
     conn.close()
-    print(f"\nDatabase saved to: {DB_PATH}")
+    print(f"\nDatabase saved to: {db_path}")
 
 
 if __name__ == "__main__":
-    random.seed(42)  # Reproducible data
     main()
@@ -0,0 +1,163 @@
+"""
+SQL tokenizing and read-only enforcement for `query`.
+
+A single-pass tokenizer (SQLite's lexical rules: comments, quoted
+identifiers, string and blob literals, parameters) gives every statement
+a normalized form for cache keys and a literal-free fingerprint for
+statement statistics. It is not a grammar: whether a statement reads or
+writes is decided by SQLite itself, through an authorizer callback that
+allows only reads while the statement is prepared.
+"""
+
+import hashlib
+import re
+import sqlite3
+from dataclasses import dataclass, field
+
+_TOKEN_RE = re.compile(r"""
+    (?P<ws>\s+)
+  | (?P<comment>--[^\n]*|/\*.*?(?:\*/|\Z))
+  | (?P<blob>[xX]'[0-9A-Fa-f]*')
+  | (?P<string>'(?:[^']|'')*')
+  | (?P<ident>"(?:[^"]|"")*"|`(?:[^`]|``)*`|\[[^\]]*\])
+  | (?P<number>0[xX][0-9A-Fa-f]+|(?:\d+(?:\.\d*)?|\.\d+)(?:[eE][+-]?\d+)?)
+  | (?P<param>\?\d*|[:@$][A-Za-z0-9_]+)
+  | (?P<word>[A-Za-z_][A-Za-z0-9_$]*)
+  | (?P<op>->>|->|\|\||<<|>>|<=|>=|==|!=|<>|.)
+""", re.VERBOSE | re.DOTALL)
+
+LITERALS = {"string", "number", "blob"}
+
+# Runs of placeholders inside parentheses, e.g. an IN list
+_PLACEHOLDER_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+
+
+def tokenize(sql):
+    """(kind, text) tokens covering the whole string, whitespace and comments included."""
+    return [(match.lastgroup, match.group()) for match in _TOKEN_RE.finditer(sql)]
+
+
+@dataclass
+class ParsedSQL:
+    keyword: str                # First keyword, lowercased ('select', 'with', 'explain', ...)
+    statements: int             # Non-empty statements separated by ';'
+    normalized: str             # Comments dropped, whitespace collapsed, words lowercased
+    fingerprint: str            # Short hash of `shape`
+    shape: str                  # normalized with literals replaced by ?
+
+
+def parse(sql):
+    """Tokenize once and derive the statement's keyword, normal form and fingerprint."""
+    normalized, shape = [], []
+    statements = 0
+    in_statement = False
+    keyword = ""
+    gap = False
+
+    for kind, text in tokenize(sql):
+        if kind in ("ws", "comment"):
+            gap = True
+            continue
+        if kind == "op" and text == ";":
+            in_statement = False
+            gap = False
+            continue
+        if not in_statement:
+            statements += 1
+            in_statement = True
+            if normalized:
+                normalized.append(";")
+                shape.append(";")
+            gap = False
+        if kind == "word":
+            text = text.lower()
+            keyword = keyword or text
+        separator = " " if gap and normalized and normalized[-1] != ";" else ""
+        normalized.append(separator + text)
+        shape.append(separator + ("?" if kind in LITERALS else text))
+        gap = False
+
+    shape_text = _PLACEHOLDER_LIST_RE.sub("(...)", "".join(shape))
+    return ParsedSQL(
+        keyword=keyword,
+        statements=statements,
+        normalized="".join(normalized),
+        fingerprint=hashlib.sha1(shape_text.encode("utf-8")).hexdigest()[:12],
+        shape=shape_text,
+    )
+
+
+# Authorizer action codes a read may trigger while being prepared
+_READ_ACTIONS = {sqlite3.SQLITE_SELECT, sqlite3.SQLITE_READ, sqlite3.SQLITE_FUNCTION,
+                 getattr(sqlite3, "SQLITE_RECURSIVE", 33)}
+
+# PRAGMAs that only report schema information, whatever their argument
+READ_ONLY_PRAGMAS = {"table_info", "table_xinfo", "index_list", "index_info", "index_xinfo",
+                     "foreign_key_list"}
+
+_ACTION_NAMES = {
+    getattr(sqlite3, f"SQLITE_{name}"): name.lower().replace("_", " ")
+    for name in (
+        "CREATE_INDEX", "CREATE_TABLE", "CREATE_TEMP_INDEX", "CREATE_TEMP_TABLE",
+        "CREATE_TEMP_TRIGGER", "CREATE_TEMP_VIEW", "CREATE_TRIGGER", "CREATE_VIEW",
+        "DELETE", "DROP_INDEX", "DROP_TABLE", "DROP_TEMP_INDEX", "DROP_TEMP_TABLE",
+        "DROP_TEMP_TRIGGER", "DROP_TEMP_VIEW", "DROP_TRIGGER", "DROP_VIEW", "INSERT",
+        "PRAGMA", "TRANSACTION", "UPDATE", "ATTACH", "DETACH", "ALTER_TABLE", "REINDEX",
+        "ANALYZE", "CREATE_VTABLE", "DROP_VTABLE", "SAVEPOINT",
+    )
+    if hasattr(sqlite3, f"SQLITE_{name}")
+}
+
+
+# Writes to these mean a DDL statement; SQLite checks them before the DDL action itself
+_SCHEMA_TABLES = {"sqlite_master", "sqlite_schema", "sqlite_temp_master", "sqlite_temp_schema"}
+_SCHEMA_OBJECTS = {"table", "index", "view", "trigger"}
+SCHEMA_CHANGE = "schema change"
+
+
+@dataclass
+class ReadOnlyAuthorizer:
+    """
+    set_authorizer callback that denies anything but reads and records the
+    tables and columns a statement reads.
+    """
+    tables: set = field(default_factory=set)
+    columns: set = field(default_factory=set)      # (table, column)
+    denied: str = None                              # First denied action, for messages
+
+    def __call__(self, action, arg1, arg2, db_name, trigger):
+        if action == sqlite3.SQLITE_READ:
+            self.tables.add(arg1)
+            if arg2:
+                self.columns.add((arg1, arg2))
+            return sqlite3.SQLITE_OK
+        if action in _READ_ACTIONS:
+            return sqlite3.SQLITE_OK
+        if action == sqlite3.SQLITE_PRAGMA and arg1.lower() in READ_ONLY_PRAGMAS:
+            return sqlite3.SQLITE_OK
+        if self.denied is None:
+            self.denied = _ACTION_NAMES.get(action, f"action {action}")
+            if action == sqlite3.SQLITE_PRAGMA:
+                self.denied += f" {arg1}"
+            elif action in (sqlite3.SQLITE_INSERT, sqlite3.SQLITE_UPDATE, sqlite3.SQLITE_DELETE) \
+                    and (arg1 or "").lower() in _SCHEMA_TABLES:
+                self.denied = SCHEMA_CHANGE
+        return sqlite3.SQLITE_DENY
+
+    def denied_action(self, sql):
+        """
+        The denied action for messages. A schema change is named by the
+        statement's own leading words (drop table, create unique index).
+        """
+        if self.denied != SCHEMA_CHANGE:
+            return self.denied
+        words = []
+        for kind, text in tokenize(sql):
+            if kind in ("ws", "comment"):
+                continue
+            if kind != "word":
+                break
+            words.append(text.lower())
+            if words[-1] in _SCHEMA_OBJECTS or len(words) == 4:
+                break
+        return " ".join(words) or SCHEMA_CHANGE
@@ -0,0 +1,53 @@
+"""
+Per-statement statistics for `query`, keyed on the SQL fingerprint from
+sql_parser, so the same query with different literals is one entry.
+"""
+
+import threading
+from collections import OrderedDict
+
+
+class StatementStats:
+    """Thread-safe fingerprint -> counters map, dropping the least recently seen past max_entries."""
+
+    def __init__(self, max_entries=500):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def record(self, parsed, seconds, tables=(), cached=False, error=False):
+        """Count one call of a parsed statement."""
+        with self._lock:
+            entry = self._entries.get(parsed.fingerprint)
+            if entry is None:
+                entry = {
+                    "fingerprint": parsed.fingerprint,
+                    "shape": parsed.shape,
+                    "calls": 0,
+                    "cache_hits": 0,
+                    "errors": 0,
+                    "total_seconds": 0.0,
+                    "max_seconds": 0.0,
+                    "tables": set(),
+                }
+                self._entries[parsed.fingerprint] = entry
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+            self._entries.move_to_end(parsed.fingerprint)
+
+            entry["calls"] += 1
+            entry["cache_hits"] += cached
+            entry["errors"] += error
+            entry["total_seconds"] += seconds
+            entry["max_seconds"] = max(entry["max_seconds"], seconds)
+            entry["tables"].update(tables)
+
+    def top(self, n=5, key="total_seconds"):
+        """Copies of the n entries with the highest `key`."""
+        with self._lock:
+            entries = sorted(self._entries.values(), key=lambda e: e[key], reverse=True)[:n]
+            return [dict(e, tables=sorted(e["tables"])) for e in entries]
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
@@ -0,0 +1,15 @@
+from anomalies import AnomalyScanner
+
+
+def test_scan_skips_tables_without_dated_rows_or_date_column():
+    catalog_tables = {
+        "lead_form_metrics": {"name": "lead_form_metrics", "columns": [{"name": "date", "min": None, "max": None}]},
+        "support_tickets": {"name": "support_tickets", "columns": [{"name": "ticket_id", "min": 1, "max": 9}]},
+    }
+
+    scanned = AnomalyScanner().scan(None, catalog_tables, inode=1)
+
+    assert scanned == {
+        "lead_form_metrics": ("skipped", "no dated rows"),
+        "support_tickets": ("skipped", "no created_date column"),
+    }
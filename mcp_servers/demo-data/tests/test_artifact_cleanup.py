@@ -0,0 +1,87 @@
+import importlib.util
+import json
+import os
+import time
+from pathlib import Path
+
+import pytest
+
+from artifact_manifest import ArtifactManifest
+
+SCRIPT = Path(__file__).resolve().parents[3] / "scripts" / "cleanup_tmp.py"
+DAY = 24 * 60 * 60
+
+
+@pytest.fixture
+def cleanup_tmp(tmp_path, monkeypatch):
+    """scripts/cleanup_tmp.py pointed at an empty tmp/ under tmp_path."""
+    spec = importlib.util.spec_from_file_location("cleanup_tmp", SCRIPT)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    tmp_dir = tmp_path / "tmp"
+    (tmp_dir / "csv").mkdir(parents=True)
+    monkeypatch.setattr(module, "TMP_DIR", tmp_dir)
+    monkeypatch.setattr(module, "MANIFEST", tmp_dir / "manifest.jsonl")
+    monkeypatch.setattr(module, "SWEEP_MARKER", tmp_dir / ".last_sweep")
+    return module
+
+
+def artifact(tmp_dir, name, age=0):
+    """A saved query's .csv and .sql, modified age seconds ago."""
+    paths = [tmp_dir / "csv" / f"{name}.csv", tmp_dir / "csv" / f"{name}.sql"]
+    for path in paths:
+        path.write_text("x\n")
+        os.utime(path, (time.time() - age, time.time() - age))
+    return paths
+
+
+def manifest_line(tmp_dir, paths, used):
+    return json.dumps({"paths": [p.relative_to(tmp_dir).as_posix() for p in paths], "bytes": 4, "used": used}) + "\n"
+
+
+def test_artifacts_unused_past_max_age_are_deleted(cleanup_tmp):
+    tmp_dir, now = cleanup_tmp.TMP_DIR, time.time()
+    old, fresh = artifact(tmp_dir, "query_old"), artifact(tmp_dir, "query_fresh")
+    cleanup_tmp.MANIFEST.write_text(manifest_line(tmp_dir, old, now - 2 * DAY)
+                                    + manifest_line(tmp_dir, fresh, now - 60))
+
+    deleted, kept = cleanup_tmp.cleanup_manifest(now)
+
+    assert deleted == 2 and not any(p.exists() for p in old)
+    assert all(p.exists() for p in fresh) and kept == {str(p) for p in fresh}
+    assert [json.loads(line)["paths"][0] for line in cleanup_tmp.MANIFEST.read_text().splitlines()] == \
+        ["csv/query_fresh.csv"]
+
+
+def test_recently_used_artifacts_and_recent_files_are_kept(cleanup_tmp):
+    tmp_dir, now = cleanup_tmp.TMP_DIR, time.time()
+    # Saved two days ago but reused just now: evicted by last use, not mtime
+    reused = artifact(tmp_dir, "query_reused", age=2 * DAY)
+    cleanup_tmp.MANIFEST.write_text(manifest_line(tmp_dir, reused, now - 2 * DAY))
+    ArtifactManifest(cleanup_tmp.MANIFEST).record(reused)
+    unlisted_recent = tmp_dir / "csv" / "notes.txt"
+    unlisted_recent.write_text("x")
+    unlisted_old = artifact(tmp_dir, "query_before_manifest", age=2 * DAY)
+
+    cleanup_tmp.cleanup()
+
+    assert all(p.exists() for p in reused) and unlisted_recent.exists()
+    assert not any(p.exists() for p in unlisted_old)
+    assert len(cleanup_tmp.MANIFEST.read_text().splitlines()) == 1
+
+
+def test_corrupt_manifest_lines_are_skipped_and_dropped(cleanup_tmp):
+    tmp_dir, now = cleanup_tmp.TMP_DIR, time.time()
+    old, fresh = artifact(tmp_dir, "query_old"), artifact(tmp_dir, "query_fresh")
+    cleanup_tmp.MANIFEST.write_text(
+        manifest_line(tmp_dir, old, now - 2 * DAY)
+        + '{"paths": ["csv/query_cut.csv"], "bytes": 4, "us'      # Cut short by a crash
+        + "\n" + '{"paths": ["csv/query_bad.csv"], "bytes": "many", "used": 1}\n'
+        + manifest_line(tmp_dir, fresh, now)
+    )
+
+    deleted, _ = cleanup_tmp.cleanup_manifest(now)
+
+    assert deleted == 2 and all(p.exists() for p in fresh)
+    assert [json.loads(line)["paths"][0] for line in cleanup_tmp.MANIFEST.read_text().splitlines()] == \
+        ["csv/query_fresh.csv"]
@@ -0,0 +1,21 @@
+import pandas as pd
+import pytest
+
+from mix_decomposition import EFFECTS, decompose
+
+
+def window(rows):
+    return pd.DataFrame(rows, columns=["date", "channel_id", "revenue", "sessions"])
+
+
+def test_effects_add_up_when_a_value_had_revenue_but_no_prior_sessions():
+    prior = window([("2025-01-01", "organic", 200.0, 100.0), ("2025-01-01", "partner", 50.0, 0.0)])
+    current = window([("2026-01-01", "organic", 330.0, 150.0), ("2026-01-01", "partner", 40.0, 10.0)])
+
+    result = decompose(current, prior, "channel_id", "revenue", "sessions")
+
+    segments = result.segments.set_index("channel_id")
+    assert segments[EFFECTS].sum(axis=1).to_numpy() == pytest.approx(segments["change"].to_numpy())
+    assert result.effects.sum() == pytest.approx(result.totals.loc["revenue", "change"])
+    # organic had prior sessions, so its rate effect is its own rate change on current volume
+    assert segments.loc["organic", "rate_effect"] == pytest.approx(150 * (330 / 150 - 200 / 100))
@@ -0,0 +1,59 @@
+import sqlite3
+from datetime import date
+
+import pandas as pd
+
+from period_compare import ALL_GROUPS, align, daily_changes, load_window, ranked_groups, totals
+
+
+def window(rows):
+    return pd.DataFrame(rows, columns=["date", "campaign_id", "lp_visits", "conversion_rate"])
+
+
+def test_value_missing_from_a_window_counts_as_zero_for_summed_metrics():
+    prior = window([("2025-11-01", "a", 100.0, 0.1)])
+    current = window([("2025-12-01", "a", 120.0, 0.2), ("2025-12-01", "new", 50.0, 0.3)])
+
+    result = totals(current, prior, ["lp_visits", "conversion_rate"], "campaign_id")
+
+    new = result.loc[("new", "lp_visits")]
+    assert (new["prior"], new["delta"]) == (0, 50)
+    assert pd.isna(new["pct_change"])
+    assert pd.isna(result.loc[("new", "conversion_rate"), "prior"])
+    deltas = result.xs("lp_visits", level="metric")["delta"]
+    assert deltas.drop(ALL_GROUPS).sum() == deltas[ALL_GROUPS]
+    assert ranked_groups(result, "lp_visits", 2) == ["new", "a"]
+
+
+def test_resolution_hours_is_averaged_not_summed_with_ticket_volume():
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE support_tickets (ticket_id INTEGER PRIMARY KEY, created_date TEXT, "
+                 "resolution_hours REAL)")
+    conn.executemany("INSERT INTO support_tickets (created_date, resolution_hours) VALUES (?, ?)", [
+        ("2025-01-01", 20.0),
+        ("2026-01-01", 10.0), ("2026-01-01", 20.0), ("2026-01-02", 30.0),
+    ])
+    metrics = ["resolution_hours", "rows"]
+
+    def window(start, end):
+        return load_window(conn.cursor(), "support_tickets", "created_date", metrics, None, start, end)
+
+    result = totals(window(date(2026, 1, 1), date(2026, 1, 2)), window(date(2025, 1, 1), date(2025, 1, 2)),
+                    metrics, table="support_tickets")
+
+    hours = result.loc[(ALL_GROUPS, "resolution_hours")]
+    assert (hours["current"], hours["prior"]) == (22.5, 20)
+    assert result.loc[(ALL_GROUPS, "rows"), "current"] == 3
+
+
+def test_no_largest_gain_when_no_day_rose():
+    prior = window([("2025-11-01", "a", 100.0, 0.1), ("2025-11-02", "a", 100.0, 0.1)]).assign(offset=[0, 1])
+    current = window([("2025-12-01", "a", 90.0, 0.1), ("2025-12-02", "a", 80.0, 0.1)]).assign(offset=[0, 1])
+    aligned = align(current, prior, ["lp_visits"], "date")
+
+    changes = daily_changes(aligned, ["lp_visits"], pd.Timestamp("2025-12-01"), pd.Timestamp("2025-11-01"))
+
+    row = changes.iloc[0]
+    assert (row["days_up"], row["days_down"]) == (0, 2)
+    assert pd.isna(row["largest_gain"]) and row["gain_on"] == ""
+    assert (row["largest_drop"], row["drop_on"]) == (-20, "2025-12-02 vs 2025-11-02")
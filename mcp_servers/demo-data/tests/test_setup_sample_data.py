@@ -0,0 +1,30 @@
+import sqlite3
+import subprocess
+import sys
+from contextlib import closing
+from pathlib import Path
+
+SCRIPT = Path(__file__).resolve().parents[1] / "setup_sample_data.py"
+TABLES = ["daily_metrics", "channel_metrics", "product_metrics", "weekly_funnel", "support_tickets"]
+
+
+def build(db_path, *extra):
+    subprocess.run(
+        [sys.executable, str(SCRIPT), "--engine", "numpy", "--years", "0.25", "--output", str(db_path), *extra],
+        cwd=SCRIPT.parent, check=True, capture_output=True,
+    )
+
+
+def contents(db_path):
+    with closing(sqlite3.connect(db_path)) as conn:
+        return {t: conn.execute(f"SELECT * FROM {t} ORDER BY 1, 2").fetchall() for t in TABLES}
+
+
+def test_in_process_rebuild_of_daily_metrics_replaces_derived_tables(tmp_path):
+    db_path = tmp_path / "sample.db"
+    build(db_path, "--workers", "1")
+    before = contents(db_path)
+
+    build(db_path, "--workers", "1", "--tables", "daily_metrics")
+
+    assert contents(db_path) == before
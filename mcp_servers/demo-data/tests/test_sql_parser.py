@@ -0,0 +1,58 @@
+import sqlite3
+
+import pytest
+
+from sql_parser import ReadOnlyAuthorizer, parse
+
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE daily_metrics (date TEXT PRIMARY KEY, sessions INTEGER)")
+    conn.execute("INSERT INTO daily_metrics VALUES ('2026-01-01', 10)")
+    yield conn
+    conn.close()
+
+
+def run(conn, sql):
+    """(rows or None, authorizer) for sql run under a ReadOnlyAuthorizer."""
+    authorizer = ReadOnlyAuthorizer()
+    conn.set_authorizer(authorizer)
+    try:
+        return conn.execute(sql).fetchall(), authorizer
+    except sqlite3.DatabaseError:
+        return None, authorizer
+    finally:
+        conn.set_authorizer(None)
+
+
+def test_parse_counts_statements_and_ignores_comments():
+    assert parse("SELECT 1; DELETE FROM daily_metrics").statements == 2
+    assert parse("SELECT ';' AS semi;  ").statements == 1
+    leading = parse("-- daily sessions\n/* block */ SELECT sessions FROM daily_metrics")
+    assert (leading.statements, leading.keyword) == (1, "select")
+    assert leading.normalized == "select sessions from daily_metrics"
+
+
+def test_reads_are_allowed_and_tables_recorded(conn):
+    rows, authorizer = run(conn, "-- comment\nSELECT sessions FROM daily_metrics")
+    assert rows == [(10,)]
+    assert authorizer.tables == {"daily_metrics"} and authorizer.denied is None
+    assert run(conn, "PRAGMA table_info(daily_metrics)")[0]
+
+
+@pytest.mark.parametrize("sql, action", [
+    ("DELETE FROM daily_metrics", "delete"),
+    ("UPDATE daily_metrics SET sessions = 0", "update"),
+    ("INSERT INTO daily_metrics VALUES ('2026-01-02', 1)", "insert"),
+    ("DROP TABLE daily_metrics", "drop table"),
+    ("CREATE UNIQUE INDEX i ON daily_metrics(sessions)", "create unique index"),
+    ("ALTER TABLE daily_metrics ADD COLUMN x", "alter table"),
+    ("ATTACH DATABASE ':memory:' AS other", "attach"),
+    ("PRAGMA user_version = 3", "pragma user_version"),
+])
+def test_writes_are_denied_with_the_requested_action(conn, sql, action):
+    rows, authorizer = run(conn, sql)
+    assert rows is None
+    assert authorizer.denied_action(sql) == action
+    assert conn.execute("SELECT COUNT(*), SUM(sessions) FROM daily_metrics").fetchone() == (1, 10)
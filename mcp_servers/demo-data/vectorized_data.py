@@ -0,0 +1,528 @@
+"""
+NumPy-vectorized sample data generation for load-test databases.
+
+Same tables, trends and planted events as the row-by-row generators in
+setup_sample_data.py, but every column is sampled in bulk from a seeded
+numpy Generator and inserted with executemany. Use it through
+`python setup_sample_data.py --engine numpy` with the scale options
+(years, ticket multiplier, channel/product/campaign counts).
+
+Each table draws from its own stream derived from (seed, table name), so
+tables can be generated in parallel - each in a worker process writing a
+staging database that is merged at the end - and any one table can be
+rebuilt without changing the others. The streams differ from the
+`random`-module generators, so the numpy engine reproduces itself for a
+given seed, not sample_data.db.
+"""
+
+import sqlite3
+import tempfile
+import time
+import zlib
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+from datetime import timedelta
+from pathlib import Path
+
+import numpy as np
+
+from setup_sample_data import (
+    BILLING_DAYS,
+    CAMPAIGNS,
+    CANCEL_PROBLEM_START,
+    CANCELLATION_TICKET_CHANNELS,
+    CHANNELS,
+    DOW_FACTORS,
+    END_DATE,
+    GROWTH_DECEL_START,
+    PARTNER_ESCALATION_START,
+    PRODUCT_SHARES,
+    PRODUCTS,
+    SEASONALITY_FACTORS,
+    TICKET_CATEGORIES,
+    TICKET_CHANNELS,
+    bulk_load,
+    create_tables,
+    load_rate,
+)
+
+# Days of tickets sampled per chunk - bounds memory for 100x builds
+TICKET_CHUNK_DAYS = 366
+
+# Rows per executemany call
+INSERT_BATCH_ROWS = 50_000
+
+
+@dataclass
+class Scale:
+    """Size of a generated database. Defaults match sample_data.db."""
+
+    years: float = 2
+    ticket_multiplier: float = 1.0
+    channels: int = len(CHANNELS)
+    products: int = len(PRODUCTS)
+    campaigns: int = len(CAMPAIGNS)
+
+    @property
+    def start_date(self):
+        return END_DATE - timedelta(days=round(365 * self.years))
+
+    def channel_list(self):
+        """(id, name, share) for each channel; extras get small shares, then renormalize."""
+        base = list(CHANNELS[:self.channels])
+        for i in range(len(base), self.channels):
+            base.append((f"channel_{i + 1:03d}", f"Channel {i + 1}", 0.05))
+        total = sum(share for _, _, share in base)
+        return [(cid, name, share / total) for cid, name, share in base]
+
+    def product_list(self):
+        """(id, name, base_price, share) for each product."""
+        base = [(pid, name, price, PRODUCT_SHARES[pid]) for pid, name, price in PRODUCTS[:self.products]]
+        for i in range(len(base), self.products):
+            pid, name, price = PRODUCTS[i % len(PRODUCTS)]
+            tier = i // len(PRODUCTS)
+            base.append((f"{pid}_{tier + 1}", f"{name} {tier + 1}", round(price * (1 + 0.1 * tier), 2), 0.05))
+        total = sum(p[3] for p in base)
+        return [(pid, name, price, share / total) for pid, name, price, share in base]
+
+    def campaign_list(self):
+        """Campaign dicts; extras launch evenly across the date range."""
+        base = [dict(c) for c in CAMPAIGNS[:self.campaigns]]
+        extra = self.campaigns - len(base)
+        span = (END_DATE - self.start_date).days
+        for i in range(extra):
+            base.append({
+                "id": f"campaign-{i + 1:03d}",
+                "name": f"Campaign {i + 1}",
+                "launch": self.start_date + timedelta(days=span * i // max(extra, 1)),
+                "base_visits": 80 + 20 * (i % 8),
+                "conv_rate": (0.02, 0.06),
+            })
+        return base
+
+
+def date_range(start, end):
+    """datetime64[D] array from start to end inclusive."""
+    return np.arange(np.datetime64(start.date()), np.datetime64(end.date()) + 1, dtype="datetime64[D]")
+
+
+def weekday(days):
+    """Monday=0 .. Sunday=6 (1970-01-01 was a Thursday)."""
+    return (days.astype(np.int64) + 3) % 7
+
+
+def month(days):
+    return days.astype("datetime64[M]").astype(np.int64) % 12 + 1
+
+
+def day_of_month(days):
+    return (days - days.astype("datetime64[M]")).astype(np.int64) + 1
+
+
+def to_date_strings(days):
+    return np.datetime_as_string(days, unit="D")
+
+
+def days_since(days, moment):
+    return (days - np.datetime64(moment.date())).astype(np.int64)
+
+
+def dow_factor(days):
+    return np.asarray(DOW_FACTORS)[weekday(days)]
+
+
+def seasonality(days):
+    factors = np.array([0.0] + [SEASONALITY_FACTORS[m] for m in range(1, 13)])
+    return factors[month(days)]
+
+
+def growth(days, start_date):
+    """Vectorized growth_factor(): 15% annual growth, slowing to 8% after the decel start."""
+    elapsed = days_since(days, start_date)
+    into_decel = days_since(days, GROWTH_DECEL_START)
+    progress = np.clip(into_decel / 150, 0.0, 1.0)
+    annual = np.where(into_decel < 0, 0.15, 0.15 - 0.07 * progress)
+    return (1 + annual) ** (elapsed / 365)
+
+
+def pick(cumulative, draws):
+    """Index of the first cumulative weight >= each draw (rows of cumulative per draw)."""
+    idx = (draws[:, None] > cumulative).sum(axis=1)
+    return np.minimum(idx, cumulative.shape[1] - 1)
+
+
+def insert_rows(cursor, table, columns):
+    """executemany over column arrays in INSERT_BATCH_ROWS slices."""
+    n = len(columns[0])
+    placeholders = ", ".join("?" * len(columns))
+    sql = f"INSERT INTO {table} VALUES ({placeholders})"
+    for lo in range(0, n, INSERT_BATCH_ROWS):
+        hi = min(lo + INSERT_BATCH_ROWS, n)
+        cursor.executemany(sql, zip(*(col[lo:hi].tolist() for col in columns)))
+    return n
+
+
+def generate_daily_metrics(conn, rng, scale):
+    """Daily aggregate metrics - one vector per column."""
+    days = date_range(scale.start_date, END_DATE)
+    n = len(days)
+
+    noise = rng.normal(1.0, 0.08, n)
+    sessions = (8000 * dow_factor(days) * seasonality(days) * growth(days, scale.start_date) * noise).astype(np.int64)
+    new_users = (sessions * rng.uniform(0.55, 0.65, n)).astype(np.int64)
+    signups = (sessions * rng.uniform(0.08, 0.12, n)).astype(np.int64)
+    trials = (signups * rng.uniform(0.40, 0.50, n)).astype(np.int64)
+
+    conv_rate = 0.025 * rng.uniform(0.85, 1.15, n) * (1 + 0.0001 * days_since(days, scale.start_date))
+    conversions = (sessions * conv_rate).astype(np.int64)
+    aov = rng.normal(85, 15, n)
+    revenue = conversions * aov
+
+    insert_rows(conn.cursor(), "daily_metrics", [
+        to_date_strings(days), sessions, new_users, signups, trials, conversions,
+        np.round(revenue, 2), np.round(aov, 2),
+    ])
+    conn.commit()
+
+
+def read_daily(conn, columns):
+    cursor = conn.cursor()
+    cursor.execute(f"SELECT date, {', '.join(columns)} FROM daily_metrics ORDER BY date")
+    rows = cursor.fetchall()
+    dates = np.array([r[0] for r in rows])
+    values = [np.array([r[i + 1] for r in rows], dtype=np.float64) for i in range(len(columns))]
+    return dates, values
+
+
+def jittered_shares(shares, jitter, n_days, rng):
+    """Per-day shares for every dimension value but the last, each scaled by uniform(1 +/- jitter)."""
+    return shares[None, :-1] * rng.uniform(1 - jitter, 1 + jitter, (n_days, len(shares) - 1))
+
+
+def allocate(totals, actual, whole=True):
+    """
+    Split daily totals by jittered shares into a (days x values) array.
+    The last value takes the remainder so parts add up, as in the
+    row-by-row generators.
+    """
+    parts = totals[:, None] * actual
+    if whole:
+        parts = np.floor(parts)
+    return np.concatenate([parts, (totals - parts.sum(axis=1))[:, None]], axis=1)
+
+
+def generate_channel_metrics(conn, rng, scale):
+    """Channel breakdown of daily totals."""
+    dates, (sessions, signups, conversions, revenue) = read_daily(
+        conn, ["sessions", "signups", "conversions", "revenue"]
+    )
+    channels = scale.channel_list()
+    n_days, n_ch = len(dates), len(channels)
+
+    # One jittered share per channel-day, applied to every metric
+    actual = jittered_shares(np.array([share for _, _, share in channels]), 0.15, n_days, rng)
+
+    insert_rows(conn.cursor(), "channel_metrics", [
+        np.repeat(dates, n_ch),
+        np.tile([c[0] for c in channels], n_days),
+        np.tile([c[1] for c in channels], n_days),
+        allocate(sessions, actual).ravel().astype(np.int64),
+        allocate(signups, actual).ravel().astype(np.int64),
+        allocate(conversions, actual).ravel().astype(np.int64),
+        np.round(allocate(revenue, actual, whole=False).ravel(), 2),
+    ])
+    conn.commit()
+
+
+def generate_product_metrics(conn, rng, scale):
+    """Product breakdown of daily conversions and revenue."""
+    dates, (conversions, revenue) = read_daily(conn, ["conversions", "revenue"])
+    products = scale.product_list()
+    shares = np.array([p[3] for p in products])
+    prices = np.array([p[2] for p in products])
+    n_days, n_prod = len(dates), len(products)
+
+    units = allocate(conversions, jittered_shares(shares, 0.10, n_days, rng))
+    price_paid = prices[None, :-1] * rng.uniform(0.85, 1.0, (n_days, n_prod - 1))
+    rev = units[:, :-1] * price_paid
+    rev = np.concatenate([rev, (revenue - rev.sum(axis=1))[:, None]], axis=1)
+
+    refunds = np.floor(units * rng.uniform(0.02, 0.04, (n_days, n_prod)))
+    refund_amount = refunds * prices[None, :] * 0.9
+
+    insert_rows(conn.cursor(), "product_metrics", [
+        np.repeat(dates, n_prod),
+        np.tile([p[0] for p in products], n_days),
+        np.tile([p[1] for p in products], n_days),
+        units.ravel().astype(np.int64),
+        np.round(rev.ravel(), 2),
+        refunds.ravel().astype(np.int64),
+        np.round(refund_amount.ravel(), 2),
+    ])
+    conn.commit()
+
+
+def _ticket_tables():
+    """Padded cumulative-weight tables for category -> subcategory and channel picks."""
+    categories = list(TICKET_CATEGORIES)
+    width = max(len(subs) for subs in TICKET_CATEGORIES.values())
+    sub_names = np.full((len(categories), width), "", dtype=object)
+    sub_cum = np.ones((len(categories), width))
+    for i, cat in enumerate(categories):
+        subs = TICKET_CATEGORIES[cat]
+        sub_names[i, :len(subs)] = [s for s, _ in subs]
+        sub_cum[i, :len(subs)] = np.cumsum([w for _, w in subs])
+        sub_names[i, len(subs):] = subs[-1][0]
+
+    channel_names = np.array([c for c, _ in TICKET_CHANNELS], dtype=object)
+    cancel_weights = dict(CANCELLATION_TICKET_CHANNELS)
+    channel_cum = np.array([
+        np.cumsum([w for _, w in TICKET_CHANNELS]),
+        np.cumsum([cancel_weights.get(c, 0.0) for c, _ in TICKET_CHANNELS]),
+    ])
+    return categories, sub_names, sub_cum, channel_names, channel_cum
+
+
+def generate_support_tickets(conn, rng, scale):
+    """Support tickets, sampled a chunk of days at a time."""
+    categories, sub_names, sub_cum, channel_names, channel_cum = _ticket_tables()
+    cat_names = np.array(categories, dtype=object)
+    cancel_idx = categories.index("cancellation")
+    content_idx = categories.index("content")
+    base_weights = np.array([{"cancellation": 0.15, "billing": 0.25, "technical": 0.30,
+                              "account": 0.15, "content": 0.15}[c] for c in categories])
+
+    cursor = conn.cursor()
+    all_days = date_range(scale.start_date, END_DATE)
+    next_id = 1
+
+    for lo in range(0, len(all_days), TICKET_CHUNK_DAYS):
+        days = all_days[lo:lo + TICKET_CHUNK_DAYS]
+        n_days = len(days)
+
+        volume = 25 * scale.ticket_multiplier * growth(days, scale.start_date) * dow_factor(days)
+        daily = (volume * rng.uniform(0.8, 1.2, n_days)).astype(np.int64)
+
+        into_problem = days_since(days, CANCEL_PROBLEM_START)
+        boost = np.where(into_problem >= 0, np.minimum(into_problem / 180, 1.0) * 0.20, 0.0)
+        billing = np.isin(day_of_month(days), BILLING_DAYS)
+        daily = np.where(billing, (daily * 1.4).astype(np.int64), daily)
+        boost = boost + np.where(billing, 0.10, 0.0)
+
+        # Per-day category weights, cancellation borrowing share from content
+        weights = np.tile(base_weights, (n_days, 1))
+        weights[:, cancel_idx] += boost
+        weights[:, content_idx] -= boost
+        day_cum = np.cumsum(weights / weights.sum(axis=1, keepdims=True), axis=1)
+
+        n = int(daily.sum())
+        if n == 0:
+            continue
+        day_idx = np.repeat(np.arange(n_days), daily)
+        ticket_days = days[day_idx]
+
+        category = pick(day_cum[day_idx], rng.random(n))
+        subcategory = sub_names[category, pick(sub_cum[category], rng.random(n))]
+        is_cancel = category == cancel_idx
+        channel = channel_names[pick(channel_cum[is_cancel.astype(np.int64)], rng.random(n))]
+        early = ticket_days < np.datetime64(PARTNER_ESCALATION_START.date())
+        channel = np.where((channel == "partner_escalation") & early, "email", channel)
+
+        public = np.isin(channel, ["app_review", "social"])
+        sentiment = rng.uniform(-0.7, -0.3, n) - 0.2 * is_cancel - 0.1 * public
+        sentiment = np.clip(sentiment, -1.0, 0.0)
+
+        partner = channel == "partner_escalation"
+        resolution = rng.normal(24, 12, n) * np.where(is_cancel, 1.5, 1.0) * np.where(partner, 0.5, 1.0)
+        resolution = np.maximum(1, resolution)
+
+        escalated = (partner | ((sentiment < -0.8) & (rng.random(n) < 0.3))).astype(np.int64)
+
+        insert_rows(cursor, "support_tickets", [
+            np.arange(next_id, next_id + n),
+            to_date_strings(ticket_days),
+            cat_names[category],
+            subcategory,
+            channel,
+            np.round(sentiment, 2),
+            np.round(resolution, 1),
+            escalated,
+        ])
+        next_id += n
+
+    conn.commit()
+
+
+def generate_weekly_funnel(conn, rng, scale):
+    """Weekly funnel from Monday-aligned weeks of daily metrics."""
+    dates, (sessions, conversions) = read_daily(conn, ["sessions", "conversions"])
+    days = dates.astype("datetime64[D]")
+    first_monday = np.argmax(weekday(days) == 0)
+    n_weeks = (len(days) - first_monday) // 7
+    if n_weeks == 0:
+        return
+    span = slice(first_monday, first_monday + n_weeks * 7)
+
+    visitors = sessions[span].reshape(n_weeks, 7).sum(axis=1).astype(np.int64)
+    completed = conversions[span].reshape(n_weeks, 7).sum(axis=1).astype(np.int64)
+    product_views = (visitors * rng.uniform(0.35, 0.45, n_weeks)).astype(np.int64)
+    add_to_cart = (product_views * rng.uniform(0.25, 0.35, n_weeks)).astype(np.int64)
+    checkout_started = (add_to_cart * rng.uniform(0.55, 0.65, n_weeks)).astype(np.int64)
+    conv_rate = np.where(visitors > 0, completed / np.maximum(visitors, 1), 0.0)
+
+    insert_rows(conn.cursor(), "weekly_funnel", [
+        to_date_strings(days[span][::7]), visitors, product_views, add_to_cart,
+        checkout_started, completed, np.round(conv_rate, 4),
+    ])
+    conn.commit()
+
+
+def generate_lead_form_metrics(conn, rng, scale):
+    """B2B lead form metrics for weekdays on which each campaign is live."""
+    campaigns = scale.campaign_list()
+    first_launch = min(c["launch"] for c in campaigns)
+    days = date_range(max(first_launch, scale.start_date), END_DATE)
+    days = days[weekday(days) < 5]
+    n_days, n_camp = len(days), len(campaigns)
+
+    launch = np.array([np.datetime64(c["launch"].date()) for c in campaigns])
+    days_live = (days[:, None] - launch[None, :]).astype(np.int64)
+    live = days_live >= 0
+    ramp = np.clip(days_live / 30, 0.0, 1.0)
+    base = np.array([c["base_visits"] for c in campaigns], dtype=np.float64)
+    low = np.array([c["conv_rate"][0] for c in campaigns])
+    high = np.array([c["conv_rate"][1] for c in campaigns])
+
+    shape = (n_days, n_camp)
+    visits = np.maximum(1, (base * dow_factor(days)[:, None] * ramp * rng.normal(1.0, 0.15, shape)).astype(np.int64))
+    form_starts = (visits * rng.uniform(0.40, 0.55, shape)).astype(np.int64)
+    completions = (visits * rng.uniform(low, high, shape)).astype(np.int64)
+    rate = completions / visits
+
+    insert_rows(conn.cursor(), "lead_form_metrics", [
+        np.repeat(to_date_strings(days), n_camp)[live.ravel()],
+        np.tile([c["id"] for c in campaigns], n_days)[live.ravel()],
+        np.tile([c["name"] for c in campaigns], n_days)[live.ravel()],
+        visits[live],
+        form_starts[live],
+        completions[live],
+        np.round(rate[live], 4),
+    ])
+    conn.commit()
+
+
+# Table -> (label, generator), in dependency order
+GENERATORS = {
+    "daily_metrics": ("daily metrics", generate_daily_metrics),
+    "channel_metrics": ("channel metrics", generate_channel_metrics),
+    "product_metrics": ("product metrics", generate_product_metrics),
+    "support_tickets": ("support tickets", generate_support_tickets),
+    "lead_form_metrics": ("lead form metrics", generate_lead_form_metrics),
+    "weekly_funnel": ("weekly funnel", generate_weekly_funnel),
+}
+
+# Tables built from daily_metrics rows; they wait for it and are rebuilt with it
+DERIVED_FROM_DAILY = {"channel_metrics", "product_metrics", "weekly_funnel"}
+
+
+def table_rng(seed, table):
+    """
+    Independent random stream per table, keyed on the table name rather
+    than generation order, so any table can be rebuilt alone and come out
+    identical to a full build with the same seed.
+    """
+    return np.random.default_rng([seed, zlib.crc32(table.encode())])
+
+
+def resolve_tables(tables=None):
+    """Requested tables plus anything derived from them, in generation order."""
+    wanted = set(tables or GENERATORS)
+    unknown = wanted - set(GENERATORS)
+    if unknown:
+        raise ValueError(f"Unknown table(s): {', '.join(sorted(unknown))}")
+    if "daily_metrics" in wanted:
+        wanted |= DERIVED_FROM_DAILY
+    return [t for t in GENERATORS if t in wanted]
+
+
+def generate_all(conn, seed, scale, tables=None):
+    """
+    Generate tables in-process, one after another. Each table's existing
+    rows are cleared first, so derived tables rebuild cleanly too.
+    """
+    for table in resolve_tables(tables):
+        label, generator = GENERATORS[table]
+        started = time.perf_counter()
+        print(f"Generating {label}...")
+        conn.execute(f"DELETE FROM {table}")
+        generator(conn, table_rng(seed, table), scale)
+        print(f"  {load_rate(conn, table, time.perf_counter() - started)}")
+
+
+def build_stage(table, stage_path, seed, scale, daily_source):
+    """
+    Process-pool worker: generate one table into its own staging database.
+    Derived tables first copy daily_metrics from daily_source. Returns the
+    load report line for the table.
+    """
+    conn = sqlite3.connect(stage_path)
+    bulk_load(conn)
+    create_tables(conn)
+    if table in DERIVED_FROM_DAILY:
+        conn.execute("ATTACH DATABASE ? AS source", (str(daily_source),))
+        conn.execute("INSERT INTO daily_metrics SELECT * FROM source.daily_metrics")
+        conn.commit()
+        conn.execute("DETACH DATABASE source")
+    started = time.perf_counter()
+    GENERATORS[table][1](conn, table_rng(seed, table), scale)
+    report = load_rate(conn, table, time.perf_counter() - started)
+    conn.close()
+    return report
+
+
+def merge_stage(conn, table, stage_path):
+    """Replace a table's rows in conn with those from its staging database."""
+    conn.execute("ATTACH DATABASE ? AS stage", (str(stage_path),))
+    conn.execute(f"DELETE FROM main.{table}")
+    conn.execute(f"INSERT INTO main.{table} SELECT * FROM stage.{table}")
+    conn.commit()
+    conn.execute("DETACH DATABASE stage")
+
+
+def generate_parallel(conn, db_path, seed, scale, tables=None, workers=None):
+    """
+    Generate tables in a process pool, each into a staging database next to
+    db_path, then merge them into conn with ATTACH / INSERT ... SELECT.
+
+    Independent tables start immediately; tables derived from daily_metrics
+    start as soon as it is staged (or read it from db_path when only they
+    are being rebuilt).
+    """
+    tables = resolve_tables(tables)
+    db_path = Path(db_path)
+
+    with tempfile.TemporaryDirectory(dir=db_path.parent, prefix=".staging_") as staging:
+        stages = {t: Path(staging) / f"{t}.db" for t in tables}
+        daily_source = stages["daily_metrics"] if "daily_metrics" in tables else db_path
+        waiting = [t for t in tables if t in DERIVED_FROM_DAILY and "daily_metrics" in tables]
+        ready = [t for t in tables if t not in waiting]
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            running = {}
+            for table in ready:
+                print(f"Generating {GENERATORS[table][0]}...")
+                running[pool.submit(build_stage, table, stages[table], seed, scale, daily_source)] = table
+            while running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    table = running.pop(future)
+                    print(f"  {GENERATORS[table][0]}: {future.result()}")
+                    if table == "daily_metrics":
+                        for derived in waiting:
+                            print(f"Generating {GENERATORS[derived][0]}...")
+                            staged = pool.submit(build_stage, derived, stages[derived], seed, scale, daily_source)
+                            running[staged] = derived
+
+        print("Merging staged tables...")
+        for table in tables:
+            merge_stage(conn, table, stages[table])
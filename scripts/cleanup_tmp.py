@@ -1,41 +1,160 @@
 #!/usr/bin/env python3
 """
-Clean up files in tmp/ older than 24 hours.
+Clean up files in tmp/ older than 24 hours, and keep saved query results
+under a total size cap.
 Called by Claude Code SessionStart hook.
+
+The demo-data server lists every result it saves in tmp/manifest.jsonl
+(see mcp_servers/demo-data/artifact_manifest.py), least recently used
+first. Cleanup evicts from the front of the manifest - anything unused for
+MAX_AGE_SECONDS, then the oldest until MAX_TOTAL_BYTES is met - and
+rewrites it with the rest, so it never walks the tree. Files the manifest
+doesn't know about (other tools' output, results from before the
+manifest existed) are swept by age with os.scandir at most once every
+SWEEP_INTERVAL_SECONDS.
+
+By default the work runs in a detached background process so session
+start isn't blocked; pass --now to run it inline and print a summary.
 """
 
+import json
 import os
+import subprocess
+import sys
 import time
 from pathlib import Path
 
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
 # Project root is parent of scripts/
 PROJECT_ROOT = Path(__file__).parent.parent
 TMP_DIR = PROJECT_ROOT / "tmp"
+MANIFEST = TMP_DIR / "manifest.jsonl"
+SWEEP_MARKER = TMP_DIR / ".last_sweep"
 
 # 24 hours in seconds
 MAX_AGE_SECONDS = 24 * 60 * 60
+MAX_TOTAL_BYTES = 1024 * 1024 * 1024        # Saved query results kept in total
+SWEEP_INTERVAL_SECONDS = 24 * 60 * 60       # Between full os.scandir sweeps
 
 
-def cleanup():
-    if not TMP_DIR.exists():
-        return
+def read_manifest(lines):
+    """Artifact entries keyed by their paths, least recently used first."""
+    entries = {}
+    for line in lines:
+        try:
+            entry = json.loads(line)
+            key = tuple(entry["paths"])
+            entry["used"] = float(entry["used"])
+            entry["bytes"] = int(entry["bytes"])
+        except (ValueError, KeyError, TypeError):
+            continue  # Skip lines cut short by a crash
+        entries.pop(key, None)
+        entries[key] = entry
+    return entries
 
-    now = time.time()
+
+def evict(entries, now):
+    """Delete expired, then oldest, artifacts past the size cap. Returns (kept entries, files deleted)."""
+    cutoff = now - MAX_AGE_SECONDS
+    total = sum(entry["bytes"] for entry in entries.values())
+    kept = []
     deleted = 0
+    for entry in entries.values():
+        if entry["used"] >= cutoff and total <= MAX_TOTAL_BYTES:
+            kept.append(entry)
+            continue
+        for path in entry["paths"]:
+            try:
+                (TMP_DIR / path).unlink()
+                deleted += 1
+            except OSError:
+                pass  # Already gone, or can't be deleted
+        total -= entry["bytes"]
+    return kept, deleted
+
+
+def cleanup_manifest(now):
+    """
+    Evict through the manifest and rewrite it in place, under its lock.
+    Returns (files deleted, paths of the artifacts kept).
+    """
+    try:
+        f = open(MANIFEST, "r+", encoding="utf-8")
+    except FileNotFoundError:
+        return 0, set()
+    with f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        kept, deleted = evict(read_manifest(f), now)
+        f.seek(0)
+        f.truncate()
+        f.writelines(json.dumps(entry) + "\n" for entry in kept)
+    return deleted, {str(TMP_DIR / path) for entry in kept for path in entry["paths"]}
 
-    for file_path in TMP_DIR.rglob("*"):
-        if file_path.is_file():
-            age = now - file_path.stat().st_mtime
-            if age > MAX_AGE_SECONDS:
+
+def sweep(directory, cutoff, keep):
+    """
+    Delete files older than cutoff under directory, except paths in keep,
+    using the stat results scandir already has.
+    """
+    deleted = 0
+    with os.scandir(directory) as it:
+        for entry in it:
+            if entry.is_dir(follow_symlinks=False):
+                deleted += sweep(entry.path, cutoff, keep)
+            elif entry.path in keep:
+                continue
+            elif entry.stat(follow_symlinks=False).st_mtime < cutoff:
                 try:
-                    file_path.unlink()
+                    os.unlink(entry.path)
                     deleted += 1
                 except Exception:
                     pass  # Skip files that can't be deleted
+    return deleted
+
+
+def sweep_due(now):
+    try:
+        return now - SWEEP_MARKER.stat().st_mtime > SWEEP_INTERVAL_SECONDS
+    except FileNotFoundError:
+        return True
+
+
+def cleanup():
+    if not TMP_DIR.exists():
+        return
+
+    now = time.time()
+    deleted, kept = cleanup_manifest(now)
+
+    # Manifest entries are evicted by last use, not mtime - the sweep leaves them alone
+    if sweep_due(now):
+        SWEEP_MARKER.touch()
+        deleted += sweep(TMP_DIR, now - MAX_AGE_SECONDS, kept | {str(MANIFEST), str(SWEEP_MARKER)})
 
     if deleted > 0:
         print(f"Cleaned up {deleted} file(s) from tmp/")
 
 
+def cleanup_in_background():
+    """Re-run this script with --now in a detached process and return at once."""
+    if not TMP_DIR.exists():
+        return
+    subprocess.Popen(
+        [sys.executable, str(Path(__file__).resolve()), "--now"],
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+
+
 if __name__ == "__main__":
-    cleanup()
+    if "--now" in sys.argv[1:]:
+        cleanup()
+    else:
+        cleanup_in_background()